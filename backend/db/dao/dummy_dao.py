@@ -1,11 +1,12 @@
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
 
 from fastapi import Depends
-from sqlalchemy import select
+from sqlalchemy import Row, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.db.dependencies import get_db_session
 from backend.db.models.dummy_model import DummyModel
+from backend.db.pagination import apply_keyset, split_page
 
 
 class DummyDAO:
@@ -22,19 +23,39 @@ class DummyDAO:
         """
         self.session.add(DummyModel(name=name))
 
-    async def get_all_dummies(self, limit: int, offset: int) -> List[DummyModel]:
+    async def get_all_dummies(
+        self,
+        limit: int,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Row[Any]], Optional[str]]:
         """
-        Get all dummy models with limit/offset pagination.
+        Get all dummy models with limit/offset or cursor pagination.
+
+        If cursor is passed, offset is ignored and dummies
+        after the cursor are returned. Columns are selected
+        as rows, without building ORM instances.
 
         :param limit: limit of dummies.
         :param offset: offset of dummies.
-        :return: stream of dummies.
+        :param cursor: cursor built from the last dummy of the previous page.
+        :return: rows of dummies and cursor of the next page if there is one.
         """
-        raw_dummies = await self.session.execute(
-            select(DummyModel).limit(limit).offset(offset),
-        )
+        columns = select(DummyModel.id, DummyModel.name)
+        if cursor is None:
+            # One extra row tells whether there is a next page.
+            query = columns.order_by(DummyModel.id).limit(limit + 1).offset(offset)
+        else:
+            query = apply_keyset(
+                columns,
+                (DummyModel.id,),
+                limit,
+                cursor,
+                descending=False,
+            )
+        raw_dummies = await self.session.execute(query)
 
-        return list(raw_dummies.scalars().fetchall())
+        return split_page(raw_dummies.all(), limit, key=lambda dummy: (dummy.id,))
 
     async def filter(self, name: Optional[str] = None) -> List[DummyModel]:
         """
@@ -0,0 +1,144 @@
+from typing import AsyncIterator, List
+from uuid import UUID
+
+from fastapi import Depends
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db.dependencies import get_db_session, get_readonly_db_session
+from backend.db.models.follows import Follow
+from backend.db.replica import replica_read
+
+
+class FollowDAO:
+    """Class for accessing follows between users."""
+
+    def __init__(self, session: AsyncSession = Depends(get_db_session)) -> None:
+        self.session = session
+
+    async def follow(self, follower_id: UUID, followee_id: UUID) -> bool:
+        """
+        Subscribe follower to posts of followee.
+
+        :param follower_id: id of user who follows.
+        :param followee_id: id of followed user.
+        :return: True if follow is new, False if it already existed.
+        """
+        result = await self.session.execute(
+            insert(Follow)
+            .values(follower_id=follower_id, followee_id=followee_id)
+            .on_conflict_do_nothing()
+            .returning(Follow.follower_id),
+        )
+        return result.scalar_one_or_none() is not None
+
+    async def unfollow(self, follower_id: UUID, followee_id: UUID) -> bool:
+        """
+        Unsubscribe follower from posts of followee.
+
+        :param follower_id: id of user who follows.
+        :param followee_id: id of followed user.
+        :return: True if follow existed.
+        """
+        result = await self.session.execute(
+            delete(Follow)
+            .where(
+                Follow.follower_id == follower_id,
+                Follow.followee_id == followee_id,
+            )
+            .returning(Follow.follower_id),
+        )
+        return result.scalar_one_or_none() is not None
+
+    @replica_read
+    async def is_following(self, follower_id: UUID, followee_id: UUID) -> bool:
+        """
+        Check whether one user follows another.
+
+        :param follower_id: id of user who may follow.
+        :param followee_id: id of user who may be followed.
+        :return: True if follows.
+        """
+        result = await self.session.execute(
+            select(Follow.follower_id).where(
+                Follow.follower_id == follower_id,
+                Follow.followee_id == followee_id,
+            ),
+        )
+        return result.scalar_one_or_none() is not None
+
+    @replica_read
+    async def get_followee_ids(self, follower_id: UUID) -> List[UUID]:
+        """
+        Get ids of users followed by the user.
+
+        :param follower_id: id of user who follows.
+        :return: ids of followed users.
+        """
+        result = await self.session.scalars(
+            select(Follow.followee_id).where(Follow.follower_id == follower_id),
+        )
+        return list(result)
+
+    async def count_followers(self, followee_id: UUID, limit: int) -> int:
+        """
+        Count followers of the user, but no more than limit.
+
+        Counting stops at the limit, so it's cheap for popular users too.
+
+        :param followee_id: id of followed user.
+        :param limit: maximum count.
+        :return: number of followers.
+        """
+        followers = (
+            select(Follow.follower_id)
+            .where(Follow.followee_id == followee_id)
+            .limit(limit)
+            .subquery()
+        )
+        result = await self.session.scalar(select(func.count()).select_from(followers))
+        return result or 0
+
+    async def iter_follower_ids(
+        self,
+        followee_id: UUID,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[List[UUID]]:
+        """
+        Iterate over followers of the user.
+
+        Followers are paginated by id, so every batch is an index range scan.
+
+        :param followee_id: id of followed user.
+        :param batch_size: number of followers in a batch.
+        :yield: batches of follower ids.
+        """
+        query = (
+            select(Follow.follower_id)
+            .where(Follow.followee_id == followee_id)
+            .order_by(Follow.follower_id)
+            .limit(batch_size)
+        )
+        batch = list(await self.session.scalars(query))
+        while batch:
+            yield batch
+            if len(batch) < batch_size:
+                return
+            batch = list(
+                await self.session.scalars(
+                    query.where(Follow.follower_id > batch[-1]),
+                ),
+            )
+
+
+def get_readonly_follow_dao(
+    session: AsyncSession = Depends(get_readonly_db_session),
+) -> FollowDAO:
+    """
+    Get DAO for handlers which only read follows.
+
+    :param session: read-only database session.
+    :return: DAO for follows.
+    """
+    return FollowDAO(session)
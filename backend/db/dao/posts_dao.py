@@ -1,20 +1,115 @@
 # type: ignore
-from typing import List, Optional
+import contextlib
+import functools
+import re
+from datetime import datetime, timedelta, timezone
+from typing import (
+    Any,
+    AsyncIterator,
+    ContextManager,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 from uuid import UUID
 
 from fastapi import Depends
-from sqlalchemy import delete, select, update
+from redis.asyncio import ConnectionPool
+from sqlalchemy import (
+    BigInteger,
+    Float,
+    Integer,
+    Uuid,
+    any_,
+    bindparam,
+    column,
+    delete,
+    func,
+    insert,
+    select,
+    true,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from backend.db.dependencies import get_db_session
-from backend.db.models.posts import Post
+from backend.db.dependencies import get_db_session, get_readonly_db_session
+from backend.db.models.posts import SEARCH_CONFIG, FlushedViews, Post
+from backend.db.pagination import apply_keyset, split_page
+from backend.db.replica import primary_read, replica_read
+from backend.db.session import mark_writes, on_commit
+from backend.db.single_flight import ModelCodec, single_flight
+from backend.schemas.post import POST_FIELDS, PostModelDTO, PostModelInputDTO
+from backend.services.post_cache import PostCache
+from backend.services.redis.dependency import get_redis_pool
+from backend.settings import settings
+
+
+def post_columns(fields: Sequence[str]) -> List[Any]:
+    """
+    Columns to select for fields of posts.
+
+    Lists select rows instead of entities: no identity map,
+    no instance state, and unrequested columns like `content`
+    aren't fetched at all. Keyset columns and `updated_at`,
+    which versions the page, are always selected.
+
+    :param fields: fields of `PostModelDTO`.
+    :return: columns.
+    """
+    names = dict.fromkeys(["created_at", "id", "updated_at", *fields])
+    return [getattr(Post, name) for name in names]
 
 
 class PostDAO:
     """Class for accessing post table."""
 
-    def __init__(self, session: AsyncSession = Depends(get_db_session)) -> None:
+    def __init__(
+        self,
+        session: AsyncSession = Depends(get_db_session),
+        redis_pool: Optional[ConnectionPool] = Depends(get_redis_pool),
+    ) -> None:
         self.session = session
+        self.redis_pool = redis_pool
+        self.cache = PostCache(redis_pool) if redis_pool is not None else None
+
+    def cache_fill(self) -> ContextManager[None]:
+        """
+        Context of reads which are put in the cache.
+
+        Cached posts are served to everyone, so they are read
+        from primary: a lagging replica would cache stale rows.
+
+        :return: context manager.
+        """
+        if self.cache:
+            return primary_read()
+        return contextlib.nullcontext()
+
+    async def invalidate(self, post_ids: Sequence[int]) -> None:
+        """
+        Drop written posts from the cache, now and after commit.
+
+        A read between the write and the commit sees the old row
+        and may put it back in the cache, so posts are dropped
+        once more when the transaction is committed.
+
+        :param post_ids: ids of written posts.
+        """
+        if not self.cache or not post_ids:
+            return
+        await self.cache.invalidate_many(post_ids)
+        on_commit(
+            self.session.sync_session,
+            functools.partial(self.cache.invalidate_many, list(post_ids)),
+        )
 
     async def create_post_model(self, title: str, content: str, user_id: UUID) -> Post:
         """
@@ -30,27 +125,276 @@ class PostDAO:
 
         await self.session.flush()
         await self.session.refresh(post)
+        # Someone could've asked for this id before it existed.
+        await self.invalidate([post.id])
 
         return post
 
-    async def get_all_posts(self, limit: int, offset: int) -> List[Post]:
+    async def bulk_create_posts(
+        self,
+        user_id: UUID,
+        posts: Sequence[PostModelInputDTO],
+    ) -> List[int]:
+        """
+        Create many posts of one user at once.
+
+        Posts are inserted with a multi-row INSERT ... RETURNING,
+        batches of `post_bulk_copy_threshold` posts or bigger
+        are written with COPY, which is several times faster.
+
+        :param user_id: id of user, who creates the posts.
+        :param posts: posts to create.
+        :return: ids of created posts in the order of posts.
+        """
+        if not posts:
+            return []
+        if len(posts) >= settings.post_bulk_copy_threshold:
+            ids = await self._copy_posts(user_id, posts)
+        else:
+            result = await self.session.execute(
+                insert(Post).returning(Post.id, sort_by_parameter_order=True),
+                [
+                    {"user_id": user_id, "title": post.title, "content": post.content}
+                    for post in posts
+                ],
+            )
+            ids = list(result.scalars())
+        await self.invalidate(ids)
+        return ids
+
+    async def _copy_posts(
+        self,
+        user_id: UUID,
+        posts: Sequence[PostModelInputDTO],
+    ) -> List[int]:
+        # COPY can't return generated ids, so they are taken from the sequence first.
+        ids = list(
+            await self.session.scalars(
+                select(
+                    func.nextval(func.pg_get_serial_sequence(Post.__tablename__, "id")),
+                ).select_from(func.generate_series(1, len(posts))),
+            ),
+        )
+        now = datetime.now(timezone.utc)
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            Post.__tablename__,
+            records=[
+                (post_id, user_id, post.title, post.content, now, now)
+                for post_id, post in zip(ids, posts)
+            ],
+            columns=["id", "user_id", "title", "content", "created_at", "updated_at"],
+        )
+        mark_writes(self.session.sync_session)
+        return ids
+
+    @replica_read
+    async def get_candidates(self, limit: int) -> Sequence[Row[Any]]:
+        """
+        Get features of the newest posts for recommendations.
+
+        :param limit: number of posts.
+        :return: rows with id, user_id, created_at and length of posts.
+        """
+        result = await self.session.execute(
+            select(
+                Post.id,
+                Post.user_id,
+                Post.created_at,
+                (
+                    func.char_length(Post.title)
+                    + func.coalesce(func.char_length(Post.content), 0)
+                ).label("length"),
+            )
+            .order_by(Post.created_at.desc(), Post.id.desc())
+            .limit(limit),
+        )
+        return result.all()
+
+    @replica_read
+    async def get_all_posts(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        fields: Sequence[str] = POST_FIELDS,
+    ) -> Tuple[List[Row[Any]], Optional[str]]:
         """
-        Get all posts models with limit/offset pagination.
+        Get all posts models with cursor pagination.
 
         Later i'll be normally recommendation system,
-        but for now only how database it returns.
+        but for now it returns posts from newest to oldest.
 
         :param limit: limit of posts.
-        :param offset: offset of posts.
-        :return: stream of posts.
+        :param cursor: cursor of the previous page.
+        :param fields: fields of `PostModelDTO` to select.
+        :return: page of rows with selected fields and cursor of the next page.
         """
 
         raw_posts = await self.session.execute(
-            select(Post).limit(limit).offset(offset),
+            apply_keyset(
+                select(*post_columns(fields)),
+                (Post.created_at, Post.id),
+                limit,
+                cursor,
+            ),
         )
 
+        return split_page(
+            raw_posts.all(),
+            limit,
+            key=lambda post: (post.created_at, post.id),
+        )
+
+    @replica_read
+    async def get_user_posts(
+        self,
+        user_id: UUID,
+        limit: int,
+        cursor: Optional[str] = None,
+        fields: Sequence[str] = POST_FIELDS,
+    ) -> Tuple[List[Row[Any]], Optional[str]]:
+        """
+        Get posts of one user from newest to oldest with cursor pagination.
+
+        :param user_id: id of the author.
+        :param limit: limit of posts.
+        :param cursor: cursor of the previous page.
+        :param fields: fields of `PostModelDTO` to select.
+        :return: page of rows with selected fields and cursor of the next page.
+        """
+        raw_posts = await self.session.execute(
+            apply_keyset(
+                select(*post_columns(fields)).where(Post.user_id == user_id),
+                (Post.created_at, Post.id),
+                limit,
+                cursor,
+            ),
+        )
+
+        return split_page(
+            raw_posts.all(),
+            limit,
+            key=lambda post: (post.created_at, post.id),
+        )
+
+    @replica_read
+    async def get_latest_posts_of_users(
+        self,
+        user_ids: Sequence[UUID],
+        limit: int,
+        cursor: Optional[str] = None,
+    ) -> List[Post]:
+        """
+        Get newest posts written by any of given users.
+
+        Each user's posts are read by its own index scan of at most
+        `limit` rows, so it doesn't depend on how much they have posted.
+
+        :param user_ids: ids of authors.
+        :param limit: limit of posts.
+        :param cursor: cursor of the previous page.
+        :return: posts from newest to oldest.
+        """
+        if not user_ids:
+            return []
+        authors = select(
+            func.unnest(bindparam("user_ids", list(user_ids), type_=ARRAY(Uuid))).label(
+                "user_id",
+            ),
+        ).subquery("authors")
+        latest = apply_keyset(
+            select(Post).where(Post.user_id == authors.c.user_id),
+            (Post.created_at, Post.id),
+            limit,
+            cursor,
+        ).lateral("latest")
+        post = aliased(Post, latest)
+        raw_posts = await self.session.execute(
+            select(post)
+            .select_from(authors)
+            .join(latest, true())
+            .order_by(post.created_at.desc(), post.id.desc())
+            .limit(limit),
+        )
         return list(raw_posts.scalars().fetchall())
 
+    async def stream_posts(
+        self,
+        since: Optional[datetime] = None,
+        user_id: Optional[UUID] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[List[Post]]:
+        """
+        Iterate over all posts from oldest to newest through a server-side cursor.
+
+        Only one batch is kept in memory at a time.
+
+        :param since: only posts created at this time or later.
+        :param user_id: only posts of this user.
+        :param batch_size: number of posts fetched at once.
+        :yield: batches of posts.
+        """
+        query = select(Post)
+        if since is not None:
+            query = query.where(Post.created_at >= since)
+        if user_id is not None:
+            query = query.where(Post.user_id == user_id)
+        result = await self.session.stream_scalars(
+            query.order_by(Post.created_at, Post.id).execution_options(
+                yield_per=batch_size,
+            ),
+        )
+        async for batch in result.partitions():
+            yield batch
+
+    @replica_read
+    async def search_posts(
+        self,
+        query: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        prefix: bool = False,
+    ) -> Tuple[List[Post], Optional[str]]:
+        """
+        Full-text search over titles and contents of posts.
+
+        Posts are ordered by relevance, matches in title weigh more
+        than matches in content.
+
+        :param query: search query, supports websearch syntax
+            ("quoted phrases", or, -exclusion) unless prefix is set.
+        :param limit: limit of posts.
+        :param cursor: cursor of the previous page.
+        :param prefix: treat the last word as a prefix, for search-as-you-type.
+        :return: page of posts and cursor of the next page.
+        """
+        if prefix:
+            words = re.findall(r"\w+", query)
+            if not words:
+                return [], None
+            ts_query = func.to_tsquery(SEARCH_CONFIG, " & ".join(words) + ":*")
+        else:
+            ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+
+        rank = func.ts_rank(Post.search_vector, ts_query, type_=Float)
+        raw_posts = await self.session.execute(
+            apply_keyset(
+                select(Post, rank).where(Post.search_vector.bool_op("@@")(ts_query)),
+                (rank, Post.id),
+                limit,
+                cursor,
+            ),
+        )
+
+        rows, next_cursor = split_page(
+            raw_posts.all(),
+            limit,
+            key=lambda row: (row[1], row[0].id),
+        )
+        return [row[0] for row in rows], next_cursor
+
+    @replica_read
     async def filter_by_title(self, title: Optional[str] = None) -> List[Post]:
         """
         Get specific post model.
@@ -75,43 +419,244 @@ class PostDAO:
         """
         Update post model.
 
+        The ownership check and the update are done in a single statement:
+        post is looked up in a CTE, updated only if it belongs to the user,
+        and the lookup is joined with the updated row, so missing posts
+        can be told apart from someone else's posts.
+
         :param user_id: id user, who created the post.
         :param post_id: id of post.
-        :param title: title of post, if None -> will not be changed.
-        :param content: content of post, if None -> will not be changed.
-        :return bool: if True post was updated, else False.
+        :param title: title of post, if empty -> will not be changed.
+        :param content: content of post, if empty -> will not be changed.
+        :return: updated post, False if post belongs to another user,
+            None if there is no such post.
         """
-        post_raw = await self.session.execute(select(Post).where(Post.id == post_id))
-        post = post_raw.scalars().fetchall()[0]
-        if post.user_id != user_id:
-            return False
-
+        changes = {}
         if title:
-            await self.session.execute(
-                update(Post).where(Post.id == post_id).values(title=title),
-            )
+            changes["title"] = title
         if content:
-            await self.session.execute(
-                update(Post).where(Post.id == post_id).values(content=content),
+            changes["content"] = content
+        if not changes:
+            post = await self.get_post_by_id(post_id)
+            if post is None:
+                return None
+            return post if post.user_id == user_id else False
+
+        target = select(Post.id, Post.user_id).where(Post.id == post_id).cte("target")
+        updated = (
+            update(Post)
+            .where(Post.id == target.c.id, target.c.user_id == user_id)
+            .values(**changes)
+            .returning(
+                Post.id,
+                Post.title,
+                Post.content,
+                Post.user_id,
+                Post.created_at,
+                Post.updated_at,
+                Post.view_count,
+            )
+            .cte("updated")
+        )
+        updated_post = aliased(Post, updated)
+        result = await self.session.execute(
+            select(target.c.user_id, updated_post)
+            .select_from(target)
+            .outerjoin(updated, true())
+            .execution_options(populate_existing=True),
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        if row[1] is not None:
+            await self.invalidate([post_id])
+        return row[1] or False
+
+    async def claim_view_batches(self, batches: Sequence[str]) -> Set[str]:
+        """
+        Record batches of views as flushed.
+
+        Call it in the transaction adding their views: a flush retried
+        after the commit finds its batches recorded and skips them.
+        Batches older than `post_views_batch_retention` are forgotten.
+
+        :param batches: tokens of taken buffers of views.
+        :return: tokens which weren't flushed before.
+        """
+        if not batches:
+            return set()
+        retention = timedelta(seconds=settings.post_views_batch_retention)
+        await self.session.execute(
+            delete(FlushedViews).where(
+                FlushedViews.flushed_at < datetime.now(timezone.utc) - retention,
+            ),
+        )
+        claimed = await self.session.scalars(
+            pg_insert(FlushedViews)
+            .values([{"batch": batch} for batch in batches])
+            .on_conflict_do_nothing()
+            .returning(FlushedViews.batch),
+        )
+        return set(claimed)
+
+    async def bulk_add_views(self, views: Dict[int, int]) -> int:
+        """
+        Add views to counters of many posts in one statement.
+
+        Views don't modify posts, so `updated_at` is kept as is.
+
+        :param views: number of new views by post id.
+        :return: number of updated posts.
+        """
+        if not views:
+            return 0
+        pending = values(
+            column("id", Integer),
+            column("views", BigInteger),
+            name="pending",
+        ).data(list(views.items()))
+        stmt = (
+            update(Post)
+            .where(Post.id == pending.c.id)
+            .values(
+                view_count=Post.view_count + pending.c.views,
+                updated_at=Post.updated_at,
             )
-        post_raw = await self.session.execute(select(Post).where(Post.id == post_id))
-        return post_raw.scalars().fetchall()[0]
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        return result.rowcount
+
+    @replica_read
+    async def get_post_by_id(self, post_id: int) -> Optional[PostModelDTO]:
+        """
+        Get post by id.
 
-    async def get_post_by_id(self, post_id: int) -> Optional[Post | None]:
-        """Get post by id."""
+        Posts are read through redis cache if it's available.
 
-        post_raw = await self.session.execute(select(Post).where(Post.id == post_id))
-        return post_raw.scalars().fetchall()[0]
+        :param post_id: id of post.
+        :return: post or None if there is no such post.
+        """
+        if self.cache:
+            found, cached_post = await self.cache.get(post_id)
+            if found:
+                return cached_post
+        return await self.load_post_by_id(post_id)
+
+    @replica_read
+    async def get_post_version(self, post_id: int) -> Optional[datetime]:
+        """
+        Get modification time of post without loading the post.
+
+        It's taken from the cache if post is there,
+        otherwise only `updated_at` column is selected.
+
+        :param post_id: id of post.
+        :return: modification time or None if there is no such post.
+        """
+        if self.cache:
+            found, cached_post = await self.cache.get(post_id)
+            if found:
+                return cached_post.updated_at if cached_post else None
+        return await self.session.scalar(
+            select(Post.updated_at).where(Post.id == post_id),
+        )
+
+    @replica_read
+    @single_flight("post", ModelCodec(PostModelDTO))
+    async def load_post_by_id(self, post_id: int) -> Optional[PostModelDTO]:
+        """
+        Load post from the database and put it in the cache.
+
+        Concurrent loads of the same post share one query,
+        so expired cache entry of a hot post doesn't flood the database.
+
+        :param post_id: id of post.
+        :return: post or None if there is no such post.
+        """
+        with self.cache_fill():
+            post_raw = await self.session.execute(
+                select(Post).where(Post.id == post_id),
+            )
+        post = post_raw.scalar_one_or_none()
+        if post is not None:
+            post = PostModelDTO.model_validate(post)
+        if self.cache:
+            await self.cache.set(post_id, post)
+        return post
+
+    @replica_read
+    async def get_posts_by_ids(
+        self,
+        post_ids: Sequence[int],
+    ) -> Dict[int, PostModelDTO]:
+        """
+        Get many posts by ids with one query.
+
+        Posts are read from redis cache first if it's available,
+        only the rest are fetched from the database.
+
+        :param post_ids: ids of posts.
+        :return: found posts by id.
+        """
+        cached = await self.cache.get_many(post_ids) if self.cache else {}
+        posts = {post_id: post for post_id, post in cached.items() if post is not None}
+        missed = [post_id for post_id in post_ids if post_id not in cached]
+        if not missed:
+            return posts
+
+        # One statement for any number of ids, unlike IN with a parameter per id.
+        ids = bindparam("ids", missed, type_=ARRAY(Integer))
+        with self.cache_fill():
+            rows = await self.session.scalars(
+                select(Post).where(Post.id == any_(ids)),
+            )
+        fetched = {post.id: PostModelDTO.model_validate(post) for post in rows}
+        if self.cache:
+            await self.cache.set_many(
+                {post_id: fetched.get(post_id) for post_id in missed},
+            )
+        return {**posts, **fetched}
 
     async def delete_post(self, post_id: int, user_id: UUID) -> Optional[bool]:
-        """Delete post by id."""
-
-        post_raw = await self.session.execute(select(Post).where(Post.id == post_id))
-        try:
-            post = post_raw.scalars().fetchall()[0]
-        except Exception as _:
-            return False
-        if post.user_id != user_id:
-            return False
-        await self.session.execute(delete(Post).where(Post.id == post.id))
-        return True
+        """
+        Delete post by id.
+
+        Works like `update_post`: a single statement which deletes
+        the post only if it belongs to the user.
+
+        :param post_id: id of post.
+        :param user_id: id of user, who deletes the post.
+        :return: True if post was deleted, False if post belongs
+            to another user, None if there is no such post.
+        """
+        target = select(Post.id, Post.user_id).where(Post.id == post_id).cte("target")
+        deleted = (
+            delete(Post)
+            .where(Post.id == target.c.id, target.c.user_id == user_id)
+            .returning(Post.id)
+            .cte("deleted")
+        )
+        result = await self.session.execute(
+            select(deleted.c.id).select_from(target).outerjoin(deleted, true()),
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        if row.id is not None:
+            await self.invalidate([post_id])
+        return row.id is not None
+
+
+def get_readonly_post_dao(
+    session: AsyncSession = Depends(get_readonly_db_session),
+    redis_pool: Optional[ConnectionPool] = Depends(get_redis_pool),
+) -> PostDAO:
+    """
+    Get DAO for handlers which only read posts.
+
+    :param session: read-only database session.
+    :param redis_pool: redis connection pool for the post cache.
+    :return: DAO for post models.
+    """
+    return PostDAO(session, redis_pool)
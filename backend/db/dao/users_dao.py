@@ -1,21 +1,83 @@
 # type: ignore
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from uuid import UUID
 
+from fastapi import Depends
+from redis.asyncio import ConnectionPool
+from sqlalchemy import Uuid, case, column, func, or_, values
 from sqlalchemy import update as sql_update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.sql.sqltypes import DateTime, String
 
-from backend.db.models.users import User
+from backend.db.dependencies import get_readonly_db_session
+from backend.db.models.users import User, UserRecord
+from backend.db.replica import replica_read
+from backend.db.single_flight import FlightCodec, single_flight
+from backend.services.redis.dependency import get_redis_pool
+from backend.services.user_cache import UserCache
+
+
+class UserCodec(FlightCodec[Optional[User]]):
+    """
+    Codec of users loaded by coalesced `UserDAO.get_user_by_id` calls.
+
+    Users have secrets, like password hashes, so they are only copied
+    between calls in the worker and never published to redis.
+    """
+
+    shared = False
+
+    def dumps(self, value: Optional[User]) -> bytes:
+        """
+        Serialize user with all columns.
+
+        :param value: user or None.
+        :return: serialized user.
+        """
+        if value is None:
+            return b"null"
+        return UserRecord.model_validate(value).model_dump_json().encode()
+
+    def loads(self, data: bytes) -> Optional[User]:
+        """
+        Deserialize user as detached instance.
+
+        :param data: serialized user.
+        :return: user or None.
+        """
+        if data == b"null":
+            return None
+        return UserRecord.model_validate_json(data).to_user()
+
+    async def adopt(self, dao: "UserDAO", value: Optional[User]) -> Optional[User]:
+        """
+        Add user to session of the DAO without loading it.
+
+        :param dao: DAO of the follower.
+        :param value: detached user.
+        :return: user in the session.
+        """
+        if value is None:
+            return None
+        return await dao.session.merge(value, load=False)
 
 
 class UserDAO:
     """Data Access Object for User operations."""
 
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(
+        self,
+        session: AsyncSession,
+        redis_pool: Optional[ConnectionPool] = None,
+    ) -> None:
         self.session = session
+        self.redis_pool = redis_pool
+        self.user_cache = UserCache(redis_pool)
 
+    @replica_read
+    @single_flight("user", UserCodec())
     async def get_user_by_id(self, user_id: UUID) -> Optional[User]:
         """Get user by ID."""
         result = await self.session.execute(select(User).where(User.id == user_id))
@@ -43,6 +105,7 @@ class UserDAO:
 
             result = await self.session.execute(stmt)
             await self.session.commit()
+            await self.user_cache.invalidate(user_id)
 
             return result.rowcount > 0
 
@@ -69,6 +132,8 @@ class UserDAO:
 
             result = await self.session.execute(stmt)
             await self.session.commit()
+            # Drops banned and suspended users from the cache too.
+            await self.user_cache.invalidate(user_id)
 
             return result.rowcount > 0
 
@@ -93,3 +158,86 @@ class UserDAO:
         except Exception:
             await self.session.rollback()
             return False
+
+    async def bulk_update_last_activity(self, activity: Dict[UUID, datetime]) -> int:
+        """
+        Update activity timestamps of many users in one statement.
+
+        Timestamps never move backwards, so buffered values
+        older than ones in the database are ignored.
+
+        :param activity: last activity time by user id.
+        :return: number of updated users.
+        """
+        if not activity:
+            return 0
+        pending = values(
+            column("id", Uuid),
+            column("at", DateTime(timezone=True)),
+            name="pending",
+        ).data(list(activity.items()))
+        stmt = (
+            sql_update(User)
+            .where(User.id == pending.c.id)
+            .values(last_activity_at=func.greatest(User.last_activity_at, pending.c.at))
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        await self.session.commit()
+        return result.rowcount
+
+    async def bulk_update_last_login(
+        self,
+        logins: Dict[UUID, Tuple[datetime, Optional[str]]],
+    ) -> int:
+        """
+        Update login timestamps and IPs of many users in one statement.
+
+        :param logins: last login time and IP by user id.
+        :return: number of updated users.
+        """
+        if not logins:
+            return 0
+        ip_length = User.last_login_ip.type.length
+        pending = values(
+            column("id", Uuid),
+            column("at", DateTime(timezone=True)),
+            column("ip", String(ip_length)),
+            name="pending",
+        ).data(
+            [
+                # IPs which don't fit the column are dropped, not truncated.
+                (user_id, at, ip if ip and len(ip) <= ip_length else None)
+                for user_id, (at, ip) in logins.items()
+            ],
+        )
+        is_newer = or_(User.last_login_at.is_(None), User.last_login_at < pending.c.at)
+        stmt = (
+            sql_update(User)
+            .where(User.id == pending.c.id)
+            .values(
+                last_login_at=func.greatest(User.last_login_at, pending.c.at),
+                last_login_ip=case(
+                    (is_newer, func.coalesce(pending.c.ip, User.last_login_ip)),
+                    else_=User.last_login_ip,
+                ),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        await self.session.commit()
+        return result.rowcount
+
+
+def get_readonly_user_dao(
+    session: AsyncSession = Depends(get_readonly_db_session),
+    redis_pool: Optional[ConnectionPool] = Depends(get_redis_pool),
+) -> UserDAO:
+    """
+    Get DAO for handlers which only read users.
+
+    :param session: read-only database session.
+    :param redis_pool: redis connection pool for the user cache.
+    :return: DAO for users.
+    """
+    return UserDAO(session, redis_pool)
@@ -1,9 +1,12 @@
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from starlette.requests import Request
 from taskiq import TaskiqDepends
 
+from backend.db.replica import stick_to_primary
+from backend.db.session import has_writes, run_committed
+
 
 async def get_db_session(
     request: Request = TaskiqDepends(),
@@ -11,6 +14,11 @@ async def get_db_session(
     """
     Create and get database session.
 
+    Session takes a connection from the pool only when the first
+    query is executed, and it's committed only if something was written.
+    After writes, reads of the current user go to primary for a while.
+    Callbacks registered with `on_commit` run after the commit.
+
     :param request: current request.
     :yield: database session.
     """
@@ -19,5 +27,43 @@ async def get_db_session(
     try:
         yield session
     finally:
-        await session.commit()
+        if has_writes(session.sync_session):
+            await session.commit()
         await session.close()
+        await stick_to_primary(session)
+        await run_committed(session.sync_session)
+
+
+async def get_readonly_db_session(
+    request: Request = TaskiqDepends(),
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Create and get database session running READ ONLY transactions.
+
+    Use it for handlers that only read, writes fail in the database.
+
+    :param request: current request.
+    :yield: database session.
+    """
+    session: AsyncSession = request.app.state.db_readonly_session_factory()
+
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+def get_readonly_session_factory(
+    request: Request = TaskiqDepends(),
+) -> async_sessionmaker[AsyncSession]:
+    """
+    Get factory of read-only sessions.
+
+    Use it when session must outlive the handler, e.g. in streaming
+    responses: sessions from `get_db_session` are closed before
+    the response body is sent.
+
+    :param request: current request.
+    :return: session factory.
+    """
+    return request.app.state.db_readonly_session_factory
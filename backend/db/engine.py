@@ -0,0 +1,57 @@
+import asyncio
+from typing import cast
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from yarl import URL
+
+from backend.db.metrics import InstrumentedPool, remember_open_time
+from backend.settings import settings
+
+
+def create_engine(url: URL, name: str = "primary") -> AsyncEngine:
+    """
+    Create engine with pool configured by settings.
+
+    :param url: database URL.
+    :param name: name of the pool in metric labels.
+    :return: engine.
+    """
+    engine = create_async_engine(
+        str(url),
+        echo=settings.db_echo,
+        poolclass=InstrumentedPool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args={
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+            "statement_cache_size": settings.db_statement_cache_size,
+        },
+    )
+    pool = cast(InstrumentedPool, engine.sync_engine.pool)
+    pool.metrics_name = name
+    event.listen(pool, "connect", remember_open_time)
+    return engine
+
+
+async def warm_up(engine: AsyncEngine) -> None:
+    """
+    Open `db_pool_size` connections, so first requests don't wait for them.
+
+    :param engine: engine to warm up.
+    """
+    pool = cast(InstrumentedPool, engine.sync_engine.pool)
+    # Connections are held together, otherwise the same one is reused.
+    opened = await asyncio.gather(
+        *(engine.connect().start() for _ in range(pool.size())),
+        return_exceptions=True,
+    )
+    for connection in opened:
+        if isinstance(connection, BaseException):
+            logger.warning("Can't open database connection on startup: {}", connection)
+        else:
+            await connection.close()
@@ -0,0 +1,93 @@
+import time
+from typing import Any, cast
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy.pool import (
+    AsyncAdaptedQueuePool,
+    ConnectionPoolEntry,
+    PoolProxiedConnection,
+)
+
+pool_checkouts = Counter(
+    "db_pool_checkouts_total",
+    "Database connections taken from the pool",
+)
+pool_checked_out = Gauge(
+    "db_pool_checked_out_connections",
+    "Database connections in use",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+pool_overflow = Gauge(
+    "db_pool_overflow_connections",
+    "Database connections opened above pool size",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+pool_wait = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a database connection, including connecting",
+    ["pool"],
+)
+connection_age = Histogram(
+    "db_connection_age_seconds",
+    "Age of database connections when they are taken from the pool",
+    ["pool"],
+    buckets=(1, 10, 60, 300, 900, 1800, 3600, 7200),
+)
+
+# Key of connection record info with the time connection was opened.
+OPENED_AT = "opened_at"
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Connection pool exporting its state to prometheus."""
+
+    # Name of the pool in metric labels.
+    metrics_name = "primary"
+
+    def connect(self) -> PoolProxiedConnection:
+        """
+        Take connection from the pool.
+
+        :return: connection.
+        """
+        start = time.perf_counter()
+        connection = super().connect()
+        now = time.perf_counter()
+
+        pool_checkouts.inc()
+        pool_wait.labels(pool=self.metrics_name).observe(now - start)
+        opened_at = connection.info.get(OPENED_AT)
+        if opened_at is not None:
+            connection_age.labels(pool=self.metrics_name).observe(now - opened_at)
+        self._update_gauges()
+        return connection
+
+    def recreate(self) -> "InstrumentedPool":
+        """
+        Create a new pool with the same configuration.
+
+        :return: new pool.
+        """
+        pool = cast(InstrumentedPool, super().recreate())
+        pool.metrics_name = self.metrics_name
+        return pool
+
+    def _do_return_conn(self, record: ConnectionPoolEntry) -> None:
+        super()._do_return_conn(record)
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        pool_checked_out.labels(pool=self.metrics_name).set(self.checkedout())
+        pool_overflow.labels(pool=self.metrics_name).set(max(self.overflow(), 0))
+
+
+def remember_open_time(_: Any, record: ConnectionPoolEntry) -> None:
+    """
+    Save time connection was opened, listen to pool's connect event with it.
+
+    :param _: DBAPI connection.
+    :param record: connection record.
+    """
+    record.info[OPENED_AT] = time.perf_counter()
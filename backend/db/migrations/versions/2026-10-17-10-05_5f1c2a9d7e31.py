@@ -0,0 +1,30 @@
+"""Add index for keyset pagination of posts.
+
+Revision ID: 5f1c2a9d7e31
+Revises: 0598075bd7bb
+Create Date: 2026-10-17 10:05:12.418230
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5f1c2a9d7e31"
+down_revision = "0598075bd7bb"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the migration."""
+    op.create_index(
+        "ix_posts_created_at_id",
+        "posts",
+        ["created_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Undo the migration."""
+    op.drop_index("ix_posts_created_at_id", table_name="posts")
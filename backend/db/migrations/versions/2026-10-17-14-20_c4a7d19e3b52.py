@@ -0,0 +1,31 @@
+"""Add index for listing posts of a user.
+
+Revision ID: c4a7d19e3b52
+Revises: b83e4f0c2d17
+Create Date: 2026-10-17 14:20:37.215804
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c4a7d19e3b52"
+down_revision = "b83e4f0c2d17"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the migration."""
+    op.create_index(
+        "ix_posts_user_id_created_at_id",
+        "posts",
+        ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Undo the migration."""
+    op.drop_index("ix_posts_user_id_created_at_id", table_name="posts")
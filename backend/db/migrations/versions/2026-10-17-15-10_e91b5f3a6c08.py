@@ -0,0 +1,47 @@
+"""Add follows between users.
+
+Revision ID: e91b5f3a6c08
+Revises: c4a7d19e3b52
+Create Date: 2026-10-17 15:10:48.530911
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e91b5f3a6c08"
+down_revision = "c4a7d19e3b52"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the migration."""
+    op.create_table(
+        "follows",
+        sa.Column("follower_id", sa.Uuid(), nullable=False),
+        sa.Column("followee_id", sa.Uuid(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.CheckConstraint("follower_id <> followee_id", name="ck_follows_not_self"),
+        sa.ForeignKeyConstraint(["followee_id"], ["user.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["follower_id"], ["user.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("follower_id", "followee_id"),
+    )
+    op.create_index(
+        "ix_follows_followee_id_follower_id",
+        "follows",
+        ["followee_id", "follower_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Undo the migration."""
+    op.drop_index("ix_follows_followee_id_follower_id", table_name="follows")
+    op.drop_table("follows")
@@ -0,0 +1,30 @@
+"""Add view counter of posts.
+
+Revision ID: f2b6c81d9a47
+Revises: e91b5f3a6c08
+Create Date: 2026-10-17 16:05:12.480316
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f2b6c81d9a47"
+down_revision = "e91b5f3a6c08"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the migration."""
+    # Constant default doesn't rewrite the table.
+    op.add_column(
+        "posts",
+        sa.Column("view_count", sa.BigInteger(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Undo the migration."""
+    op.drop_column("posts", "view_count")
@@ -0,0 +1,36 @@
+"""Add applied batches of post views.
+
+Revision ID: a3d58e2f71c4
+Revises: f2b6c81d9a47
+Create Date: 2026-10-17 18:30:41.215907
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a3d58e2f71c4"
+down_revision = "f2b6c81d9a47"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Run the migration."""
+    op.create_table(
+        "flushed_views",
+        sa.Column("batch", sa.String(length=32), nullable=False),
+        sa.Column(
+            "flushed_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("batch"),
+    )
+
+
+def downgrade() -> None:
+    """Undo the migration."""
+    op.drop_table("flushed_views")
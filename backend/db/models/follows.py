@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+from uuid import UUID
+
+from sqlalchemy import CheckConstraint, ForeignKey, Index, func
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql.sqltypes import DateTime
+
+from backend.db.base import Base
+
+
+class Follow(Base):
+    """Subscription of one user to posts of another."""
+
+    __tablename__ = "follows"
+    __table_args__ = (
+        CheckConstraint("follower_id <> followee_id", name="ck_follows_not_self"),
+        # Used to fan out posts to followers and by ON DELETE CASCADE from user.
+        Index("ix_follows_followee_id_follower_id", "followee_id", "follower_id"),
+    )
+
+    follower_id: Mapped[UUID] = mapped_column(
+        ForeignKey("user.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    followee_id: Mapped[UUID] = mapped_column(
+        ForeignKey("user.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        default=lambda: datetime.now(timezone.utc),
+    )
@@ -1,17 +1,34 @@
 from datetime import datetime, timezone
 from uuid import UUID
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import Computed, ForeignKey, Index, func, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy.sql.sqltypes import DateTime, String, Text
+from sqlalchemy.sql.sqltypes import BigInteger, DateTime, String, Text
 
 from backend.db.base import Base
 
+# Text search configuration used for posts.
+# 'simple' doesn't stem words, so it works the same for any language.
+SEARCH_CONFIG = "simple"
+
 
 class Post(Base):
     """Model for posts in our social network."""
 
     __tablename__ = "posts"
+    __table_args__ = (
+        # Used by keyset pagination of posts listing.
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        Index("ix_posts_search_vector", "search_vector", postgresql_using="gin"),
+        # Used by listing of user's posts and by ON DELETE CASCADE from user.
+        Index(
+            "ix_posts_user_id_created_at_id",
+            "user_id",
+            text("created_at DESC"),
+            text("id DESC"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -28,3 +45,38 @@ class Post(Base):
         default=lambda: datetime.now(timezone.utc),
         onupdate=lambda: datetime.now(timezone.utc),
     )
+    # Views are buffered in redis and added here in batches.
+    view_count: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        server_default="0",
+    )
+    # Maintained by postgres, so it never gets out of sync with title and content.
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(content, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
+
+
+class FlushedViews(Base):
+    """
+    Batch of buffered views already added to view counters of posts.
+
+    It's recorded in the transaction adding the views, so a flush
+    retried after the commit doesn't add them again.
+    """
+
+    __tablename__ = "flushed_views"
+
+    batch: Mapped[str] = mapped_column(String(32), primary_key=True)
+    flushed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        default=lambda: datetime.now(timezone.utc),
+    )
@@ -1,25 +1,36 @@
 # type: ignore
+import time
 import uuid
 from datetime import datetime, timezone
 from enum import Enum as PyEnum
-from typing import Optional
+from typing import Any, Optional
 
-from fastapi import Depends
+import jwt
+from fastapi import Depends, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi_users import BaseUserManager, FastAPIUsers, UUIDIDMixin
+from fastapi_users import BaseUserManager, FastAPIUsers, UUIDIDMixin, exceptions
 from fastapi_users.authentication import (
     AuthenticationBackend,
     BearerTransport,
     JWTStrategy,
 )
 from fastapi_users.db import SQLAlchemyBaseUserTableUUID, SQLAlchemyUserDatabase
+from fastapi_users.jwt import decode_jwt
+from pydantic import BaseModel, ConfigDict
+from redis.asyncio import ConnectionPool
 from sqlalchemy import func
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, make_transient_to_detached, mapped_column
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.sql.sqltypes import DateTime, Enum, String
 
 from backend.db.base import Base
 from backend.db.dependencies import get_db_session
+from backend.db.replica import current_user_id
+from backend.services.activity import ActivityBuffer
+from backend.services.password import password_helper
+from backend.services.redis.dependency import get_redis_pool
+from backend.services.user_cache import LocalCache, UserCache
 from backend.settings import settings
 
 
@@ -97,12 +108,107 @@ class User(SQLAlchemyBaseUserTableUUID, Base):
     last_using_ip: Mapped[Optional[str]] = mapped_column(String(14), nullable=True)
 
 
+class UserSnapshot(BaseModel):
+    """
+    Part of user stored in the authentication cache.
+
+    Secrets and IPs aren't cached, they are never needed
+    by handlers of authenticated requests.
+    """
+
+    id: uuid.UUID
+    email: str
+    is_active: bool
+    is_superuser: bool
+    is_verified: bool
+    first_name: Optional[str]
+    last_name: Optional[str]
+    date_of_birth: Optional[datetime]
+    phone_number: Optional[str]
+    timezone: str
+    privacy_level: UserPrivacy
+    status: UserStatus
+    created_at: datetime
+    updated_at: datetime
+    last_login_at: Optional[datetime]
+    last_activity_at: Optional[datetime]
+    last_password_change: Optional[datetime]
+
+    model_config = ConfigDict(from_attributes=True)
+
+    def to_user(self) -> User:
+        """
+        Build detached user from snapshot.
+
+        Detached user can be added to a session and updated,
+        attributes missing in snapshot will be loaded on refresh.
+
+        :return: user instance.
+        """
+        user = User(**self.model_dump())
+        make_transient_to_detached(user)
+        return user
+
+
+class UserRecord(UserSnapshot):
+    """All columns of user, used to copy loaded users between coalesced calls."""
+
+    hashed_password: str
+    secret_word: Optional[str]
+    registration_ip: Optional[str]
+    last_login_ip: Optional[str]
+    last_using_ip: Optional[str]
+
+
 class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
     """Manages a user session and its tokens."""
 
     reset_password_token_secret = settings.users_secret
     verification_token_secret = settings.users_secret
 
+    def __init__(
+        self,
+        user_db: SQLAlchemyUserDatabase,
+        redis_pool: Optional[ConnectionPool] = None,
+    ) -> None:
+        super().__init__(user_db)
+        self.user_cache = UserCache(redis_pool)
+        self.activity = ActivityBuffer(redis_pool)
+
+    async def on_after_login(
+        self,
+        user: User,
+        request: Optional[Request] = None,
+        response: Optional[Response] = None,
+    ) -> None:
+        """Record login, it's written to the database in background."""
+        ip_address = request.client.host if request and request.client else None
+        if not await self.activity.record_login(user.id, ip_address):
+            now = datetime.now(timezone.utc)
+            await self.user_db.update(
+                user,
+                {"last_login_at": now, "last_activity_at": now},
+            )
+        # Cached user has previous login time.
+        await self.user_cache.invalidate(user.id)
+
+    async def on_after_update(
+        self,
+        user: User,
+        update_dict: dict[str, Any],
+        request: Optional[Request] = None,
+    ) -> None:
+        """Drop updated user from the authentication cache."""
+        await self.user_cache.invalidate(user.id)
+
+    async def on_after_delete(
+        self,
+        user: User,
+        request: Optional[Request] = None,
+    ) -> None:
+        """Drop deleted user from the authentication cache."""
+        await self.user_cache.invalidate(user.id)
+
     async def authenticate(
         self,
         credentials: OAuth2PasswordRequestForm,
@@ -111,10 +217,11 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
 
         user = await self.get_by_email(credentials.username)
         if user is None:
-            self.password_helper.hash(credentials.password)
+            # Hash anyway, so response time doesn't reveal existing emails.
+            await password_helper.hash(credentials.password)
             return None
 
-        verified, updated_password_hash = self.password_helper.verify_and_update(
+        verified, updated_password_hash = await password_helper.verify_and_update(
             credentials.password,
             user.hashed_password,
         )
@@ -141,23 +248,121 @@ async def get_user_db(
 
 async def get_user_manager(
     user_db: SQLAlchemyUserDatabase = Depends(get_user_db),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
 ) -> UserManager:
     """
     Yield a UserManager instance.
 
     :param user_db: SQLAlchemy user db instance
+    :param redis_pool: redis connection pool for the user cache.
     :yields: an instance of UserManager.
     """
-    yield UserManager(user_db)
+    yield UserManager(user_db, redis_pool)
+
+
+# Decoded tokens, they never change, so they are cached only in memory.
+local_tokens = LocalCache(settings.user_cache_local_size, settings.user_cache_ttl)
 
 
-def get_jwt_strategy() -> JWTStrategy:
+class CachedJWTStrategy(JWTStrategy):
+    """
+    JWT strategy which doesn't go to the database on every request.
+
+    Decoded tokens are kept in the worker's memory and users
+    are read through `UserCache`. User activity is recorded
+    to `ActivityBuffer` at most once per `user_activity_resolution`.
+    """
+
+    def __init__(
+        self,
+        secret: str,
+        lifetime_seconds: Optional[int],
+        redis_pool: Optional[ConnectionPool] = None,
+    ) -> None:
+        super().__init__(secret=secret, lifetime_seconds=lifetime_seconds)
+        self.user_cache = UserCache(redis_pool)
+        self.activity = ActivityBuffer(redis_pool)
+
+    async def _decode_user_id(
+        self,
+        token: str,
+        user_manager: UserManager,
+    ) -> Optional[uuid.UUID]:
+        user_id = local_tokens.get(token)
+        if user_id is not None:
+            return user_id
+        try:
+            data = decode_jwt(
+                token,
+                self.decode_key,
+                self.token_audience,
+                algorithms=[self.algorithm],
+            )
+            user_id = user_manager.parse_id(data["sub"])
+        except (jwt.PyJWTError, KeyError, exceptions.InvalidID):
+            return None
+        ttl = local_tokens.ttl
+        if "exp" in data:
+            # Expiring tokens mustn't outlive their expiration in the cache.
+            ttl = min(ttl, data["exp"] - time.time())
+        local_tokens.set(token, user_id, ttl=ttl)
+        return user_id
+
+    async def read_token(
+        self,
+        token: Optional[str],
+        user_manager: UserManager,
+    ) -> Optional[User]:
+        """
+        Get user by token.
+
+        :param token: JWT token.
+        :param user_manager: manager to load user from the database on cache miss.
+        :return: user or None if token is invalid.
+        """
+        if token is None:
+            return None
+        user_id = await self._decode_user_id(token, user_manager)
+        if user_id is None:
+            return None
+
+        cached_user = await self.user_cache.get(user_id)
+        if cached_user is not None:
+            user = UserSnapshot.model_validate_json(cached_user).to_user()
+        else:
+            try:
+                user = await user_manager.get(user_id)
+            except exceptions.UserNotExists:
+                return None
+            await self.activity.merge(user)
+            await self.user_cache.set(
+                user_id,
+                UserSnapshot.model_validate(user).model_dump_json().encode(),
+            )
+
+        current_user_id.set(user_id)
+        active_at = await self.activity.record_activity(user_id, throttle=True)
+        if active_at is not None and (
+            user.last_activity_at is None or user.last_activity_at < active_at
+        ):
+            set_committed_value(user, "last_activity_at", active_at)
+        return user
+
+
+def get_jwt_strategy(
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+) -> JWTStrategy:
     """
     Return a JWTStrategy in order to instantiate it dynamically.
 
+    :param redis_pool: redis connection pool for the user cache.
     :returns: instance of JWTStrategy with provided settings.
     """
-    return JWTStrategy(secret=settings.users_secret, lifetime_seconds=None)
+    return CachedJWTStrategy(
+        secret=settings.users_secret,
+        lifetime_seconds=None,
+        redis_pool=redis_pool,
+    )
 
 
 bearer_transport = BearerTransport(tokenUrl="auth/login")
@@ -174,3 +379,5 @@ backends = [
 api_users = FastAPIUsers[User, uuid.UUID](get_user_manager, backends)
 
 current_active_user = api_users.current_user(active=True)
+# Same, but anonymous requests get None instead of 401.
+optional_active_user = api_users.current_user(active=True, optional=True)
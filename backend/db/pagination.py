@@ -0,0 +1,111 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import QueryableAttribute
+from sqlalchemy.sql.elements import ColumnElement
+
+T = TypeVar("T")
+# Key column, a column of a table or an attribute of a model.
+KeyColumn = Union[ColumnElement[Any], QueryableAttribute[Any]]
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor can't be decoded."""
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Build an opaque cursor from the key values of the last row on a page.
+
+    :param values: values of the pagination key columns.
+    :return: url-safe cursor string.
+    """
+    raw = json.dumps(
+        [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in values
+        ],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str,
+    columns: Sequence[KeyColumn],
+) -> Tuple[Any, ...]:
+    """
+    Decode cursor back into values matching given key columns.
+
+    :param cursor: cursor received from a client.
+    :param columns: columns the cursor was built from.
+    :raises InvalidCursorError: if cursor is malformed.
+    :return: tuple of key values.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise InvalidCursorError("Cursor doesn't match pagination key")
+        return tuple(
+            (
+                datetime.fromisoformat(value)
+                if column.type.python_type is datetime
+                else column.type.python_type(value)
+            )
+            for column, value in zip(columns, values)
+        )
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursorError("Invalid cursor") from exc
+
+
+def apply_keyset(
+    query: Select[Any],
+    columns: Sequence[KeyColumn],
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = True,
+) -> Select[Any]:
+    """
+    Add keyset pagination to the query.
+
+    Rows are ordered by the key columns and filtered with a row comparison
+    against the cursor, so the database can seek directly to the page
+    through a matching composite index instead of skipping rows.
+    One extra row is fetched to find out whether there is a next page.
+
+    :param query: query to paginate.
+    :param columns: unique key columns, e.g. (created_at, id).
+    :param limit: page size.
+    :param cursor: cursor of the previous page.
+    :param descending: iterate from the newest key to the oldest.
+    :return: paginated query.
+    """
+    if cursor is not None:
+        key = tuple_(*columns)
+        values = tuple_(*decode_cursor(cursor, columns))
+        query = query.where(key < values if descending else key > values)
+    order = [column.desc() if descending else column.asc() for column in columns]
+    return query.order_by(*order).limit(limit + 1)
+
+
+def split_page(
+    rows: Sequence[T],
+    limit: int,
+    key: Callable[[T], Sequence[Any]],
+) -> Tuple[List[T], Optional[str]]:
+    """
+    Trim rows fetched by `apply_keyset` and build the next cursor.
+
+    :param rows: rows returned by the paginated query.
+    :param limit: page size.
+    :param key: function returning key values of a row.
+    :return: page items and cursor of the next page if there is one.
+    """
+    items = list(rows[:limit])
+    if len(rows) <= limit or not items:
+        return items, None
+    return items, encode_cursor(key(items[-1]))
@@ -0,0 +1,114 @@
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from backend.settings import settings
+
+# Key of `Connection.info` with start times of running statements.
+QUERY_START = "query_start"
+
+_LITERALS = re.compile(
+    r"'(?:[^']|'')*'"  # strings
+    r"|\$\d+|%\(\w+\)s|%s"  # bound parameters
+    r"|\b\d+(?:\.\d+)?\b",  # numbers
+)
+_LISTS = re.compile(r"\(\s*\?(?:\s*(?:::\s*\w+)?\s*,\s*\?)*(?:\s*::\s*\w+)?\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Normalize SQL, so statements differing only in values look the same.
+
+    :param statement: SQL statement.
+    :return: statement with literals and parameters replaced by `?`.
+    """
+    statement = _LITERALS.sub("?", statement)
+    statement = _LISTS.sub("(...)", statement)
+    return _SPACES.sub(" ", statement).strip()
+
+
+class QueryStats:
+    """Queries executed while handling one request."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def add(self, statement: str, duration: float) -> None:
+        """
+        Record executed statement.
+
+        :param statement: SQL statement.
+        :param duration: seconds statement took.
+        """
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """
+        Find statements executed suspiciously many times, likely N+1 queries.
+
+        :param threshold: number of executions to report.
+        :return: fingerprints of statements with their execution counts.
+        """
+        return [
+            (fingerprint(statement), count)
+            for statement, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+# Stats of the current request, set by `QueryStatsMiddleware`.
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats",
+    default=None,
+)
+
+
+def _before_execute(conn: Connection, *_: Any) -> None:
+    conn.info.setdefault(QUERY_START, []).append(time.perf_counter())
+
+
+def _after_execute(conn: Connection, _: Any, statement: str, *__: Any) -> None:
+    duration = time.perf_counter() - conn.info[QUERY_START].pop()
+    stats = query_stats.get()
+    if stats is not None:
+        stats.add(statement, duration)
+    if duration * 1000 >= settings.db_slow_query_ms:
+        # Log format adds trace_id, so the query can be found in traces.
+        logger.warning(
+            "Slow query took {:.1f} ms: {}",
+            duration * 1000,
+            fingerprint(statement),
+        )
+
+
+def _on_error(context: ExceptionContext) -> None:
+    # Failed statement never reaches after_cursor_execute.
+    if context.connection is not None and context.connection.info.get(QUERY_START):
+        context.connection.info[QUERY_START].pop()
+
+
+def instrument_queries(engine: AsyncEngine) -> None:
+    """
+    Count queries and their time for `QueryStatsMiddleware`, log slow ones.
+
+    :param engine: engine to instrument.
+    """
+    for event_name, listener in (
+        ("before_cursor_execute", _before_execute),
+        ("after_cursor_execute", _after_execute),
+        ("handle_error", _on_error),
+    ):
+        if not event.contains(engine.sync_engine, event_name, listener):
+            event.listen(engine.sync_engine, event_name, listener)
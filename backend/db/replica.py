@@ -0,0 +1,254 @@
+import asyncio
+import functools
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, TypeVar
+from uuid import UUID
+
+from loguru import logger
+from prometheus_client import Counter, Gauge
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.db.session import has_writes, has_written
+from backend.settings import settings
+
+T = TypeVar("T")
+
+# Key of `Session.info` with the router of the session.
+ROUTER = "replica_router"
+# Key of `Session.info`, set when reads of the session must go to primary.
+STICKY = "sticky"
+
+# Id of the authenticated user of the current request.
+current_user_id: ContextVar[Optional[UUID]] = ContextVar(
+    "current_user_id",
+    default=None,
+)
+# Set while a `replica_read` method is running.
+_use_replica: ContextVar[bool] = ContextVar("use_replica", default=False)
+
+# Idle replica which has replayed everything it received isn't lagging,
+# no matter how long ago the last transaction was.
+LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "END",
+)
+
+routed_reads = Counter(
+    "db_routed_reads_total",
+    "Replica-eligible queries by the database they were sent to",
+    ["target", "reason"],
+)
+replica_lag = Gauge(
+    "db_replica_lag_seconds",
+    "Seconds since the last transaction replayed on replica",
+    ["replica"],
+)
+
+
+class ReplicaRouter:
+    """
+    Chooses database for queries of `replica_read` methods.
+
+    Reads go to a random replica with acceptable lag, unless the current
+    user has written something in the last `db_replica_sticky_seconds`,
+    so users always see their own writes.
+    """
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replicas: List[AsyncEngine],
+        redis_pool: Optional[ConnectionPool] = None,
+    ) -> None:
+        self.primary = primary
+        self.replicas = replicas
+        self.redis_pool = redis_pool
+        self.lag: Dict[AsyncEngine, float] = {}
+
+    @staticmethod
+    def sticky_key(user_id: UUID) -> str:
+        """
+        Key of redis marker of a recent writer.
+
+        :param user_id: id of user.
+        :return: redis key.
+        """
+        return f"db:sticky:{user_id}"
+
+    def healthy_replicas(self) -> List[AsyncEngine]:
+        """
+        Get replicas which don't lag behind primary too much.
+
+        :return: list of engines.
+        """
+        return [
+            replica
+            for replica in self.replicas
+            if self.lag.get(replica, 0) <= settings.db_replica_max_lag
+        ]
+
+    async def is_sticky(self, user_id: Optional[UUID]) -> bool:
+        """
+        Check whether user has written recently.
+
+        :param user_id: id of user, None for anonymous requests.
+        :return: True if reads must go to primary.
+        """
+        if user_id is None or self.redis_pool is None:
+            return False
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                return bool(await redis.exists(self.sticky_key(user_id)))
+        except RedisError as exc:
+            logger.warning("Can't check replica stickiness: {}", exc)
+            # Stale reads are worse than extra load on primary.
+            return True
+
+    async def stick(self, user_id: Optional[UUID]) -> None:
+        """
+        Send reads of the user to primary for a while.
+
+        :param user_id: id of user who has written something.
+        """
+        if user_id is None or self.redis_pool is None:
+            return
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                await redis.set(
+                    self.sticky_key(user_id),
+                    1,
+                    px=int(settings.db_replica_sticky_seconds * 1000),
+                )
+        except RedisError as exc:
+            logger.warning("Can't mark user {} as writer: {}", user_id, exc)
+
+    def choose(self, session: Session) -> Optional[Engine]:
+        """
+        Choose replica for the session's query.
+
+        :param session: session executing the query.
+        :return: replica engine or None to use primary.
+        """
+        if session.info.get(STICKY):
+            reason = "sticky"
+        elif has_writes(session):
+            reason = "uncommitted"
+        else:
+            replicas = self.healthy_replicas()
+            if replicas:
+                routed_reads.labels(target="replica", reason="read").inc()
+                return random.choice(replicas).sync_engine  # noqa: S311
+            reason = "lag"
+        routed_reads.labels(target="primary", reason=reason).inc()
+        return None
+
+    async def measure_lag(self) -> None:
+        """Update lag of all replicas."""
+        for index, replica in enumerate(self.replicas):
+            try:
+                async with replica.connect() as conn:
+                    lag = await conn.scalar(LAG_QUERY)
+            except (SQLAlchemyError, OSError) as exc:
+                logger.warning("Can't measure lag of replica {}: {}", index, exc)
+                lag = float("inf")
+            self.lag[replica] = float(lag)
+            replica_lag.labels(replica=f"replica-{index}").set(float(lag))
+
+    async def monitor_lag(self) -> None:
+        """Measure replica lag forever, run it as a background task."""
+        while True:
+            await self.measure_lag()
+            await asyncio.sleep(settings.db_replica_lag_interval)
+
+
+class RoutingSession(Session):
+    """Session sending queries of `replica_read` methods to replicas."""
+
+    def get_bind(
+        self,
+        mapper: Any = None,
+        clause: Any = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Get engine for the query.
+
+        :param mapper: mapper of the queried entity.
+        :param clause: the query.
+        :param kwargs: other bind arguments.
+        :return: engine or connection.
+        """
+        router: Optional[ReplicaRouter] = self.info.get(ROUTER)
+        if router is not None and _use_replica.get() and not self._flushing:
+            replica = router.choose(self)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+def replica_read(
+    func: Callable[..., Awaitable[T]],
+) -> Callable[..., Awaitable[T]]:
+    """
+    Allow DAO method to read from a replica.
+
+    DAO must have `session` attribute. Decorated method must only read,
+    its results can be slightly stale.
+
+    :param func: DAO method.
+    :return: decorated method.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self: Any, *args: Any, **kwargs: Any) -> T:
+        session: AsyncSession = self.session
+        router: Optional[ReplicaRouter] = session.info.get(ROUTER)
+        if router is None:
+            return await func(self, *args, **kwargs)
+        if STICKY not in session.info:
+            session.info[STICKY] = await router.is_sticky(current_user_id.get())
+        token = _use_replica.set(True)
+        try:
+            return await func(self, *args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+
+    return wrapper
+
+
+@contextmanager
+def primary_read() -> Iterator[None]:
+    """
+    Send reads to primary, even inside `replica_read` methods.
+
+    Use it for reads whose results are shared, like cache entries:
+    a row read from a lagging replica would be served to everyone
+    until the entry expires.
+
+    :yield: nothing.
+    """
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+async def stick_to_primary(session: AsyncSession) -> None:
+    """
+    Send next reads of the current user to primary if session has written.
+
+    :param session: finished session.
+    """
+    router: Optional[ReplicaRouter] = session.info.get(ROUTER)
+    if router is not None and has_written(session.sync_session):
+        await router.stick(current_user_id.get())
@@ -0,0 +1,115 @@
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import ClauseElement
+
+# Key of `Session.info`, set when session has uncommitted writes.
+HAS_WRITES = "has_writes"
+# Key of `Session.info`, set when session has ever written anything.
+HAS_WRITTEN = "has_written"
+# Key of `Session.info`, callbacks waiting for commit of the transaction.
+ON_COMMIT = "on_commit"
+# Key of `Session.info`, callbacks of committed transactions not run yet.
+COMMITTED = "committed_callbacks"
+
+
+def has_writes(session: Session) -> bool:
+    """
+    Check whether session has written anything since the last commit.
+
+    :param session: sync session, `AsyncSession.sync_session` for async ones.
+    :return: True if there is something to commit.
+    """
+    if session.info.get(HAS_WRITES, False):
+        return True
+    # Objects added or changed, but not flushed yet.
+    return bool(session.new or session.deleted or session.dirty)
+
+
+def has_written(session: Session) -> bool:
+    """
+    Check whether session has written anything, committed or not.
+
+    :param session: sync session, `AsyncSession.sync_session` for async ones.
+    :return: True if session has written something.
+    """
+    return session.info.get(HAS_WRITTEN, False) or has_writes(session)
+
+
+def mark_writes(session: Session) -> None:
+    """
+    Mark session as written, when it writes bypassing SQLAlchemy, e.g. with COPY.
+
+    :param session: sync session, `AsyncSession.sync_session` for async ones.
+    """
+    session.info[HAS_WRITES] = True
+    session.info[HAS_WRITTEN] = True
+
+
+def on_commit(session: Session, callback: Callable[[], Awaitable[Any]]) -> None:
+    """
+    Run callback after the current transaction is committed.
+
+    Callbacks are dropped if transaction is rolled back. Committed ones
+    are run by `run_committed`, `get_db_session` calls it after commit.
+
+    :param session: sync session, `AsyncSession.sync_session` for async ones.
+    :param callback: async callback.
+    """
+    session.info.setdefault(ON_COMMIT, []).append(callback)
+
+
+async def run_committed(session: Session) -> None:
+    """
+    Run callbacks of committed transactions.
+
+    :param session: sync session, `AsyncSession.sync_session` for async ones.
+    """
+    for callback in session.info.pop(COMMITTED, []):
+        await callback()
+
+
+def _is_write(state: ORMExecuteState) -> bool:
+    if not state.is_select:
+        # INSERT, UPDATE, DELETE and textual statements.
+        return True
+    statement = state.statement
+    if not isinstance(statement, ClauseElement):
+        return False
+    # SELECT can still modify rows through data-modifying CTEs.
+    return any(
+        isinstance(element, UpdateBase) for element in visitors.iterate(statement)
+    )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_execute(state: ORMExecuteState) -> None:
+    if HAS_WRITES not in state.session.info and _is_write(state):
+        state.session.info[HAS_WRITES] = True
+        state.session.info[HAS_WRITTEN] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session: Session, *_: Any) -> None:
+    session.info[HAS_WRITES] = True
+    session.info[HAS_WRITTEN] = True
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _reset_writes(session: Session) -> None:
+    session.info.pop(HAS_WRITES, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _commit_callbacks(session: Session) -> None:
+    callbacks = session.info.pop(ON_COMMIT, [])
+    session.info.setdefault(COMMITTED, []).extend(callbacks)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_callbacks(session: Session) -> None:
+    session.info.pop(ON_COMMIT, None)
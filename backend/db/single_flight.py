@@ -0,0 +1,334 @@
+import asyncio
+import functools
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from loguru import logger
+from prometheus_client import Counter
+from pydantic import BaseModel
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+
+from backend.db.replica import STICKY
+from backend.db.session import has_writes
+from backend.settings import settings
+
+T = TypeVar("T")
+M = TypeVar("M", bound=BaseModel)
+
+FLIGHTS = Counter(
+    "single_flight_calls_total",
+    "Calls of single-flight DAO methods by how they got the result. "
+    "Calls with result other than leader didn't query the database.",
+    ["name", "result"],
+)
+
+# Stored instead of a result when method returned None.
+NONE = b"null"
+
+# Deletes lock only if it's still held by the leader. It must be atomic:
+# lock may expire and be taken by another leader between GET and DEL.
+RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Calls running in this worker, followers await their futures.
+_flights: Dict[Tuple[str, str], "asyncio.Future[Any]"] = {}
+
+
+class FlightCodec(ABC, Generic[T]):
+    """
+    Serializes results of a single-flight method.
+
+    Followers never get the leader's object, they get a copy decoded
+    from it, so they can't affect each other. Codec also allows sharing
+    the result with other workers through redis, unless it isn't `shared`.
+    """
+
+    # Whether results are published to other workers through redis.
+    shared = True
+
+    @abstractmethod
+    def dumps(self, value: T) -> bytes:
+        """
+        Serialize result.
+
+        :param value: result of method.
+        :return: serialized result.
+        """
+
+    @abstractmethod
+    def loads(self, data: bytes) -> T:
+        """
+        Deserialize result.
+
+        :param data: serialized result.
+        :return: result.
+        """
+
+    async def adopt(self, dao: Any, value: T) -> T:
+        """
+        Make decoded result usable with the follower's DAO.
+
+        :param dao: DAO of the follower.
+        :param value: decoded result.
+        :return: result to return from the method.
+        """
+        return value
+
+
+class ModelCodec(FlightCodec[Optional[M]]):
+    """Codec of optional pydantic models."""
+
+    def __init__(self, model: Type[M]) -> None:
+        self.model = model
+
+    def dumps(self, value: Optional[M]) -> bytes:
+        """
+        Serialize model to JSON.
+
+        :param value: model or None.
+        :return: serialized model.
+        """
+        return NONE if value is None else value.model_dump_json().encode()
+
+    def loads(self, data: bytes) -> Optional[M]:
+        """
+        Deserialize model from JSON.
+
+        :param data: serialized model.
+        :return: model or None.
+        """
+        return None if data == NONE else self.model.model_validate_json(data)
+
+
+def lock_key(name: str, key: str) -> str:
+    """
+    Redis key of lock held by the leader of a flight.
+
+    :param name: name of flight.
+    :param key: key of call.
+    :return: key.
+    """
+    return f"flight:{name}:{key}"
+
+
+def result_key(token: str) -> str:
+    """
+    Redis key of result published by the leader of a flight.
+
+    :param token: token of the leader, stored in its lock.
+    :return: key.
+    """
+    return f"flight:result:{token}"
+
+
+async def _wait_result(redis: Redis, lock: str, token: bytes) -> Optional[bytes]:
+    """
+    Poll for result of another worker's flight.
+
+    :param redis: redis client.
+    :param lock: key of lock held by the leader.
+    :param token: token of the leader.
+    :return: serialized result or None if the leader has failed or is too slow.
+    """
+    deadline = time.monotonic() + settings.single_flight_wait
+    while time.monotonic() < deadline:
+        await asyncio.sleep(settings.single_flight_poll_interval)
+        pipe = redis.pipeline(transaction=False)
+        pipe.get(result_key(token.decode()))
+        pipe.get(lock)
+        data, current = await pipe.execute()
+        if data is not None:
+            return data
+        if current != token:
+            return None
+    return None
+
+
+async def _call_once(
+    name: str,
+    key: str,
+    codec: Optional[FlightCodec[T]],
+    redis_pool: Optional[ConnectionPool],
+    call: Callable[[], Awaitable[T]],
+) -> Tuple[Optional[bytes], T, bool]:
+    """
+    Run call, or get its result from another worker running it.
+
+    :param name: name of flight.
+    :param key: key of call.
+    :param codec: codec of results, without it calls aren't shared by workers.
+    :param redis_pool: redis connection pool.
+    :param call: the call.
+    :return: serialized result if there is codec, the result
+        and whether it came from another worker.
+    """
+    if codec is None:
+        return None, await call(), False
+    if redis_pool is None or not codec.shared:
+        result = await call()
+        return codec.dumps(result), result, False
+
+    lock = lock_key(name, key)
+    token = uuid.uuid4().hex
+    try:
+        async with Redis(connection_pool=redis_pool) as redis:
+            acquired = await redis.set(
+                lock,
+                token,
+                nx=True,
+                px=int(settings.single_flight_lock_ttl * 1000),
+            )
+            if not acquired:
+                leader = await redis.get(lock)
+                data = await _wait_result(redis, lock, leader) if leader else None
+                if data is not None:
+                    return data, codec.loads(data), True
+    except RedisError as exc:
+        logger.warning("Can't coalesce {} across workers: {}", name, exc)
+        acquired = False
+    if not acquired:
+        FLIGHTS.labels(name=name, result="fallback").inc()
+        result = await call()
+        return codec.dumps(result), result, False
+
+    data = None
+    try:
+        result = await call()
+        data = codec.dumps(result)
+        return data, result, False
+    finally:
+        try:
+            async with Redis(connection_pool=redis_pool) as redis:
+                pipe = redis.pipeline(transaction=False)
+                if data is not None:
+                    pipe.set(
+                        result_key(token),
+                        data,
+                        px=int(settings.single_flight_lock_ttl * 1000),
+                    )
+                pipe.eval(RELEASE_LOCK, 1, lock, token)
+                await pipe.execute()
+        except RedisError as exc:
+            logger.warning("Can't publish result of {}: {}", name, exc)
+
+
+async def _follow(flight: "asyncio.Future[Any]") -> Tuple[bool, Any]:
+    """
+    Await result of the leader running in this worker.
+
+    :param flight: future of the leader.
+    :return: whether the leader has finished and its result.
+    """
+    try:
+        return True, await asyncio.shield(flight)
+    except asyncio.CancelledError:
+        if not flight.cancelled():
+            raise
+        # Leader was cancelled, but this call wasn't.
+        return False, None
+
+
+def _fail(flight: "asyncio.Future[Any]", exc: BaseException) -> None:
+    """
+    Pass failure of the leader to its followers.
+
+    :param flight: future of the leader.
+    :param exc: exception raised by the leader.
+    """
+    if not isinstance(exc, Exception):
+        flight.cancel()
+        return
+    flight.set_exception(exc)
+    # Don't warn about exception nobody has awaited.
+    flight.exception()
+
+
+def single_flight(
+    name: str,
+    codec: Optional[FlightCodec[Any]] = None,
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """
+    Coalesce concurrent identical calls of a DAO method.
+
+    The first call is the leader, calls with the same arguments made
+    while it runs await its result instead of querying the database.
+    With shared codec, calls in other workers wait for the leader too:
+    it holds a short redis lock and publishes the serialized result.
+
+    DAO must have `session` and `redis_pool` attributes. Method must
+    only read. Sessions with writes or sticky to primary don't coalesce,
+    they must see their own writes. Put it under `replica_read`,
+    which decides stickiness.
+
+    :param name: name of flight, used in redis keys and metrics.
+    :param codec: codec of results.
+    :return: decorator.
+    """
+
+    def decorator(
+        func: Callable[..., Awaitable[T]],
+    ) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(self: Any, *args: Any, **kwargs: Any) -> T:
+            session = self.session
+            if session.info.get(STICKY) or has_writes(session.sync_session):
+                FLIGHTS.labels(name=name, result="bypass").inc()
+                return await func(self, *args, **kwargs)
+
+            key = ":".join(
+                [*map(str, args), *(f"{k}={v}" for k, v in sorted(kwargs.items()))],
+            )
+            flight = _flights.get((name, key))
+            if flight is not None:
+                finished, flown = await _follow(flight)
+                if finished:
+                    FLIGHTS.labels(name=name, result="local").inc()
+                    if codec is None:
+                        return flown
+                    return await codec.adopt(self, codec.loads(flown))
+
+            # Followers get serialized result, leader's objects may change
+            # or expire before they read them.
+            flight = asyncio.get_running_loop().create_future()
+            _flights[(name, key)] = flight
+            try:
+                data, result, shared = await _call_once(
+                    name,
+                    key,
+                    codec,
+                    self.redis_pool,
+                    lambda: func(self, *args, **kwargs),
+                )
+            except BaseException as exc:
+                _fail(flight, exc)
+                raise
+            finally:
+                if _flights.get((name, key)) is flight:
+                    del _flights[(name, key)]
+            flight.set_result(result if codec is None else data)
+            if shared and codec is not None:
+                FLIGHTS.labels(name=name, result="remote").inc()
+                return await codec.adopt(self, result)
+            FLIGHTS.labels(name=name, result="leader").inc()
+            return result
+
+        return wrapper
+
+    return decorator
@@ -1,6 +1,9 @@
 import datetime
+import enum
+from typing import Any, Dict, List, Optional
+from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class PostModelDTO(BaseModel):
@@ -11,10 +14,35 @@ class PostModelDTO(BaseModel):
     """
 
     id: int
+    user_id: UUID
     title: str
     content: str
     updated_at: datetime.datetime
     created_at: datetime.datetime
+    view_count: int = 0
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Fields of posts which can be requested with `fields=`.
+POST_FIELDS = tuple(PostModelDTO.model_fields)
+
+
+class PartialPostDTO(BaseModel):
+    """
+    Post with some of the fields loaded.
+
+    Used for sparse fieldsets, fields which weren't requested
+    are left out when the response is serialized.
+    """
+
+    id: Optional[int] = None
+    user_id: Optional[UUID] = None
+    title: Optional[str] = None
+    content: Optional[str] = None
+    updated_at: Optional[datetime.datetime] = None
+    created_at: Optional[datetime.datetime] = None
+    view_count: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -22,7 +50,7 @@ class PostModelDTO(BaseModel):
 class PostModelInputDTO(BaseModel):
     """DTO for creating new post model."""
 
-    title: str
+    title: str = Field(max_length=255)
     content: str
 
 
@@ -31,3 +59,60 @@ class PostModelUpdateDTO(BaseModel):
 
     title: str = ""
     content: str = ""
+
+
+class PostPageDTO(BaseModel):
+    """Page of posts with cursor of the next page."""
+
+    items: List[PostModelDTO]
+    next_cursor: Optional[str] = None
+
+
+class PartialPostPageDTO(BaseModel):
+    """Page of posts with requested fields only."""
+
+    items: List[PartialPostDTO]
+    next_cursor: Optional[str] = None
+
+
+class ExportFormat(str, enum.Enum):
+    """Formats of posts export."""
+
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+# Limit of ids in one batch read of posts.
+MAX_BATCH_IDS = 500
+
+
+class PostIdsDTO(BaseModel):
+    """Ids of posts to read at once."""
+
+    ids: List[int] = Field(min_length=1, max_length=MAX_BATCH_IDS)
+
+
+class PostBatchDTO(BaseModel):
+    """Posts read by ids, in the requested order, and ids of missing posts."""
+
+    items: List[PostModelDTO]
+    missing: List[int]
+
+
+class BulkPostErrorDTO(BaseModel):
+    """Validation errors of one post of bulk creation."""
+
+    index: int
+    errors: List[Dict[str, Any]]
+
+
+class BulkPostsResultDTO(BaseModel):
+    """
+    Result of bulk creation.
+
+    Ids of created posts go in the order of valid input posts,
+    invalid ones are skipped and reported in errors.
+    """
+
+    ids: List[int]
+    errors: List[BulkPostErrorDTO]
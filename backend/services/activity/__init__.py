@@ -0,0 +1,5 @@
+"""Write-behind buffer of user activity timestamps."""
+
+from backend.services.activity.activity_buffer import ActivityBuffer
+
+__all__ = ["ActivityBuffer"]
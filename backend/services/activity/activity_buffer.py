@@ -0,0 +1,174 @@
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from loguru import logger
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+from sqlalchemy.orm.attributes import set_committed_value
+
+from backend.services.redis.buffer import flushing_key
+from backend.services.user_cache import LocalCache
+from backend.settings import settings
+
+ACTIVITY_KEY = "users:activity"
+LOGINS_KEY = "users:logins"
+
+# Users whose activity was recorded by this worker recently.
+recently_active = LocalCache(
+    settings.user_cache_local_size,
+    settings.user_activity_resolution,
+)
+
+
+def parse_activity(raw: Dict[bytes, bytes]) -> Dict[UUID, datetime]:
+    """
+    Parse buffered activity timestamps.
+
+    :param raw: contents of activity hash.
+    :return: last activity time by user id.
+    """
+    return {
+        UUID(user_id.decode()): datetime.fromtimestamp(float(at), timezone.utc)
+        for user_id, at in raw.items()
+    }
+
+
+def parse_logins(
+    raw: Dict[bytes, bytes],
+) -> Dict[UUID, Tuple[datetime, Optional[str]]]:
+    """
+    Parse buffered logins.
+
+    :param raw: contents of logins hash.
+    :return: last login time and IP by user id.
+    """
+    logins = {}
+    for user_id, value in raw.items():
+        login = json.loads(value)
+        logins[UUID(user_id.decode())] = (
+            datetime.fromtimestamp(login["at"], timezone.utc),
+            login["ip"],
+        )
+    return logins
+
+
+class ActivityBuffer:
+    """
+    Buffer of activity and login timestamps in redis.
+
+    Timestamps are written to redis hashes keyed by user id
+    instead of updating the user row on every request. The
+    `flush_user_activity` task periodically writes them to the database
+    in a single UPDATE. Until then, `merge` adds pending timestamps
+    to users read from the database.
+    """
+
+    def __init__(self, redis_pool: Optional[ConnectionPool]) -> None:
+        self.redis_pool = redis_pool
+
+    async def record_activity(
+        self,
+        user_id: UUID,
+        throttle: bool = False,
+    ) -> Optional[datetime]:
+        """
+        Record that user is active now.
+
+        :param user_id: id of user.
+        :param throttle: skip the write if this worker has recorded
+            activity of the user less than `user_activity_resolution` seconds ago.
+        :return: recorded activity time or None if redis is unavailable.
+        """
+        if self.redis_pool is None:
+            return None
+        if throttle:
+            recorded_at = recently_active.get(user_id)
+            if recorded_at is not None:
+                return recorded_at
+        now = datetime.now(timezone.utc)
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                await redis.hset(  # type: ignore[misc]
+                    ACTIVITY_KEY,
+                    str(user_id),
+                    str(now.timestamp()),
+                )
+        except RedisError as exc:
+            logger.warning("Can't record activity of user {}: {}", user_id, exc)
+            return None
+        recently_active.set(user_id, now)
+        return now
+
+    async def record_login(self, user_id: UUID, ip_address: Optional[str]) -> bool:
+        """
+        Record that user has logged in now.
+
+        Login counts as activity too.
+
+        :param user_id: id of user.
+        :param ip_address: IP user has logged in from.
+        :return: True if login was recorded.
+        """
+        if self.redis_pool is None:
+            return False
+        now = datetime.now(timezone.utc)
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                pipe = redis.pipeline(transaction=False)
+                pipe.hset(ACTIVITY_KEY, str(user_id), str(now.timestamp()))
+                pipe.hset(
+                    LOGINS_KEY,
+                    str(user_id),
+                    json.dumps({"at": now.timestamp(), "ip": ip_address}),
+                )
+                await pipe.execute()
+        except RedisError as exc:
+            logger.warning("Can't record login of user {}: {}", user_id, exc)
+            return False
+        recently_active.set(user_id, now)
+        return True
+
+    async def merge(self, user: Any) -> Any:
+        """
+        Add pending timestamps to user loaded from the database.
+
+        Values are set as committed, so session won't write them back.
+
+        :param user: user instance.
+        :return: the same user.
+        """
+        if self.redis_pool is None:
+            return user
+        field = str(user.id)
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                pipe = redis.pipeline(transaction=False)
+                for key in (ACTIVITY_KEY, LOGINS_KEY):
+                    pipe.hget(key, field)
+                    pipe.hget(flushing_key(key), field)
+                activity, flushing_activity, login, flushing_login = (
+                    await pipe.execute()
+                )
+        except RedisError as exc:
+            logger.warning("Can't read activity of user {}: {}", user.id, exc)
+            return user
+
+        pending_activity = parse_activity(
+            {field.encode(): at for at in (flushing_activity, activity) if at},
+        )
+        pending_login = parse_logins(
+            {field.encode(): value for value in (flushing_login, login) if value},
+        )
+        if user.id in pending_activity:
+            at = pending_activity[user.id]
+            if user.last_activity_at is None or user.last_activity_at < at:
+                set_committed_value(user, "last_activity_at", at)
+        if user.id in pending_login:
+            at, ip_address = pending_login[user.id]
+            if user.last_login_at is None or user.last_login_at < at:
+                set_committed_value(user, "last_login_at", at)
+                if ip_address:
+                    set_committed_value(user, "last_login_ip", ip_address)
+        return user
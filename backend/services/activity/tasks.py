@@ -0,0 +1,43 @@
+from redis.asyncio import ConnectionPool, Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+from taskiq import TaskiqDepends
+
+from backend.db.dao.users_dao import UserDAO  # type: ignore[attr-defined]
+from backend.db.dependencies import get_db_session
+from backend.services.activity.activity_buffer import (
+    ACTIVITY_KEY,
+    LOGINS_KEY,
+    parse_activity,
+    parse_logins,
+)
+from backend.services.redis.buffer import take_buffer
+from backend.services.redis.dependency import get_redis_pool
+from backend.tkq import broker
+
+
+@broker.task(schedule=[{"cron": "* * * * *"}])
+async def flush_user_activity(
+    session: AsyncSession = TaskiqDepends(get_db_session),
+    redis_pool: ConnectionPool = TaskiqDepends(get_redis_pool),
+) -> int:
+    """
+    Write buffered activity and login timestamps to the database.
+
+    Buffers are released only after the update is committed,
+    so failed flush is retried by the next run.
+
+    :param session: database session.
+    :param redis_pool: redis connection pool.
+    :return: number of updated users.
+    """
+    dao = UserDAO(session)
+    updated = 0
+    async with Redis(connection_pool=redis_pool) as redis:
+        taken_key, logins = await take_buffer(redis, LOGINS_KEY)
+        updated += await dao.bulk_update_last_login(parse_logins(logins))
+        await redis.delete(taken_key)
+
+        taken_key, activity = await take_buffer(redis, ACTIVITY_KEY)
+        updated += await dao.bulk_update_last_activity(parse_activity(activity))
+        await redis.delete(taken_key)
+    return updated
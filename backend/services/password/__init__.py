@@ -0,0 +1,8 @@
+"""Password hashing off the event loop."""
+
+from backend.services.password.password_helper import (
+    ExecutorPasswordHelper,
+    password_helper,
+)
+
+__all__ = ["ExecutorPasswordHelper", "password_helper"]
@@ -0,0 +1,152 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import HTTPException, status
+from fastapi_users.password import PasswordHelper
+from prometheus_client import Histogram
+
+from backend.settings import settings
+
+QUEUE_WAIT = Histogram(
+    "password_hash_queue_wait_seconds",
+    "Time spent waiting for a free password hashing worker.",
+)
+HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Time spent hashing or verifying a password.",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+# Each executor process gets its own copy on import.
+_helper = PasswordHelper()
+
+
+def _hash(password: str) -> str:
+    return _helper.hash(password)
+
+
+def _verify_and_update(
+    plain_password: str,
+    hashed_password: str,
+) -> Tuple[bool, Optional[str]]:
+    return _helper.verify_and_update(plain_password, hashed_password)
+
+
+def _warm_up() -> None:
+    """Do nothing, used to start executor processes."""
+
+
+class ExecutorPasswordHelper:
+    """
+    Async version of fastapi-users password helper.
+
+    Hashing takes tens of milliseconds of pure CPU, so it runs in a process
+    pool instead of the event loop. Only `workers` hashes run at once, the rest
+    wait in a queue of at most `queue_size` calls. When the queue is full,
+    new calls fail with 503, so a login storm can't pile up unbounded work.
+    """
+
+    def __init__(self, workers: int, queue_size: int) -> None:
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor: Optional[Executor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.workers > 0:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=1)
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(max(self.workers, 1))
+        return self._semaphore
+
+    async def _run(self, operation: str, func: Callable[..., Any], *args: Any) -> Any:
+        if self._waiting >= self.queue_size:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many password checks in progress, try again later",
+            )
+        semaphore = self._get_semaphore()
+        self._waiting += 1
+        queued_at = time.perf_counter()
+        try:
+            await semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        started_at = time.perf_counter()
+        QUEUE_WAIT.observe(started_at - queued_at)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(),
+                func,
+                *args,
+            )
+        finally:
+            HASH_DURATION.labels(operation=operation).observe(
+                time.perf_counter() - started_at,
+            )
+            semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash password.
+
+        :param password: plain password.
+        :return: password hash.
+        """
+        return await self._run("hash", _hash, password)
+
+    async def verify_and_update(
+        self,
+        plain_password: str,
+        hashed_password: str,
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Verify password and rehash it if hash is outdated.
+
+        :param plain_password: password to check.
+        :param hashed_password: stored hash.
+        :return: whether password matches and a new hash if it must be updated.
+        """
+        return await self._run(
+            "verify",
+            _verify_and_update,
+            plain_password,
+            hashed_password,
+        )
+
+    async def startup(self) -> None:
+        """Start executor processes, so the first login isn't slow."""
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(executor, _warm_up) for _ in range(self.workers)),
+        )
+
+    def shutdown(self) -> None:
+        """Stop executor processes."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+password_helper = ExecutorPasswordHelper(
+    workers=settings.password_hash_workers,
+    queue_size=settings.password_hash_queue_size,
+)
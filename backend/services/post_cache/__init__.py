@@ -0,0 +1,5 @@
+"""Redis cache of posts."""
+
+from backend.services.post_cache.post_cache import PostCache
+
+__all__ = ["PostCache"]
@@ -0,0 +1,177 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+from loguru import logger
+from prometheus_client import Counter
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+
+from backend.schemas.post import PostModelDTO
+from backend.settings import settings
+
+CACHE_HITS = Counter(
+    "post_cache_hits_total",
+    "Reads of posts served from redis.",
+    ["kind"],
+)
+CACHE_MISSES = Counter(
+    "post_cache_misses_total",
+    "Reads of posts which went to the database.",
+)
+CACHE_EVICTIONS = Counter(
+    "post_cache_evictions_total",
+    "Posts dropped from the cache because they were changed.",
+)
+
+# Stored instead of a post when post doesn't exist.
+MISSING = b"-"
+
+
+class PostCache:
+    """
+    Read-through cache of single posts.
+
+    Posts are stored as serialized `PostModelDTO`. Missing posts are
+    cached too, with a shorter TTL, so requests for non-existent ids
+    don't reach the database.
+
+    Entries are dropped on every write. Redis errors are logged
+    and treated as cache misses, so redis outage doesn't break reads.
+    """
+
+    def __init__(self, redis_pool: ConnectionPool) -> None:
+        self.redis_pool = redis_pool
+
+    @staticmethod
+    def key(post_id: int) -> str:
+        """
+        Redis key of a post.
+
+        :param post_id: id of post.
+        :return: key.
+        """
+        return f"posts:{post_id}"
+
+    async def get(self, post_id: int) -> Tuple[bool, Optional[PostModelDTO]]:
+        """
+        Get post from the cache.
+
+        :param post_id: id of post.
+        :return: whether post was found in the cache and the post itself,
+            which is None if post doesn't exist.
+        """
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                raw_post = await redis.get(self.key(post_id))
+        except RedisError as exc:
+            logger.warning("Can't read post {} from cache: {}", post_id, exc)
+            raw_post = None
+
+        if raw_post is None:
+            CACHE_MISSES.inc()
+            return False, None
+        if raw_post == MISSING:
+            CACHE_HITS.labels(kind="missing").inc()
+            return True, None
+        CACHE_HITS.labels(kind="found").inc()
+        return True, PostModelDTO.model_validate_json(raw_post)
+
+    async def get_many(
+        self,
+        post_ids: Sequence[int],
+    ) -> Dict[int, Optional[PostModelDTO]]:
+        """
+        Get many posts from the cache with one MGET.
+
+        :param post_ids: ids of posts.
+        :return: posts found in the cache by id, None for posts
+            which are known not to exist.
+        """
+        if not post_ids:
+            return {}
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                raw_posts = await redis.mget(
+                    [self.key(post_id) for post_id in post_ids],
+                )
+        except RedisError as exc:
+            logger.warning("Can't read {} posts from cache: {}", len(post_ids), exc)
+            raw_posts = [None] * len(post_ids)
+
+        found: Dict[int, Optional[PostModelDTO]] = {}
+        for post_id, raw_post in zip(post_ids, raw_posts):
+            if raw_post is None:
+                CACHE_MISSES.inc()
+            elif raw_post == MISSING:
+                CACHE_HITS.labels(kind="missing").inc()
+                found[post_id] = None
+            else:
+                CACHE_HITS.labels(kind="found").inc()
+                found[post_id] = PostModelDTO.model_validate_json(raw_post)
+        return found
+
+    async def set(self, post_id: int, post: Optional[PostModelDTO]) -> None:
+        """
+        Put post in the cache.
+
+        :param post_id: id of post.
+        :param post: post or None if it doesn't exist.
+        """
+        if post is None:
+            value, ttl = MISSING, settings.post_cache_missing_ttl
+        else:
+            value, ttl = post.model_dump_json().encode(), settings.post_cache_ttl
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                await redis.set(self.key(post_id), value, ex=ttl)
+        except RedisError as exc:
+            logger.warning("Can't write post {} to cache: {}", post_id, exc)
+
+    async def set_many(self, posts: Dict[int, Optional[PostModelDTO]]) -> None:
+        """
+        Put many posts in the cache in one round trip.
+
+        :param posts: posts by id, None for posts which don't exist.
+        """
+        if not posts:
+            return
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                pipe = redis.pipeline(transaction=False)
+                for post_id, post in posts.items():
+                    if post is None:
+                        value, ttl = MISSING, settings.post_cache_missing_ttl
+                    else:
+                        value = post.model_dump_json().encode()
+                        ttl = settings.post_cache_ttl
+                    pipe.set(self.key(post_id), value, ex=ttl)
+                await pipe.execute()
+        except RedisError as exc:
+            logger.warning("Can't write {} posts to cache: {}", len(posts), exc)
+
+    async def invalidate(self, post_id: int) -> None:
+        """
+        Drop post from the cache.
+
+        :param post_id: id of post.
+        """
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                await redis.delete(self.key(post_id))
+        except RedisError as exc:
+            logger.warning("Can't drop post {} from cache: {}", post_id, exc)
+        CACHE_EVICTIONS.inc()
+
+    async def invalidate_many(self, post_ids: Sequence[int]) -> None:
+        """
+        Drop many posts from the cache with one command.
+
+        :param post_ids: ids of posts.
+        """
+        if not post_ids:
+            return
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                await redis.delete(*(self.key(post_id) for post_id in post_ids))
+        except RedisError as exc:
+            logger.warning("Can't drop {} posts from cache: {}", len(post_ids), exc)
+        CACHE_EVICTIONS.inc(len(post_ids))
@@ -0,0 +1,5 @@
+"""Recommendations of posts."""
+
+from backend.services.recommendations.recommender import Recommender
+
+__all__ = ["Recommender"]
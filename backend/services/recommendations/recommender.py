@@ -0,0 +1,83 @@
+import time
+from typing import Dict, List
+from uuid import UUID
+
+import numpy as np
+
+from backend.db.dao.follows_dao import FollowDAO
+from backend.db.dao.posts_dao import PostDAO  # type: ignore[attr-defined]
+from backend.services.recommendations.scorer import Candidates, score_candidates, top_k
+from backend.services.trending import TrendingPosts
+from backend.services.user_cache import LocalCache
+from backend.settings import settings
+
+# Affinity of readers to authors by reader id, shared by requests of the worker.
+affinities = LocalCache(
+    settings.recommendation_affinity_cache_size,
+    settings.recommendation_affinity_ttl,
+)
+# Candidates are the same for all readers, they are refreshed every few seconds.
+candidates_cache = LocalCache(1, settings.recommendation_candidates_ttl)
+
+
+class Recommender:
+    """Recommends posts by scoring the newest posts for the reader."""
+
+    def __init__(
+        self,
+        post_dao: PostDAO,
+        follow_dao: FollowDAO,
+        trending: TrendingPosts,
+    ) -> None:
+        self.post_dao = post_dao
+        self.follow_dao = follow_dao
+        self.trending = trending
+
+    async def candidates(self) -> Candidates:
+        """
+        Get candidate posts with their engagement.
+
+        :return: candidates.
+        """
+        candidates = candidates_cache.get("candidates")
+        if candidates is None:
+            rows = await self.post_dao.get_candidates(
+                settings.recommendation_candidates,
+            )
+            candidates = Candidates.from_rows(rows)
+            candidates.engagement = np.asarray(
+                await self.trending.scores(candidates.post_ids.tolist()),
+                dtype=np.float64,
+            )
+            candidates_cache.set("candidates", candidates)
+        return candidates
+
+    async def affinity(self, user_id: UUID) -> Dict[UUID, float]:
+        """
+        Get affinity of the reader to authors.
+
+        :param user_id: id of reader.
+        :return: affinity by author id.
+        """
+        affinity = affinities.get(user_id)
+        if affinity is None:
+            followee_ids = await self.follow_dao.get_followee_ids(user_id)
+            affinity = dict.fromkeys(followee_ids, 1.0)
+            affinities.set(user_id, affinity)
+        return affinity
+
+    async def recommend(self, user_id: UUID, limit: int) -> List[int]:
+        """
+        Get ids of posts recommended to the reader.
+
+        :param user_id: id of reader.
+        :param limit: number of posts.
+        :return: ids of posts, the best first.
+        """
+        candidates = await self.candidates()
+        scores = score_candidates(
+            candidates,
+            await self.affinity(user_id),
+            time.time(),
+        )
+        return candidates.post_ids[top_k(scores, limit)].tolist()
@@ -0,0 +1,119 @@
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+from uuid import UUID
+
+import numpy as np
+from numpy.typing import NDArray
+
+from backend.settings import settings
+
+# Multipliers of score components, a component adds `weight * value`
+# to the multiplier of 1.
+AFFINITY_WEIGHT = 2.0
+ENGAGEMENT_WEIGHT = 0.5
+LENGTH_WEIGHT = 0.2
+# Posts longer than this many characters don't score higher.
+LENGTH_CAP = 1000.0
+
+
+class Candidates:
+    """
+    Features of candidate posts stored column-wise in numpy arrays.
+
+    Authors are stored once, posts refer to them by index,
+    so per-author values are spread over posts with one take.
+    """
+
+    def __init__(
+        self,
+        post_ids: NDArray[np.int64],
+        authors: List[UUID],
+        author_codes: NDArray[np.int64],
+        created_at: NDArray[np.float64],
+        lengths: NDArray[np.float64],
+        engagement: Optional[NDArray[np.float64]] = None,
+    ) -> None:
+        self.post_ids = post_ids
+        self.authors = authors
+        self.author_codes = author_codes
+        self.created_at = created_at
+        self.lengths = lengths
+        self.engagement = np.zeros(len(post_ids)) if engagement is None else engagement
+
+    def __len__(self) -> int:
+        return len(self.post_ids)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Any]) -> "Candidates":
+        """
+        Build candidates from rows of `PostDAO.get_candidates`.
+
+        :param rows: rows with id, user_id, created_at and length.
+        :return: candidates.
+        """
+        codes: Dict[UUID, int] = {}
+        count = len(rows)
+        return cls(
+            post_ids=np.fromiter((row.id for row in rows), np.int64, count),
+            author_codes=np.fromiter(
+                (codes.setdefault(row.user_id, len(codes)) for row in rows),
+                np.int64,
+                count,
+            ),
+            authors=list(codes),
+            created_at=np.fromiter(
+                (row.created_at.timestamp() for row in rows),
+                np.float64,
+                count,
+            ),
+            lengths=np.fromiter((row.length for row in rows), np.float64, count),
+        )
+
+
+def score_candidates(
+    candidates: Candidates,
+    affinity: Mapping[UUID, float],
+    now: float,
+) -> NDArray[np.float64]:
+    """
+    Score all candidates at once.
+
+    Score is freshness, halving every `recommendation_half_life` seconds,
+    boosted by affinity of the reader to the author, log-scaled engagement
+    and length of the post.
+
+    :param candidates: candidate posts.
+    :param affinity: affinity of the reader to authors, 0 for missing ones.
+    :param now: current unix timestamp.
+    :return: scores in order of candidates.
+    """
+    author_affinity = np.fromiter(
+        (affinity.get(author, 0.0) for author in candidates.authors),
+        np.float64,
+        len(candidates.authors),
+    )
+    ages = np.maximum(now - candidates.created_at, 0.0)
+    scores = np.exp2(-ages / settings.recommendation_half_life)
+    scores *= 1.0 + AFFINITY_WEIGHT * author_affinity[candidates.author_codes]
+    scores *= 1.0 + ENGAGEMENT_WEIGHT * np.log1p(candidates.engagement)
+    scores *= 1.0 + LENGTH_WEIGHT * np.minimum(candidates.lengths, LENGTH_CAP) / (
+        LENGTH_CAP
+    )
+    return scores
+
+
+def top_k(scores: NDArray[np.float64], k: int) -> NDArray[np.int64]:
+    """
+    Find indices of the highest scores.
+
+    Only the selected k scores are sorted, the rest are partitioned
+    in linear time.
+
+    :param scores: scores.
+    :param k: number of indices.
+    :return: indices from the highest score.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
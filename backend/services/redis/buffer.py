@@ -0,0 +1,70 @@
+import uuid
+from typing import Dict, Tuple
+
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+# Field of taken buffer with its token.
+BATCH_FIELD = "batch"
+
+
+def flushing_key(key: str) -> str:
+    """
+    Key, where buffer is moved while it's being flushed.
+
+    :param key: key of buffer.
+    :return: key of buffer being flushed.
+    """
+    return f"{key}:flushing"
+
+
+async def take_buffer(redis: Redis, key: str) -> Tuple[str, Dict[bytes, bytes]]:
+    """
+    Take write-behind buffer stored in redis hash for flushing.
+
+    The hash is atomically renamed, so writes made during the flush
+    go to a new hash and are flushed next time. If previous flush
+    crashed before releasing the buffer, its leftover is taken instead,
+    so nothing is lost.
+
+    Release buffer with `redis.delete(flushing_key)` once it's
+    written to the database.
+
+    :param redis: redis client.
+    :param key: key of buffer hash.
+    :return: key of taken buffer and its contents.
+    """
+    taken_key = flushing_key(key)
+    if not await redis.exists(taken_key):
+        try:
+            await redis.rename(key, taken_key)
+        except ResponseError:
+            # Buffer is empty, so there is no hash to rename.
+            return taken_key, {}
+    return taken_key, await redis.hgetall(taken_key)  # type: ignore[misc]
+
+
+async def batch_token(
+    redis: Redis,
+    taken_key: str,
+    contents: Dict[bytes, bytes],
+) -> str:
+    """
+    Get token of taken buffer, it's stored in the buffer.
+
+    Leftover of a crashed flush keeps its token, so flushes which
+    aren't idempotent record tokens in the database together with
+    the data and skip buffers whose tokens are already there.
+
+    :param redis: redis client.
+    :param taken_key: key of taken buffer.
+    :param contents: its contents, the token field is removed from them.
+    :return: token.
+    """
+    token = contents.pop(BATCH_FIELD.encode(), None)
+    if token is None:
+        pipe = redis.pipeline(transaction=False)
+        pipe.hsetnx(taken_key, BATCH_FIELD, uuid.uuid4().hex)
+        pipe.hget(taken_key, BATCH_FIELD)
+        _, token = await pipe.execute()
+    return token.decode()
@@ -1,13 +1,11 @@
-from typing import AsyncGenerator
-
-from redis.asyncio import Redis
+from redis.asyncio import ConnectionPool
 from starlette.requests import Request
 from taskiq import TaskiqDepends
 
 
 async def get_redis_pool(
     request: Request = TaskiqDepends(),
-) -> AsyncGenerator[Redis, None]:  # pragma: no cover
+) -> ConnectionPool:  # pragma: no cover
     """
     Returns connection pool.
 
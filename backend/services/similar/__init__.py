@@ -0,0 +1,5 @@
+"""Index of posts with similar texts."""
+
+from backend.services.similar.similar_posts import SimilarPosts
+
+__all__ = ["SimilarPosts"]
@@ -0,0 +1,13 @@
+from starlette.requests import Request
+
+from backend.services.similar.similar_posts import SimilarPosts
+
+
+def get_similar_posts(request: Request) -> SimilarPosts:  # pragma: no cover
+    """
+    Get index of similar posts of the worker.
+
+    :param request: current request.
+    :return: similar posts.
+    """
+    return request.app.state.similar_posts
@@ -0,0 +1,261 @@
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from backend.services.similar.minhash import BANDS, NUM_PERM, band_keys
+
+# Name of the symlink pointing to the latest version of the index.
+CURRENT = "current"
+_ARRAYS = ("post_ids", "signatures", "band_keys", "band_rows")
+
+
+class SimilarIndex:
+    """
+    Immutable LSH index of MinHash signatures of posts.
+
+    Index is a few numpy arrays: post ids sorted, their signatures,
+    and for every band hashes of the band sorted together with rows
+    of posts having them, so candidates are found with binary search.
+
+    Saved index is a directory of `.npy` files, workers map them
+    into memory read-only, so they share the pages of the file.
+    """
+
+    def __init__(
+        self,
+        post_ids: NDArray[np.int64],
+        signatures: NDArray[np.uint32],
+        keys: NDArray[np.uint64],
+        rows: NDArray[np.int32],
+        built_at: float = 0.0,
+        version: str = "",
+    ) -> None:
+        self.post_ids = post_ids
+        self.signatures = signatures
+        self.band_keys = keys
+        self.band_rows = rows
+        self.built_at = built_at
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self.post_ids)
+
+    @classmethod
+    def build(
+        cls,
+        post_ids: NDArray[np.int64],
+        signatures: NDArray[np.uint32],
+        built_at: Optional[float] = None,
+    ) -> "SimilarIndex":
+        """
+        Build index from signatures.
+
+        :param post_ids: ids of posts.
+        :param signatures: their signatures, shape (posts, NUM_PERM).
+        :param built_at: time of the newest change included in the index.
+        :return: index.
+        """
+        order = np.argsort(post_ids, kind="stable")
+        post_ids = np.ascontiguousarray(post_ids[order], dtype=np.int64)
+        signatures = np.ascontiguousarray(
+            signatures[order].reshape(len(post_ids), NUM_PERM),
+            dtype=np.uint32,
+        )
+        keys = band_keys(signatures)
+        rows = np.argsort(keys, axis=1, kind="stable").astype(np.int32)
+        return cls(
+            post_ids,
+            signatures,
+            np.take_along_axis(keys, rows, axis=1),
+            rows,
+            time.time() if built_at is None else built_at,
+        )
+
+    @classmethod
+    def empty(cls) -> "SimilarIndex":
+        """
+        Build index without posts.
+
+        :return: empty index.
+        """
+        return cls.build(
+            np.empty(0, dtype=np.int64),
+            np.empty((0, NUM_PERM), dtype=np.uint32),
+            built_at=0.0,
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "SimilarIndex":
+        """
+        Map the latest saved index into memory.
+
+        :param path: directory with saved indexes.
+        :raises OSError: if the current version can't be read,
+            e.g. it has been removed by newer builds.
+        :return: read-only index, empty if nothing is saved yet.
+        """
+        version = cls.current_version(path)
+        if not version:
+            return cls.empty()
+        post_ids, signatures, keys, rows = (
+            np.load(path / version / f"{name}.npy", mmap_mode="r") for name in _ARRAYS
+        )
+        built_at = float(np.load(path / version / "built_at.npy"))
+        return cls(post_ids, signatures, keys, rows, built_at=built_at, version=version)
+
+    @staticmethod
+    def current_version(path: Path) -> str:
+        """
+        Get version of the latest saved index.
+
+        :param path: directory with saved indexes.
+        :return: version, empty string if nothing is saved yet.
+        """
+        try:
+            return os.readlink(path / CURRENT)
+        except FileNotFoundError:
+            return ""
+
+    def save(self, path: Path) -> str:
+        """
+        Save index as a new version and make it current.
+
+        The `current` symlink is replaced atomically, so readers see
+        either the old or the new version. The previous version is kept
+        for readers which have resolved the symlink but haven't loaded
+        it yet, older ones are removed. Processes which have them mapped
+        keep reading them until reload.
+
+        :param path: directory with saved indexes.
+        :return: version of the saved index.
+        """
+        path.mkdir(parents=True, exist_ok=True)
+        previous = self.current_version(path)
+        version = f"index-{time.time_ns()}"
+        directory = path / version
+        directory.mkdir()
+        arrays: Tuple[NDArray[Any], ...] = (
+            self.post_ids,
+            self.signatures,
+            self.band_keys,
+            self.band_rows,
+        )
+        for name, array in zip(_ARRAYS, arrays):
+            np.save(directory / f"{name}.npy", array)
+        np.save(directory / "built_at.npy", np.float64(self.built_at))
+
+        link = path / f"{CURRENT}.{version}"
+        link.symlink_to(version)
+        link.replace(path / CURRENT)
+        for old in path.glob("index-*"):
+            if old.name not in (version, previous):
+                shutil.rmtree(old, ignore_errors=True)
+        return version
+
+    def merge(
+        self,
+        post_ids: NDArray[np.int64],
+        signatures: NDArray[np.uint32],
+        removed: Iterable[int] = (),
+        built_at: Optional[float] = None,
+    ) -> "SimilarIndex":
+        """
+        Build new index with changed posts.
+
+        :param post_ids: ids of new and updated posts.
+        :param signatures: their signatures.
+        :param removed: ids of deleted posts.
+        :param built_at: time of the newest change included in the index.
+        :return: new index.
+        """
+        dropped = np.isin(
+            self.post_ids,
+            np.concatenate([post_ids, np.fromiter(removed, np.int64)]),
+        )
+        return self.build(
+            np.concatenate([self.post_ids[~dropped], post_ids]),
+            np.concatenate([self.signatures[~dropped], signatures]),
+            built_at,
+        )
+
+    def signature_of(self, post_id: int) -> Optional[NDArray[np.uint32]]:
+        """
+        Find signature of the post.
+
+        :param post_id: id of post.
+        :return: signature or None if post isn't indexed.
+        """
+        row = np.searchsorted(self.post_ids, post_id)
+        if row < len(self.post_ids) and self.post_ids[row] == post_id:
+            return self.signatures[row]
+        return None
+
+    def candidates(self, keys: NDArray[np.uint64]) -> NDArray[np.int32]:
+        """
+        Find rows of posts sharing at least one band with the signature.
+
+        :param keys: band hashes of the signature, shape (BANDS,).
+        :return: rows of candidate posts.
+        """
+        found = []
+        for band in range(BANDS):
+            sorted_keys = self.band_keys[band]
+            start = np.searchsorted(sorted_keys, keys[band], side="left")
+            end = np.searchsorted(sorted_keys, keys[band], side="right")
+            if start < end:
+                found.append(self.band_rows[band, start:end])
+        if not found:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate(found))
+
+
+class Delta:
+    """Posts changed in this process since the index was built."""
+
+    def __init__(self) -> None:
+        # Signatures by post id, None for deleted posts, and time of change.
+        self.changes: Dict[int, Tuple[Optional[NDArray[np.uint32]], float]] = {}
+        self.buckets: Dict[Tuple[int, int], Set[int]] = {}
+
+    def set(self, post_id: int, signature: Optional[NDArray[np.uint32]]) -> None:
+        """
+        Remember changed post.
+
+        :param post_id: id of post.
+        :param signature: new signature, None if post is deleted.
+        """
+        self.changes[post_id] = (signature, time.time())
+        if signature is not None:
+            for band, key in enumerate(band_keys(signature[None, :])[:, 0]):
+                self.buckets.setdefault((band, int(key)), set()).add(post_id)
+
+    def candidates(self, keys: NDArray[np.uint64]) -> Set[int]:
+        """
+        Find changed posts sharing at least one band with the signature.
+
+        :param keys: band hashes of the signature, shape (BANDS,).
+        :return: ids of posts.
+        """
+        found: Set[int] = set()
+        for band, key in enumerate(keys):
+            found |= self.buckets.get((band, int(key)), set())
+        return found
+
+    def rebase(self, built_at: float) -> "Delta":
+        """
+        Keep only changes made after the index was built.
+
+        :param built_at: build time of the new index.
+        :return: delta for the new index.
+        """
+        delta = Delta()
+        for post_id, (signature, changed_at) in self.changes.items():
+            if changed_at > built_at:
+                delta.set(post_id, signature)
+                delta.changes[post_id] = (signature, changed_at)
+        return delta
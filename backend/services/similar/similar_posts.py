@@ -0,0 +1,180 @@
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+from numpy.typing import NDArray
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+
+from backend.services.similar.index import Delta, SimilarIndex
+from backend.services.similar.minhash import (
+    NUM_PERM,
+    band_keys,
+    signature,
+    similarity,
+)
+from backend.settings import settings
+
+# Hash of changed post ids with times of changes, the index job takes it.
+CHANGED_KEY = "posts:similar:changed"
+
+
+def post_text(title: str, content: Optional[str]) -> str:
+    """
+    Text of post compared for similarity.
+
+    :param title: title of post.
+    :param content: content of post.
+    :return: text.
+    """
+    return f"{title}\n{content or ''}"
+
+
+class SimilarPosts:
+    """
+    Finds posts with similar text using MinHash LSH index.
+
+    The index is built by `update_similar_index` task and loaded from
+    `similar_index_dir`, a newer version is picked up within
+    `similar_index_reload_interval` seconds. Posts changed in this
+    process are searched in memory until they get into the index,
+    changes made by other processes are visible after the next build.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        redis_pool: Optional[ConnectionPool] = None,
+    ) -> None:
+        self.path = path
+        self.redis_pool = redis_pool
+        self.index = SimilarIndex.load(path)
+        self.delta = Delta()
+        self.checked_at = time.monotonic()
+
+    def reload(self, force: bool = False) -> None:
+        """
+        Load the latest version of the index if it has changed.
+
+        If the index can't be loaded, e.g. its version has just been
+        removed by a newer build, the loaded one is kept until next check.
+
+        :param force: check version now, not once per reload interval.
+        """
+        now = time.monotonic()
+        if not force and now - self.checked_at < settings.similar_index_reload_interval:
+            return
+        self.checked_at = now
+        if SimilarIndex.current_version(self.path) == self.index.version:
+            return
+        try:
+            index = SimilarIndex.load(self.path)
+        except OSError as exc:
+            logger.warning("Can't load index of similar posts: {}", exc)
+            return
+        self.index = index
+        self.delta = self.delta.rebase(index.built_at)
+
+    async def posts_changed(
+        self,
+        posts: Sequence[Tuple[int, Optional[str]]],
+    ) -> None:
+        """
+        Record created, updated or deleted posts.
+
+        Call it after changes are committed, so the index job sees them.
+
+        :param posts: ids of posts with their new texts, None for deleted posts.
+        """
+        for post_id, text in posts:
+            self.delta.set(post_id, None if text is None else signature(text))
+        await self.record_changes([post_id for post_id, _ in posts])
+
+    async def record_changes(self, post_ids: Sequence[int]) -> None:
+        """
+        Record changed posts for the index job only.
+
+        Use it for many posts at once, they are searchable
+        after the next build of the index.
+
+        :param post_ids: ids of created, updated or deleted posts.
+        """
+        if not post_ids or self.redis_pool is None:
+            return
+        changed_at = time.time()
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                await redis.hset(  # type: ignore[misc]
+                    CHANGED_KEY,
+                    mapping=dict.fromkeys(post_ids, changed_at),
+                )
+        except RedisError as exc:
+            logger.warning("Can't record {} changed posts: {}", len(post_ids), exc)
+
+    def signature_of(self, post_id: int) -> Optional[NDArray[np.uint32]]:
+        """
+        Find signature of the post.
+
+        :param post_id: id of post.
+        :return: signature or None if post isn't indexed.
+        """
+        if post_id in self.delta.changes:
+            return self.delta.changes[post_id][0]
+        return self.index.signature_of(post_id)
+
+    def similar(
+        self,
+        post_id: int,
+        target: NDArray[np.uint32],
+        limit: int,
+    ) -> List[int]:
+        """
+        Find posts similar to the post.
+
+        :param post_id: id of post, it's excluded from results.
+        :param target: signature of post.
+        :param limit: number of posts.
+        :return: ids of posts at least `similar_posts_threshold` similar,
+            the most similar first.
+        """
+        self.reload()
+        keys = band_keys(target[None, :])[:, 0]
+        rows = self.index.candidates(keys)
+        post_ids = self.index.post_ids[rows]
+        signatures = self.index.signatures[rows]
+
+        # Changed posts are compared by their new signatures.
+        changes = self.delta.changes
+        if changes:
+            actual = np.fromiter(
+                (candidate not in changes for candidate in post_ids.tolist()),
+                bool,
+                len(post_ids),
+            )
+            changed = [
+                candidate
+                for candidate in self.delta.candidates(keys)
+                if changes[candidate][0] is not None
+            ]
+            post_ids = np.concatenate(
+                [post_ids[actual], np.array(changed, dtype=np.int64)],
+            )
+            signatures = np.concatenate(
+                [
+                    signatures[actual],
+                    np.array(
+                        [changes[candidate][0] for candidate in changed],
+                        dtype=np.uint32,
+                    ).reshape(len(changed), NUM_PERM),
+                ],
+            )
+
+        others = post_ids != post_id
+        post_ids, signatures = post_ids[others], signatures[others]
+        scores = similarity(target, signatures)
+        similar = scores >= settings.similar_posts_threshold
+        post_ids, scores = post_ids[similar], scores[similar]
+        order = np.lexsort((post_ids, -scores))[:limit]
+        return post_ids[order].tolist()
@@ -0,0 +1,98 @@
+import time
+from typing import List
+
+import numpy as np
+from numpy.typing import NDArray
+from redis.asyncio import ConnectionPool, Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+from taskiq import TaskiqDepends
+
+from backend.db.dao.posts_dao import PostDAO  # type: ignore[attr-defined]
+from backend.db.dependencies import get_db_session
+from backend.services.redis.buffer import take_buffer
+from backend.services.redis.dependency import get_redis_pool
+from backend.services.similar.index import SimilarIndex
+from backend.services.similar.minhash import NUM_PERM, signature
+from backend.services.similar.similar_posts import CHANGED_KEY, post_text
+from backend.settings import settings
+from backend.tkq import broker
+
+
+def stack(signatures: List[NDArray[np.uint32]]) -> NDArray[np.uint32]:
+    """
+    Stack signatures into one array.
+
+    :param signatures: signatures.
+    :return: array of shape (posts, NUM_PERM).
+    """
+    return np.array(signatures, dtype=np.uint32).reshape(len(signatures), NUM_PERM)
+
+
+async def build_index(dao: PostDAO, built_at: float) -> SimilarIndex:
+    """
+    Build index of all posts.
+
+    :param dao: DAO for post models.
+    :param built_at: time the build started.
+    :return: index.
+    """
+    post_ids: List[int] = []
+    signatures: List[NDArray[np.uint32]] = []
+    async for batch in dao.stream_posts():
+        for post in batch:
+            post_signature = signature(post_text(post.title, post.content))
+            if post_signature is not None:
+                post_ids.append(post.id)
+                signatures.append(post_signature)
+    return SimilarIndex.build(
+        np.array(post_ids, dtype=np.int64),
+        stack(signatures),
+        built_at,
+    )
+
+
+@broker.task(schedule=[{"cron": "* * * * *"}])
+async def update_similar_index(
+    full: bool = False,
+    session: AsyncSession = TaskiqDepends(get_db_session),
+    redis_pool: ConnectionPool = TaskiqDepends(get_redis_pool),
+) -> int:
+    """
+    Add changed posts to the index of similar posts and save it.
+
+    Index is built from scratch when there is none yet or on request.
+    Run it in a single worker on the host of web workers,
+    they load the index from `similar_index_dir`.
+
+    :param full: rebuild index from all posts.
+    :param session: database session.
+    :param redis_pool: redis connection pool.
+    :return: number of indexed posts.
+    """
+    path = settings.similar_index_dir
+    index = SimilarIndex.load(path)
+    dao = PostDAO(session, None)
+    built_at = time.time()
+    async with Redis(connection_pool=redis_pool) as redis:
+        taken_key, changed = await take_buffer(redis, CHANGED_KEY)
+        if full or not index.version:
+            index = await build_index(dao, built_at)
+        elif changed:
+            posts = await dao.get_posts_by_ids([int(post_id) for post_id in changed])
+            post_ids, signatures = [], []
+            for post in posts.values():
+                post_signature = signature(post_text(post.title, post.content))
+                if post_signature is not None:
+                    post_ids.append(post.id)
+                    signatures.append(post_signature)
+            index = index.merge(
+                np.array(post_ids, dtype=np.int64),
+                stack(signatures),
+                removed=(int(post_id) for post_id in changed),
+                built_at=built_at,
+            )
+        else:
+            return len(index)
+        index.save(path)
+        await redis.delete(taken_key)
+    return len(index)
@@ -0,0 +1,5 @@
+"""Home timelines of users."""
+
+from backend.services.timeline.timeline import Timeline
+
+__all__ = ["Timeline"]
@@ -0,0 +1,77 @@
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from backend.db.dao.follows_dao import FollowDAO
+from backend.db.dao.posts_dao import PostDAO  # type: ignore[attr-defined]
+from backend.db.models.posts import Post
+from backend.db.pagination import decode_cursor, split_page
+from backend.schemas.post import PostModelDTO
+from backend.services.timeline.timeline import Entry, Timeline
+
+
+async def get_feed_page(
+    user_id: UUID,
+    limit: int,
+    cursor: Optional[str],
+    post_dao: PostDAO,
+    follow_dao: FollowDAO,
+    timeline: Timeline,
+) -> Tuple[List[PostModelDTO], Optional[str]]:
+    """
+    Get page of posts of followed users from newest to oldest.
+
+    Posts pushed to the user's timeline are merged with posts of followed
+    celebrities, which are read on demand. If timeline can't be read,
+    posts of all followed users are read from the database.
+    Posts of unfollowed users are skipped, so page can be shorter than limit.
+
+    :param user_id: id of reader.
+    :param limit: page size.
+    :param cursor: cursor of the previous page.
+    :param post_dao: DAO for post models.
+    :param follow_dao: DAO for follows.
+    :param timeline: timelines storage.
+    :raises InvalidCursorError: if cursor is malformed.
+    :return: posts and cursor of the next page.
+    """
+    before: Optional[Entry] = None
+    if cursor is not None:
+        created_at, post_id = decode_cursor(cursor, (Post.created_at, Post.id))
+        before = (post_id, created_at)
+
+    followee_ids = await follow_dao.get_followee_ids(user_id)
+    authors = {user_id, *followee_ids}
+    entries = await timeline.read(user_id, limit + 1, before)
+    if entries is None:
+        entries, pulled_authors = [], authors
+    else:
+        pulled_authors = await timeline.celebrities_among(followee_ids)
+
+    pulled = await post_dao.get_latest_posts_of_users(
+        list(pulled_authors),
+        limit + 1,
+        cursor,
+    )
+    posts: Dict[int, PostModelDTO] = {
+        post.id: PostModelDTO.model_validate(post) for post in pulled
+    }
+    # Celebrity could have been fanned out before, so ids are deduplicated.
+    created = dict(entries)
+    created.update((post.id, post.created_at) for post in pulled)
+    page, next_cursor = split_page(
+        sorted(created.items(), key=lambda entry: (entry[1], entry[0]), reverse=True),
+        limit,
+        key=lambda entry: (entry[1], entry[0]),
+    )
+
+    posts.update(
+        await post_dao.get_posts_by_ids(
+            [post_id for post_id, _ in page if post_id not in posts],
+        ),
+    )
+    items = [
+        posts[post_id]
+        for post_id, _ in page
+        if post_id in posts and posts[post_id].user_id in authors
+    ]
+    return items, next_cursor
@@ -0,0 +1,108 @@
+from typing import Dict, List
+from uuid import UUID
+
+from redis.asyncio import ConnectionPool
+from sqlalchemy.ext.asyncio import AsyncSession
+from taskiq import TaskiqDepends
+
+from backend.db.dao.follows_dao import FollowDAO
+from backend.db.dao.posts_dao import PostDAO  # type: ignore[attr-defined]
+from backend.db.dao.users_dao import UserDAO  # type: ignore[attr-defined]
+from backend.db.dependencies import get_db_session
+from backend.db.models.users import UserPrivacy  # type: ignore[attr-defined]
+from backend.services.redis.dependency import get_redis_pool
+from backend.services.timeline.timeline import Entry, Timeline
+from backend.settings import settings
+from backend.tkq import broker
+
+
+async def is_fanned_out(
+    author_id: UUID,
+    session: AsyncSession,
+    timeline: Timeline,
+) -> bool:
+    """
+    Check whether posts of the author are pushed to followers' timelines.
+
+    Private posts are never pushed. Authors with more than
+    `timeline_celebrity_followers` followers are marked as celebrities,
+    their followers read their posts on demand.
+
+    :param author_id: id of author.
+    :param session: database session.
+    :param timeline: timelines storage.
+    :return: True if posts must be pushed to followers.
+    """
+    author = await UserDAO(session).get_user_by_id(author_id)
+    if author is None or author.privacy_level == UserPrivacy.PRIVATE:
+        return False
+    threshold = settings.timeline_celebrity_followers
+    followers = await FollowDAO(session).count_followers(author_id, threshold + 1)
+    celebrity = followers > threshold
+    await timeline.set_celebrity(author_id, celebrity)
+    return not celebrity
+
+
+@broker.task
+async def fan_out_posts(
+    post_ids: List[int],
+    session: AsyncSession = TaskiqDepends(get_db_session),
+    redis_pool: ConnectionPool = TaskiqDepends(get_redis_pool),
+) -> int:
+    """
+    Push new posts to timelines of their authors and followers.
+
+    Kick it after posts are committed.
+
+    :param post_ids: ids of new posts.
+    :param session: database session.
+    :param redis_pool: redis connection pool.
+    :return: number of updated timelines.
+    """
+    timeline = Timeline(redis_pool)
+    posts = await PostDAO(session, redis_pool).get_posts_by_ids(post_ids)
+    by_author: Dict[UUID, List[Entry]] = {}
+    for post in posts.values():
+        by_author.setdefault(post.user_id, []).append((post.id, post.created_at))
+
+    updated = 0
+    for author_id, entries in by_author.items():
+        await timeline.push([author_id], entries)
+        updated += 1
+        if not await is_fanned_out(author_id, session, timeline):
+            continue
+        follower_batches = FollowDAO(session).iter_follower_ids(
+            author_id,
+            settings.timeline_fan_out_batch,
+        )
+        async for follower_ids in follower_batches:
+            await timeline.push(follower_ids, entries)
+            updated += len(follower_ids)
+    return updated
+
+
+@broker.task
+async def backfill_timeline(
+    follower_id: UUID,
+    followee_id: UUID,
+    session: AsyncSession = TaskiqDepends(get_db_session),
+    redis_pool: ConnectionPool = TaskiqDepends(get_redis_pool),
+) -> int:
+    """
+    Push recent posts of just followed user to follower's timeline.
+
+    :param follower_id: id of user who follows.
+    :param followee_id: id of followed user.
+    :param session: database session.
+    :param redis_pool: redis connection pool.
+    :return: number of pushed posts.
+    """
+    timeline = Timeline(redis_pool)
+    if not await is_fanned_out(followee_id, session, timeline):
+        return 0
+    posts, _ = await PostDAO(session, None).get_user_posts(
+        followee_id,
+        settings.timeline_size,
+    )
+    await timeline.push([follower_id], [(post.id, post.created_at) for post in posts])
+    return len(posts)
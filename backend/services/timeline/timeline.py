@@ -0,0 +1,187 @@
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from loguru import logger
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+
+from backend.settings import settings
+
+# Set of users whose posts aren't fanned out, followers read them on demand.
+CELEBRITIES_KEY = "timeline:celebrities"
+
+# Timeline entry: id of post and its creation time.
+Entry = Tuple[int, datetime]
+
+
+def score(created_at: datetime) -> float:
+    """
+    Score of post in timeline sorted set.
+
+    :param created_at: creation time of post.
+    :return: unix timestamp, it keeps microseconds exactly.
+    """
+    return created_at.timestamp()
+
+
+class Timeline:
+    """
+    Home timelines of users stored in redis sorted sets.
+
+    Every timeline keeps ids of the newest `timeline_size` posts
+    of followed users scored by creation time, so a page is read
+    with one `ZREVRANGEBYSCORE` no matter how many posts there are.
+
+    Redis errors are logged, reads return None then,
+    so callers can build the page from the database.
+    """
+
+    def __init__(self, redis_pool: ConnectionPool) -> None:
+        self.redis_pool = redis_pool
+
+    @staticmethod
+    def key(user_id: UUID) -> str:
+        """
+        Redis key of user's timeline.
+
+        :param user_id: id of timeline owner.
+        :return: key.
+        """
+        return f"timeline:{user_id}"
+
+    async def push(self, user_ids: Sequence[UUID], entries: Sequence[Entry]) -> None:
+        """
+        Add posts to timelines of many users in one round trip.
+
+        Timelines are trimmed to `timeline_size` newest posts.
+
+        :param user_ids: ids of timeline owners.
+        :param entries: posts to add.
+        """
+        if not user_ids or not entries:
+            return
+        mapping = {str(post_id): score(created_at) for post_id, created_at in entries}
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                pipe = redis.pipeline(transaction=False)
+                for user_id in user_ids:
+                    pipe.zadd(self.key(user_id), mapping)
+                    pipe.zremrangebyrank(
+                        self.key(user_id),
+                        0,
+                        -settings.timeline_size - 1,
+                    )
+                await pipe.execute()
+        except RedisError as exc:
+            logger.warning("Can't push posts to {} timelines: {}", len(user_ids), exc)
+
+    async def read(
+        self,
+        user_id: UUID,
+        limit: int,
+        before: Optional[Entry] = None,
+    ) -> Optional[List[Entry]]:
+        """
+        Read page of timeline from newest to oldest.
+
+        :param user_id: id of timeline owner.
+        :param limit: number of entries.
+        :param before: last entry of the previous page.
+        :return: entries older than `before`, None if redis is unavailable.
+        """
+        key = self.key(user_id)
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                if before is None:
+                    raw_entries = await redis.zrevrangebyscore(
+                        key,
+                        "+inf",
+                        "-inf",
+                        start=0,
+                        num=limit,
+                        withscores=True,
+                    )
+                else:
+                    # Posts created at the same time as `before` go before
+                    # and after it, they are read too and filtered here.
+                    max_score = score(before[1])
+                    ties = await redis.zcount(key, max_score, max_score)
+                    raw_entries = await redis.zrevrangebyscore(
+                        key,
+                        max_score,
+                        "-inf",
+                        start=0,
+                        num=limit + ties,
+                        withscores=True,
+                    )
+        except RedisError as exc:
+            logger.warning("Can't read timeline of {}: {}", user_id, exc)
+            return None
+
+        entries = sorted(
+            (
+                (int(post_id), datetime.fromtimestamp(post_score, timezone.utc))
+                for post_id, post_score in raw_entries
+            ),
+            key=lambda entry: (entry[1], entry[0]),
+            reverse=True,
+        )
+        if before is not None:
+            entries = [
+                entry
+                for entry in entries
+                if (entry[1], entry[0]) < (before[1], before[0])
+            ]
+        return entries[:limit]
+
+    async def is_celebrity(self, user_id: UUID) -> bool:
+        """
+        Check whether user's posts are read on demand instead of fan-out.
+
+        :param user_id: id of user.
+        :return: True for celebrities.
+        """
+        return bool(await self.celebrities_among([user_id]))
+
+    async def celebrities_among(self, user_ids: Sequence[UUID]) -> Set[UUID]:
+        """
+        Find celebrities among users.
+
+        :param user_ids: ids of users.
+        :return: ids of celebrities.
+        """
+        if not user_ids:
+            return set()
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                flags = await redis.smismember(  # type: ignore[misc]
+                    CELEBRITIES_KEY,
+                    [str(user_id) for user_id in user_ids],
+                )
+        except RedisError as exc:
+            logger.warning("Can't read celebrities: {}", exc)
+            return set()
+        return {user_id for user_id, flag in zip(user_ids, flags) if flag}
+
+    async def set_celebrity(self, user_id: UUID, celebrity: bool) -> None:
+        """
+        Mark or unmark user as celebrity.
+
+        :param user_id: id of user.
+        :param celebrity: whether user has too many followers for fan-out.
+        """
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                if celebrity:
+                    await redis.sadd(  # type: ignore[misc]
+                        CELEBRITIES_KEY,
+                        str(user_id),
+                    )
+                else:
+                    await redis.srem(  # type: ignore[misc]
+                        CELEBRITIES_KEY,
+                        str(user_id),
+                    )
+        except RedisError as exc:
+            logger.warning("Can't update celebrity {}: {}", user_id, exc)
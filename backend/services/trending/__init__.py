@@ -0,0 +1,5 @@
+"""Trending posts ranked in redis."""
+
+from backend.services.trending.trending import TrendingPosts
+
+__all__ = ["TrendingPosts"]
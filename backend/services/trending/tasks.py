@@ -0,0 +1,18 @@
+from redis.asyncio import ConnectionPool
+from taskiq import TaskiqDepends
+
+from backend.services.redis.dependency import get_redis_pool
+from backend.services.trending.trending import TrendingPosts
+from backend.tkq import broker
+
+
+@broker.task(schedule=[{"cron": "* * * * *"}])
+async def rotate_trending_posts(
+    redis_pool: ConnectionPool = TaskiqDepends(get_redis_pool),
+) -> None:
+    """
+    Start new trending period when it's time and trim trending posts.
+
+    :param redis_pool: redis connection pool.
+    """
+    await TrendingPosts(redis_pool).rotate()
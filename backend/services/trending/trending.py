@@ -0,0 +1,184 @@
+import time
+from typing import List, Optional, Sequence
+
+from loguru import logger
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+
+from backend.settings import settings
+
+# Weight of a post view in trending score.
+VIEW_WEIGHT = 1.0
+
+
+def period_start(now: float) -> int:
+    """
+    Start of the trending period containing given time.
+
+    :param now: unix timestamp.
+    :return: unix timestamp of period start.
+    """
+    return int(now // settings.trending_period) * settings.trending_period
+
+
+def decay() -> float:
+    """
+    Factor to scale scores of the previous period to the current one.
+
+    :return: factor.
+    """
+    return 2 ** (-settings.trending_period / settings.trending_half_life)
+
+
+class TrendingPosts:
+    """
+    Posts ranked by time-decayed number of views.
+
+    Instead of decaying all scores as time goes, every event adds
+    `weight * 2 ** (age of period / half life)` to the post's score,
+    so newer events are worth exponentially more and the ranking is
+    the same as with decayed scores. The multiplier is relative
+    to the start of the period, so it stays small: every period has
+    its own sorted set, and `rotate` carries the previous one into it
+    scaled down by `2 ** -(period / half life)`.
+
+    Ranking is read with one `ZREVRANGE`, unless the period has just
+    started and isn't rotated yet. Redis errors are logged,
+    trending posts are optional.
+    """
+
+    def __init__(self, redis_pool: ConnectionPool) -> None:
+        self.redis_pool = redis_pool
+
+    @staticmethod
+    def key(start: int) -> str:
+        """
+        Redis key of the sorted set of a period.
+
+        :param start: start of the period.
+        :return: key.
+        """
+        return f"posts:trending:{start}"
+
+    @staticmethod
+    def carried_key(start: int) -> str:
+        """
+        Key set once the previous period is carried into the period.
+
+        :param start: start of the period.
+        :return: key.
+        """
+        return f"posts:trending:{start}:carried"
+
+    async def record(
+        self,
+        post_id: int,
+        weight: float = VIEW_WEIGHT,
+        now: Optional[float] = None,
+    ) -> None:
+        """
+        Increase trending score of the post.
+
+        :param post_id: id of post.
+        :param weight: weight of the event, e.g. `VIEW_WEIGHT`.
+        :param now: time of the event, defaults to the current time.
+        """
+        now = time.time() if now is None else now
+        start = period_start(now)
+        increment = weight * 2 ** ((now - start) / settings.trending_half_life)
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                pipe = redis.pipeline(transaction=False)
+                pipe.zincrby(self.key(start), increment, post_id)
+                pipe.expire(self.key(start), 2 * settings.trending_period)
+                await pipe.execute()
+        except RedisError as exc:
+            logger.warning("Can't record trending post {}: {}", post_id, exc)
+
+    async def scores(
+        self,
+        post_ids: Sequence[int],
+        now: Optional[float] = None,
+    ) -> List[float]:
+        """
+        Get trending scores of many posts with one command.
+
+        Scores are comparable only within the same period.
+
+        :param post_ids: ids of posts.
+        :param now: current time, defaults to the current time.
+        :return: scores in order of ids, 0 for posts which aren't trending.
+        """
+        if not post_ids:
+            return []
+        start = period_start(time.time() if now is None else now)
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                scores = await redis.zmscore(
+                    self.key(start),
+                    [str(post_id) for post_id in post_ids],
+                )
+        except RedisError as exc:
+            logger.warning("Can't read trending scores: {}", exc)
+            return [0.0] * len(post_ids)
+        return [score or 0.0 for score in scores]
+
+    async def top(self, limit: int, now: Optional[float] = None) -> List[int]:
+        """
+        Get ids of the most trending posts.
+
+        :param limit: number of posts.
+        :param now: current time, defaults to the current time.
+        :return: ids of posts, the most trending first.
+        """
+        start = period_start(time.time() if now is None else now)
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                pipe = redis.pipeline(transaction=False)
+                pipe.exists(self.carried_key(start))
+                pipe.zrevrange(self.key(start), 0, limit - 1)
+                carried, post_ids = await pipe.execute()
+                if not carried:
+                    # New period has just started and `rotate` hasn't run yet,
+                    # so rotation is done on the fly, sets are trimmed anyway.
+                    scored = await redis.zunion(
+                        {
+                            self.key(start): 1,
+                            self.key(start - settings.trending_period): decay(),
+                        },
+                        withscores=True,
+                    )
+                    scored.sort(key=lambda entry: entry[1], reverse=True)
+                    post_ids = [post_id for post_id, _ in scored[:limit]]
+        except RedisError as exc:
+            logger.warning("Can't read trending posts: {}", exc)
+            return []
+        return [int(post_id) for post_id in post_ids]
+
+    async def rotate(self, now: Optional[float] = None) -> None:
+        """
+        Carry the previous period into the current one and trim it.
+
+        Run it periodically, it does the carrying only once per period.
+
+        :param now: current time, defaults to the current time.
+        """
+        start = period_start(time.time() if now is None else now)
+        key = self.key(start)
+        previous = self.key(start - settings.trending_period)
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                carry = await redis.set(
+                    self.carried_key(start),
+                    1,
+                    nx=True,
+                    ex=2 * settings.trending_period,
+                )
+                pipe = redis.pipeline(transaction=True)
+                if carry:
+                    pipe.zunionstore(key, {key: 1, previous: decay()})
+                pipe.zremrangebyrank(key, 0, -settings.trending_size - 1)
+                pipe.expire(key, 2 * settings.trending_period)
+                await pipe.execute()
+        except RedisError as exc:
+            logger.warning("Can't rotate trending posts: {}", exc)
@@ -0,0 +1,5 @@
+"""Cache of authenticated users."""
+
+from backend.services.user_cache.user_cache import LocalCache, UserCache
+
+__all__ = ["LocalCache", "UserCache"]
@@ -0,0 +1,150 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from uuid import UUID
+
+from loguru import logger
+from prometheus_client import Counter
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+
+from backend.settings import settings
+
+CACHE_LOOKUPS = Counter(
+    "user_cache_lookups_total",
+    "Lookups of authenticated users by result. "
+    "Hit ratio is (local_hit + redis_hit) / all lookups.",
+    ["result"],
+)
+
+
+class LocalCache:
+    """LRU cache with TTL, living in the memory of a single worker."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Get value if it's not expired.
+
+        :param key: key of value.
+        :return: value or None.
+        """
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store value, evicting the least recently used one if cache is full.
+
+        :param key: key of value.
+        :param value: value to store.
+        :param ttl: seconds to keep value, defaults to ttl of cache.
+        """
+        self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """
+        Remove value.
+
+        :param key: key of value.
+        """
+        self._data.pop(key, None)
+
+
+# Shared by all requests of the worker.
+local_users = LocalCache(settings.user_cache_local_size, settings.user_cache_local_ttl)
+
+
+class UserCache:
+    """
+    Two-tier cache of serialized users.
+
+    Users are looked up in the worker's memory first, then in redis.
+    Other workers can't be notified about invalidation, so the memory
+    tier has a TTL of a few seconds and redis is the source of truth.
+    Without redis pool only the memory tier is used.
+    """
+
+    def __init__(self, redis_pool: Optional[ConnectionPool] = None) -> None:
+        self.redis_pool = redis_pool
+
+    @staticmethod
+    def key(user_id: UUID) -> str:
+        """
+        Redis key of a user.
+
+        :param user_id: id of user.
+        :return: key.
+        """
+        return f"users:{user_id}"
+
+    async def get(self, user_id: UUID) -> Optional[bytes]:
+        """
+        Get serialized user.
+
+        :param user_id: id of user.
+        :return: serialized user or None if it's not cached.
+        """
+        data = local_users.get(user_id)
+        if data is not None:
+            CACHE_LOOKUPS.labels(result="local_hit").inc()
+            return data
+
+        if self.redis_pool is not None:
+            try:
+                async with Redis(connection_pool=self.redis_pool) as redis:
+                    data = await redis.get(self.key(user_id))
+            except RedisError as exc:
+                logger.warning("Can't read user {} from cache: {}", user_id, exc)
+        if data is not None:
+            CACHE_LOOKUPS.labels(result="redis_hit").inc()
+            local_users.set(user_id, data)
+            return data
+
+        CACHE_LOOKUPS.labels(result="miss").inc()
+        return None
+
+    async def set(self, user_id: UUID, data: bytes) -> None:
+        """
+        Store serialized user.
+
+        :param user_id: id of user.
+        :param data: serialized user.
+        """
+        local_users.set(user_id, data)
+        if self.redis_pool is None:
+            return
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                await redis.set(self.key(user_id), data, ex=settings.user_cache_ttl)
+        except RedisError as exc:
+            logger.warning("Can't write user {} to cache: {}", user_id, exc)
+
+    async def invalidate(self, user_id: UUID) -> None:
+        """
+        Drop user from the cache.
+
+        :param user_id: id of user.
+        """
+        local_users.pop(user_id)
+        if self.redis_pool is None:
+            return
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                await redis.delete(self.key(user_id))
+        except RedisError as exc:
+            logger.warning("Can't drop user {} from cache: {}", user_id, exc)
@@ -4,26 +4,32 @@ from typing import Optional
 from uuid import UUID
 
 from fastapi import HTTPException, status
+from redis.asyncio import ConnectionPool
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.db.dao.users_dao import UserDAO
 from backend.db.models.users import User, UserManager
+from backend.services.activity import ActivityBuffer
+from backend.services.password import password_helper
 
 
 class UserService:
     """Service for user-related operations."""
 
-    def __init__(self, session: AsyncSession, user_manager: UserManager) -> None:
-        self.user_dao = UserDAO(session)
+    def __init__(
+        self,
+        session: AsyncSession,
+        user_manager: UserManager,
+        redis_pool: Optional[ConnectionPool] = None,
+    ) -> None:
+        self.user_dao = UserDAO(session, redis_pool)
         self.user_manager = user_manager
+        self.activity = ActivityBuffer(redis_pool)
 
     async def verify_password(self, user: User, password: str) -> bool:
         """Verify if the provided password matches the user's current password."""
 
-        (
-            verified,
-            updated_password_hash,
-        ) = self.user_manager.password_helper.verify_and_update(
+        verified, updated_password_hash = await password_helper.verify_and_update(
             password,
             user.hashed_password,
         )
@@ -96,7 +102,7 @@ class UserService:
 
         await self.validate_new_password(user, new_password)
 
-        hashed_password = self.user_manager.password_helper.hash(new_password)
+        hashed_password = await password_helper.hash(new_password)
 
         success = await self.user_dao.update_password(
             user_id,
@@ -114,7 +120,10 @@ class UserService:
 
     async def get_user_profile(self, user_id: UUID) -> Optional[User]:
         """Get user profile by their id."""
-        return await self.user_dao.get_user_by_id(user_id)
+        user = await self.user_dao.get_user_by_id(user_id)
+        if user is None:
+            return None
+        return await self.activity.merge(user)
 
     async def update_user_profile(self, user_id: UUID, update_data: dict) -> bool:
         """Update user's progile information."""
@@ -136,8 +145,10 @@ class UserService:
         return True
 
     async def record_user_activity(self, user_id: UUID) -> bool:
-        """Record user activity timestamp."""
+        """Record user activity timestamp, it's written to db in background."""
 
+        if await self.activity.record_activity(user_id) is not None:
+            return True
         return await self.user_dao.update_last_activity(user_id)
 
     async def update_user_last_login(
@@ -145,13 +156,13 @@ class UserService:
         user_id: UUID,
         ip_address: Optional[str] = None,
     ) -> bool:
-        """Update user's last login timestamp and IP."""
+        """Update user's last login timestamp and IP in background."""
 
-        update_data = {
-            "last_login_at": datetime.now(timezone.utc),
-            "last_activity_at": datetime.now(timezone.utc),
-        }
+        if await self.activity.record_login(user_id, ip_address):
+            return True
 
+        now = datetime.now(timezone.utc)
+        update_data = {"last_login_at": now, "last_activity_at": now}
         if ip_address:
             update_data["last_login_ip"] = ip_address
 
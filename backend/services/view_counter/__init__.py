@@ -0,0 +1,5 @@
+"""Write-behind counters of post views."""
+
+from backend.services.view_counter.view_counter import ViewCounter
+
+__all__ = ["ViewCounter"]
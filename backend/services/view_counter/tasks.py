@@ -0,0 +1,56 @@
+from typing import Dict
+
+from redis.asyncio import ConnectionPool, Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+from taskiq import TaskiqDepends
+
+from backend.db.dao.posts_dao import PostDAO  # type: ignore[attr-defined]
+from backend.db.dependencies import get_db_session
+from backend.services.post_cache import PostCache
+from backend.services.redis.buffer import batch_token, take_buffer
+from backend.services.redis.dependency import get_redis_pool
+from backend.services.view_counter.view_counter import parse_views, views_key
+from backend.settings import settings
+from backend.tkq import broker
+
+
+@broker.task(schedule=[{"cron": "* * * * *"}])
+async def flush_post_views(
+    session: AsyncSession = TaskiqDepends(get_db_session),
+    redis_pool: ConnectionPool = TaskiqDepends(get_redis_pool),
+) -> int:
+    """
+    Add buffered views to view counters of posts in the database.
+
+    Views of all shards are written in one UPDATE. Buffers are released
+    only after the update is committed, so failed flush is retried
+    by the next run. Every taken buffer has a token, which is recorded
+    in the same transaction as its views: if the flush failed after
+    the commit, the retry finds the token and only releases the buffer,
+    so views are never counted twice. Cached posts are dropped after that,
+    so reads don't miss the flushed views.
+
+    :param session: database session.
+    :param redis_pool: redis connection pool.
+    :return: number of updated posts.
+    """
+    dao = PostDAO(session, None)
+    batches: Dict[str, Dict[int, int]] = {}
+    taken_keys = []
+    async with Redis(connection_pool=redis_pool) as redis:
+        for shard in range(settings.post_views_shards):
+            taken_key, raw_views = await take_buffer(redis, views_key(shard))
+            if raw_views:
+                taken_keys.append(taken_key)
+                token = await batch_token(redis, taken_key, raw_views)
+                batches[token] = parse_views(raw_views)
+        views: Dict[int, int] = {}
+        for token in await dao.claim_view_batches(list(batches)):
+            views.update(batches[token])
+        updated = await dao.bulk_add_views(views)
+        await session.commit()
+        if taken_keys:
+            await redis.delete(*taken_keys)
+    flushed = {post_id for batch in batches.values() for post_id in batch}
+    await PostCache(redis_pool).invalidate_many(list(flushed))
+    return updated
@@ -0,0 +1,112 @@
+from typing import Dict, List, Optional, Sequence
+
+from loguru import logger
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+
+from backend.schemas.post import PostModelDTO
+from backend.services.redis.buffer import flushing_key
+from backend.settings import settings
+
+
+def views_key(shard: int) -> str:
+    """
+    Key of hash with pending views of posts of the shard.
+
+    :param shard: number of shard.
+    :return: key.
+    """
+    return f"posts:views:{shard}"
+
+
+def shard_key(post_id: int) -> str:
+    """
+    Key of hash with pending views of the post.
+
+    :param post_id: id of post.
+    :return: key.
+    """
+    return views_key(post_id % settings.post_views_shards)
+
+
+def parse_views(raw: Dict[bytes, bytes]) -> Dict[int, int]:
+    """
+    Parse buffered views.
+
+    :param raw: contents of views hash.
+    :return: number of views by post id.
+    """
+    return {int(post_id): int(views) for post_id, views in raw.items()}
+
+
+class ViewCounter:
+    """
+    Buffer of post views in redis.
+
+    Views are counted with HINCRBY in hashes sharded by post id,
+    so a hash stays small and shards may live on different nodes.
+    The `flush_post_views` task periodically adds them to `view_count`
+    of posts in a single UPDATE. Until then, `merge` adds pending
+    views to posts read from the database.
+    """
+
+    def __init__(self, redis_pool: Optional[ConnectionPool]) -> None:
+        self.redis_pool = redis_pool
+
+    async def record(self, post: PostModelDTO) -> PostModelDTO:
+        """
+        Count a view of the post.
+
+        :param post: viewed post read from the database or cache.
+        :return: post with pending views, including this one.
+        """
+        pending = await self.count(post.id)
+        return post.model_copy(update={"view_count": post.view_count + pending})
+
+    async def count(self, post_id: int) -> int:
+        """
+        Count a view of the post.
+
+        :param post_id: id of viewed post.
+        :return: pending views of the post, including this one.
+        """
+        if self.redis_pool is None:
+            return 0
+        key = shard_key(post_id)
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                pipe = redis.pipeline(transaction=False)
+                pipe.hincrby(key, str(post_id), 1)
+                pipe.hget(flushing_key(key), str(post_id))
+                views, flushing = await pipe.execute()
+        except RedisError as exc:
+            logger.warning("Can't count view of post {}: {}", post_id, exc)
+            return 0
+        return views + int(flushing or 0)
+
+    async def merge(self, posts: Sequence[PostModelDTO]) -> List[PostModelDTO]:
+        """
+        Add pending views to posts read from the database or cache.
+
+        :param posts: posts.
+        :return: posts with pending views.
+        """
+        if not posts or self.redis_pool is None:
+            return list(posts)
+        try:
+            async with Redis(connection_pool=self.redis_pool) as redis:
+                pipe = redis.pipeline(transaction=False)
+                for post in posts:
+                    key = shard_key(post.id)
+                    pipe.hget(key, str(post.id))
+                    pipe.hget(flushing_key(key), str(post.id))
+                pending = await pipe.execute()
+        except RedisError as exc:
+            logger.warning("Can't read views of {} posts: {}", len(posts), exc)
+            return list(posts)
+
+        merged = []
+        for post, views, flushing in zip(posts, pending[::2], pending[1::2]):
+            view_count = post.view_count + int(views or 0) + int(flushing or 0)
+            merged.append(post.model_copy(update={"view_count": view_count}))
+        return merged
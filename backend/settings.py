@@ -2,7 +2,7 @@ import enum
 import os
 from pathlib import Path
 from tempfile import gettempdir
-from typing import Optional
+from typing import List, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from yarl import URL
@@ -41,6 +41,10 @@ class Settings(BaseSettings):
 
     log_level: LogLevel = LogLevel.INFO
     users_secret: str = os.getenv("USERS_SECRET", "")
+    # Processes hashing passwords in each worker, 0 runs hashing in a thread
+    password_hash_workers: int = 2
+    # Password checks allowed to wait for a free process
+    password_hash_queue_size: int = 100
     # Variables for the database
     db_host: str = "localhost"
     db_port: int = 5432
@@ -48,6 +52,33 @@ class Settings(BaseSettings):
     db_pass: str = "backend"
     db_base: str = "admin"
     db_echo: bool = False
+    # Connections kept open by each worker, all workers together can open
+    # workers_count * (db_pool_size + db_max_overflow) connections
+    db_pool_size: int = 10
+    # Extra connections each worker opens under load
+    db_max_overflow: int = 10
+    # Seconds to wait for a free connection before failing
+    db_pool_timeout: float = 30
+    # Seconds after which connection is reopened, -1 to keep forever
+    db_pool_recycle: int = 1800
+    # Check connection with a ping before every checkout
+    db_pool_pre_ping: bool = False
+    # Prepared statements cached by each connection, 0 for pgbouncer
+    db_statement_cache_size: int = 100
+    # Open `db_pool_size` connections on startup
+    db_pool_warm_up: bool = True
+    # Queries taking longer are logged, in milliseconds
+    db_slow_query_ms: float = 200
+    # Statement executed this many times in one request is logged as N+1
+    db_n_plus_one_threshold: int = 10
+    # Hosts of read replicas, e.g. '["replica-1", "replica-2"]'
+    db_replica_hosts: List[str] = []
+    # Seconds reads of a user go to primary after they have written something
+    db_replica_sticky_seconds: float = 5
+    # Replicas lagging behind primary more seconds than this aren't used
+    db_replica_max_lag: float = 30
+    # Seconds between replica lag checks
+    db_replica_lag_interval: float = 10
 
     # Variables for Redis
     redis_host: str = "backend-redis"
@@ -56,6 +87,78 @@ class Settings(BaseSettings):
     redis_pass: Optional[str] = None
     redis_base: Optional[int] = None
 
+    # Seconds to keep posts in redis cache
+    post_cache_ttl: int = 60
+    # Seconds to remember that post doesn't exist
+    post_cache_missing_ttl: int = 10
+    # Posts inserted at once by bulk creation
+    post_bulk_batch_size: int = 5000
+    # Bulk batches of this size or bigger are written with COPY
+    post_bulk_copy_threshold: int = 1000
+    # Seconds to keep authenticated users in redis
+    user_cache_ttl: int = 300
+    # Seconds to keep authenticated users in worker's memory
+    user_cache_local_ttl: float = 5
+    # Number of users and tokens kept in worker's memory
+    user_cache_local_size: int = 1024
+    # Seconds between activity records of the same user in a worker
+    user_activity_resolution: float = 30
+    # Number of newest posts kept in every home timeline
+    timeline_size: int = 800
+    # Posts of users with more followers are read by followers on demand
+    timeline_celebrity_followers: int = 10000
+    # Followers whose timelines are updated in one redis round trip
+    timeline_fan_out_batch: int = 1000
+    # Seconds for a view to lose half of its weight in trending score
+    trending_half_life: float = 6 * 3600
+    # Seconds between rotations of trending sorted set
+    trending_period: int = 24 * 3600
+    # Number of trending posts kept
+    trending_size: int = 1000
+    # Seconds a worker loading a coalesced read holds its redis lock
+    single_flight_lock_ttl: float = 2
+    # Seconds other workers wait for its result before loading it themselves
+    single_flight_wait: float = 1
+    # Seconds between checks for the result
+    single_flight_poll_interval: float = 0.01
+    # Number of redis hashes buffering views of posts
+    post_views_shards: int = 16
+    # Seconds to remember flushed batches of views, retries come much sooner
+    post_views_batch_retention: int = 86400
+    # Number of the newest posts scored for recommendations
+    recommendation_candidates: int = 10000
+    # Seconds to reuse candidates of recommendations in a worker
+    recommendation_candidates_ttl: float = 10
+    # Seconds for a post to lose half of its recommendation score
+    recommendation_half_life: float = 12 * 3600
+    # Number of readers whose affinity to authors is kept in a worker
+    recommendation_affinity_cache_size: int = 1024
+    # Seconds to keep affinity of a reader in a worker
+    recommendation_affinity_ttl: float = 60
+    # Directory with index of similar posts, shared by workers of the host
+    similar_index_dir: Path = TEMP_DIR / "similar_posts"
+    # Seconds between checks for a new version of the index
+    similar_index_reload_interval: float = 5
+    # Minimal estimated Jaccard similarity of texts of similar posts
+    similar_posts_threshold: float = 0.5
+
+    # Responses smaller than this many bytes are sent uncompressed
+    compression_min_size: int = 1024
+    # Compressed content types, entries ending with "/" match any subtype
+    compression_types: List[str] = [
+        "text/",
+        "application/json",
+        "application/javascript",
+        "application/xml",
+        "image/svg+xml",
+    ]
+    # Gzip level of responses, 1 is the fastest, 9 the smallest
+    compression_gzip_level: int = 6
+    # Brotli quality of responses, 0 is the fastest, 11 the smallest
+    compression_brotli_quality: int = 4
+    # Seconds browsers cache static files, their URLs change with content
+    static_max_age: int = 365 * 24 * 3600
+
     # This variable is used to define
     # multiproc_dir. It's required for [uvi|guni]corn projects.
     prometheus_dir: Path = TEMP_DIR / "prom"
@@ -84,6 +187,17 @@ class Settings(BaseSettings):
             path=f"/{self.db_base}",
         )
 
+    @property
+    def db_replica_urls(self) -> List[URL]:
+        """
+        Assemble URLs of read replicas.
+
+        Replicas use credentials and database name of primary.
+
+        :return: list of replica URLs.
+        """
+        return [self.db_url.with_host(host) for host in self.db_replica_hosts]
+
     @property
     def redis_url(self) -> URL:
         """
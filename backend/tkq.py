@@ -1,7 +1,8 @@
 from typing import Any
 
 import taskiq_fastapi
-from taskiq import AsyncBroker, AsyncResultBackend, InMemoryBroker
+from taskiq import AsyncBroker, AsyncResultBackend, InMemoryBroker, TaskiqScheduler
+from taskiq.schedule_sources import LabelScheduleSource
 from taskiq_redis import ListQueueBroker, RedisAsyncResultBackend
 
 from backend.settings import settings
@@ -14,9 +15,13 @@ broker: AsyncBroker = ListQueueBroker(
 ).with_result_backend(result_backend)
 
 if settings.environment.lower() == "pytest":
-    broker = InMemoryBroker()
+    # Kicked tasks finish before `kiq` returns, so tests can check results.
+    broker = InMemoryBroker(await_inplace=True)
 
 taskiq_fastapi.init(
     broker,
     "backend.web.application:get_app",
 )
+
+# Runs tasks with `schedule` label, see `taskiq scheduler` in docker-compose.yml.
+scheduler = TaskiqScheduler(broker, [LabelScheduleSource(broker)])
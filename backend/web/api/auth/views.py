@@ -1,5 +1,7 @@
 # type: ignore
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi_users.authentication import JWTStrategy
+from redis.asyncio import ConnectionPool
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.db.dependencies import get_db_session
@@ -17,6 +19,7 @@ from backend.schemas.auth import (
     UserCreate,
 )
 from backend.schemas.users import UserResponse
+from backend.services.redis.dependency import get_redis_pool
 from backend.services.user_service import UserService
 
 router = APIRouter()
@@ -29,8 +32,10 @@ router.include_router(
 
 @router.post("/login")
 async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestFormWithEmail = Depends(),
     user_manager: UserManager = Depends(get_user_manager),
+    strategy: JWTStrategy = Depends(auth_jwt.get_strategy),
 ) -> Response:
     """Login user by email and password. Return JWT access token."""
     user = await user_manager.authenticate(form_data)
@@ -41,18 +46,19 @@ async def login(
             detail="Incorrect email or password",
         )
 
-    response = await auth_jwt.login(auth_jwt.get_strategy(), user)
+    response = await auth_jwt.login(strategy, user)
 
-    await user_manager.on_after_login(user)
+    await user_manager.on_after_login(user, request, response)
     return response
 
 
 def get_user_service(
     session: AsyncSession = Depends(get_db_session),
     user_manager: UserManager = Depends(get_user_manager),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
 ) -> UserService:
     """Dependency for UserService, return UserService instance."""
-    return UserService(session, user_manager)
+    return UserService(session, user_manager, redis_pool)
 
 
 @router.post("/change-password")
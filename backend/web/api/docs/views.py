@@ -6,6 +6,8 @@ from fastapi.openapi.docs import (
 )
 from fastapi.responses import HTMLResponse
 
+from backend.web.static import static_url
+
 router = APIRouter()
 
 
@@ -22,8 +24,8 @@ async def swagger_ui_html(request: Request) -> HTMLResponse:
         openapi_url=request.app.openapi_url,
         title=f"{title} - Swagger UI",
         oauth2_redirect_url=str(request.url_for("swagger_ui_redirect")),
-        swagger_js_url="/static/docs/swagger-ui-bundle.js",
-        swagger_css_url="/static/docs/swagger-ui.css",
+        swagger_js_url=static_url("docs/swagger-ui-bundle.js"),
+        swagger_css_url=static_url("docs/swagger-ui.css"),
     )
 
 
@@ -49,5 +51,5 @@ async def redoc_html(request: Request) -> HTMLResponse:
     return get_redoc_html(
         openapi_url=request.app.openapi_url,
         title=f"{title} - ReDoc",
-        redoc_js_url="/static/docs/redoc.standalone.js",
+        redoc_js_url=static_url("docs/redoc.standalone.js"),
     )
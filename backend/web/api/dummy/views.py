@@ -1,11 +1,12 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Response, status
 from fastapi.param_functions import Depends
 
 from backend.db.dao.dummy_dao import DummyDAO
-from backend.db.models.dummy_model import DummyModel
+from backend.db.pagination import InvalidCursorError
 from backend.schemas.dummy import DummyModelDTO, DummyModelInputDTO
+from backend.web.responses import ModelResponse, validate_rows
 
 router = APIRouter()
 
@@ -14,17 +15,39 @@ router = APIRouter()
 async def get_dummy_models(
     limit: int = 10,
     offset: int = 0,
+    cursor: Optional[str] = None,
     dummy_dao: DummyDAO = Depends(),
-) -> List[DummyModel]:
+) -> Response:
     """
     Retrieve all dummy objects from the database.
 
+    Cursor of the next page is returned in `X-Next-Cursor` header.
+
     :param limit: limit of dummy objects, defaults to 10.
     :param offset: offset of dummy objects, defaults to 0.
+    :param cursor: cursor of dummy objects, replaces offset.
     :param dummy_dao: DAO for dummy models.
     :return: list of dummy objects from database.
     """
-    return await dummy_dao.get_all_dummies(limit=limit, offset=offset)
+    try:
+        dummies, next_cursor = await dummy_dao.get_all_dummies(
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+        )
+    except InvalidCursorError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        ) from exc
+    headers = {}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = next_cursor
+    return ModelResponse(
+        validate_rows(List[DummyModelDTO], dummies),
+        List[DummyModelDTO],
+        headers=headers,
+    )
 
 
 @router.put("/")
@@ -0,0 +1,6 @@
+# type: ignore
+"""Home feed API."""
+
+from backend.web.api.feed.views import router
+
+__all__ = ["router"]
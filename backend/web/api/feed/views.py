@@ -0,0 +1,82 @@
+# type: ignore
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from redis.asyncio import ConnectionPool
+
+from backend.db.dao.follows_dao import FollowDAO, get_readonly_follow_dao
+from backend.db.dao.posts_dao import PostDAO, get_readonly_post_dao
+from backend.db.models.users import User, current_active_user
+from backend.db.pagination import InvalidCursorError
+from backend.schemas.post import PostModelDTO, PostPageDTO
+from backend.services.recommendations import Recommender
+from backend.services.redis.dependency import get_redis_pool
+from backend.services.timeline import Timeline
+from backend.services.timeline.feed import get_feed_page
+from backend.services.trending import TrendingPosts
+from backend.web.responses import model_response
+
+router = APIRouter()
+
+
+@router.get("/")
+@model_response
+async def get_feed(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    user: User = Depends(current_active_user),
+    post_dao: PostDAO = Depends(get_readonly_post_dao),
+    follow_dao: FollowDAO = Depends(get_readonly_follow_dao),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+) -> PostPageDTO:
+    """
+    Get page of posts of followed users and own posts, newest first.
+
+    :param limit: limit of posts, defaults to 20.
+    :param cursor: `next_cursor` from the previous page.
+    :param user: authenticated user.
+    :param post_dao: DAO for post models.
+    :param follow_dao: DAO for follows.
+    :param redis_pool: redis connection pool with timelines.
+    :return: page of posts.
+    """
+    try:
+        posts, next_cursor = await get_feed_page(
+            user.id,
+            limit,
+            cursor,
+            post_dao,
+            follow_dao,
+            Timeline(redis_pool),
+        )
+    except InvalidCursorError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        ) from exc
+    return PostPageDTO(items=posts, next_cursor=next_cursor)
+
+
+@router.get("/recommended")
+@model_response
+async def get_recommended(
+    limit: int = Query(20, ge=1, le=100),
+    user: User = Depends(current_active_user),
+    post_dao: PostDAO = Depends(get_readonly_post_dao),
+    follow_dao: FollowDAO = Depends(get_readonly_follow_dao),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+) -> List[PostModelDTO]:
+    """
+    Get recent posts recommended to the user, the best first.
+
+    :param limit: limit of posts, defaults to 20.
+    :param user: authenticated user.
+    :param post_dao: DAO for post models.
+    :param follow_dao: DAO for follows.
+    :param redis_pool: redis connection pool with trending posts.
+    :return: posts.
+    """
+    recommender = Recommender(post_dao, follow_dao, TrendingPosts(redis_pool))
+    post_ids = await recommender.recommend(user.id, limit)
+    posts = await post_dao.get_posts_by_ids(post_ids)
+    return [posts[post_id] for post_id in post_ids if post_id in posts]
@@ -0,0 +1,72 @@
+import json
+from typing import AsyncIterator, List, Tuple, Union
+
+from fastapi import HTTPException, Request, status
+from pydantic import ValidationError
+from pydantic_core import ErrorDetails
+
+from backend.schemas.post import PostModelInputDTO
+
+NDJSON_MEDIA_TYPES = {"application/x-ndjson", "application/jsonl"}
+
+ParsedPost = Union[PostModelInputDTO, List[ErrorDetails]]
+
+
+def _errors(exc: ValidationError) -> List[ErrorDetails]:
+    return exc.errors(include_url=False, include_context=False, include_input=False)
+
+
+async def _ndjson_posts(request: Request) -> AsyncIterator[Tuple[int, ParsedPost]]:
+    index = 0
+    tail = b""
+    async for chunk in request.stream():
+        *lines, tail = (tail + chunk).split(b"\n")
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                yield index, PostModelInputDTO.model_validate_json(line)
+            except ValidationError as exc:
+                yield index, _errors(exc)
+            index += 1
+    if tail.strip():
+        try:
+            yield index, PostModelInputDTO.model_validate_json(tail)
+        except ValidationError as exc:
+            yield index, _errors(exc)
+
+
+async def _json_posts(request: Request) -> AsyncIterator[Tuple[int, ParsedPost]]:
+    try:
+        items = json.loads(await request.body())
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Body must be a JSON array of posts",
+        ) from exc
+    if not isinstance(items, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Body must be a JSON array of posts",
+        )
+    for index, item in enumerate(items):
+        try:
+            yield index, PostModelInputDTO.model_validate(item)
+        except ValidationError as exc:
+            yield index, _errors(exc)
+
+
+def parse_posts(request: Request) -> AsyncIterator[Tuple[int, ParsedPost]]:
+    """
+    Read posts for bulk creation from request body.
+
+    Body is a JSON array, or NDJSON with one post per line,
+    which is read as a stream. Invalid posts don't stop parsing.
+
+    :param request: current request.
+    :return: index of every post with either the post or its validation errors.
+    """
+    media_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if media_type in NDJSON_MEDIA_TYPES:
+        return _ndjson_posts(request)
+    return _json_posts(request)
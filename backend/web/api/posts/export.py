@@ -0,0 +1,50 @@
+import csv
+import io
+from typing import AsyncIterator, List
+
+from backend.db.models.posts import Post
+from backend.schemas.post import ExportFormat, PostModelDTO
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+CSV_COLUMNS = list(PostModelDTO.model_fields)
+
+
+def _to_ndjson(posts: List[Post]) -> str:
+    return "".join(
+        PostModelDTO.model_validate(post).model_dump_json() + "\n" for post in posts
+    )
+
+
+def _to_csv(posts: List[Post]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for post in posts:
+        row = PostModelDTO.model_validate(post).model_dump(mode="json")
+        writer.writerow([row[column] for column in CSV_COLUMNS])
+    return buffer.getvalue()
+
+
+async def encode_posts(
+    batches: AsyncIterator[List[Post]],
+    export_format: ExportFormat,
+) -> AsyncIterator[str]:
+    """
+    Encode batches of posts into chunks of the response body.
+
+    :param batches: batches of posts.
+    :param export_format: format of export.
+    :yield: one chunk per batch.
+    """
+    if export_format is ExportFormat.CSV:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(CSV_COLUMNS)
+        yield buffer.getvalue()
+        encode = _to_csv
+    else:
+        encode = _to_ndjson
+
+    async for batch in batches:
+        yield encode(batch)
@@ -1,46 +1,451 @@
 # type: ignore
-from fastapi import APIRouter, Response, status
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple, Union
+from uuid import UUID
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
 from fastapi.param_functions import Depends
+from fastapi.responses import StreamingResponse
+from redis.asyncio import ConnectionPool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from backend.db.dao.posts_dao import PostDAO
+from backend.db.dao.posts_dao import PostDAO, get_readonly_post_dao
+from backend.db.dependencies import get_readonly_session_factory
 from backend.db.models.users import User, current_active_user
-from backend.schemas.post import PostModelDTO, PostModelInputDTO, PostModelUpdateDTO
+from backend.db.pagination import InvalidCursorError
+from backend.schemas.post import (
+    MAX_BATCH_IDS,
+    POST_FIELDS,
+    BulkPostErrorDTO,
+    BulkPostsResultDTO,
+    ExportFormat,
+    PartialPostDTO,
+    PartialPostPageDTO,
+    PostBatchDTO,
+    PostIdsDTO,
+    PostModelDTO,
+    PostModelInputDTO,
+    PostModelUpdateDTO,
+    PostPageDTO,
+)
+from backend.services.redis.dependency import get_redis_pool
+from backend.services.similar import SimilarPosts
+from backend.services.similar.dependency import get_similar_posts
+from backend.services.similar.minhash import signature
+from backend.services.similar.similar_posts import post_text
+from backend.services.timeline.tasks import fan_out_posts
+from backend.services.trending import TrendingPosts
+from backend.services.view_counter import ViewCounter
+from backend.settings import settings
+from backend.web.api.posts.bulk import parse_posts
+from backend.web.api.posts.export import MEDIA_TYPES, encode_posts
+from backend.web.conditional import (
+    has_conditions,
+    is_not_modified,
+    make_etag,
+    not_modified,
+    page_etag,
+    validator_headers,
+)
+from backend.web.responses import ModelResponse, model_response, validate_rows
 
 router = APIRouter()
 
 
+def parse_ids(ids: str) -> List[int]:
+    """
+    Parse comma-separated post ids.
+
+    :param ids: ids like "1,2,3".
+    :raises HTTPException: if ids are malformed or there are too many of them.
+    :return: list of ids.
+    """
+    try:
+        post_ids = [int(post_id) for post_id in ids.split(",") if post_id.strip()]
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be comma-separated integers",
+        ) from exc
+    if not post_ids or len(post_ids) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Pass from 1 to {MAX_BATCH_IDS} ids",
+        )
+    return post_ids
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """
+    Parse comma-separated fields of posts.
+
+    :param fields: fields like "id,title", None for all fields.
+    :raises HTTPException: if there are unknown fields.
+    :return: fields.
+    """
+    if fields is None:
+        return POST_FIELDS
+    names = tuple(
+        dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()),
+    )
+    unknown = set(names) - set(POST_FIELDS)
+    if not names or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"fields must be comma-separated from {', '.join(POST_FIELDS)}",
+        )
+    return names
+
+
+async def get_post_batch(
+    post_dao: PostDAO,
+    view_counter: ViewCounter,
+    post_ids: List[int],
+) -> PostBatchDTO:
+    """
+    Read posts by ids keeping the requested order.
+
+    :param post_dao: DAO for post models.
+    :param view_counter: counter adding pending views to posts.
+    :param post_ids: ids of posts, duplicates are allowed.
+    :return: found posts and ids of missing ones.
+    """
+    found = await post_dao.get_posts_by_ids(list(dict.fromkeys(post_ids)))
+    merged = await view_counter.merge(list(found.values()))
+    found = {post.id: post for post in merged}
+    return PostBatchDTO(
+        items=[found[post_id] for post_id in post_ids if post_id in found],
+        missing=[post_id for post_id in post_ids if post_id not in found],
+    )
+
+
+async def get_post_page(
+    request: Request,
+    post_dao: PostDAO,
+    view_counter: ViewCounter,
+    limit: int,
+    cursor: Optional[str],
+    fields: Optional[str],
+) -> Response:
+    """
+    Get page of posts from newest to oldest.
+
+    Conditional requests first select only versions of posts
+    on the page, the page itself is loaded if it has changed.
+
+    :param request: current request.
+    :param post_dao: DAO for post models.
+    :param view_counter: counter adding pending views to posts.
+    :param limit: limit of posts.
+    :param cursor: `next_cursor` from the previous page.
+    :param fields: comma-separated fields of posts, None for all fields.
+    :raises HTTPException: if cursor is invalid.
+    :return: page of posts.
+    """
+    selected = parse_fields(fields)
+    try:
+        if has_conditions(request):
+            versions, next_cursor = await post_dao.get_all_posts(
+                limit=limit,
+                cursor=cursor,
+                fields=(),
+            )
+            etag = page_etag(versions, selected, next_cursor)
+            if is_not_modified(request, etag):
+                return not_modified(etag)
+        rows, next_cursor = await post_dao.get_all_posts(
+            limit=limit,
+            cursor=cursor,
+            fields=selected,
+        )
+    except InvalidCursorError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        ) from exc
+    headers = validator_headers(page_etag(rows, selected, next_cursor))
+    if fields is None:
+        items = await view_counter.merge(validate_rows(List[PostModelDTO], rows))
+        return ModelResponse(
+            PostPageDTO(items=items, next_cursor=next_cursor),
+            PostPageDTO,
+            headers=headers,
+        )
+
+    partial_items = validate_rows(List[PartialPostDTO], rows)
+    if "view_count" in selected:
+        partial_items = await view_counter.merge(partial_items)
+    return ModelResponse(
+        PartialPostPageDTO(items=partial_items, next_cursor=next_cursor),
+        PartialPostPageDTO,
+        headers=headers,
+        include={"items": {"__all__": set(selected)}, "next_cursor": True},
+    )
+
+
+@router.get("/")
+@model_response
+async def get_post_models(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    ids: Optional[str] = None,
+    fields: Optional[str] = None,
+    post_dao: PostDAO = Depends(get_readonly_post_dao),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+) -> Union[PostPageDTO, PostBatchDTO]:
+    """
+    Get page of posts from newest to oldest, or posts with given ids.
+
+    Responses have weak ETags built from ids and modification times
+    of the posts, pending views don't change them. Requests with
+    a matching If-None-Match get 304.
+
+    :param request: current request.
+    :param limit: limit of posts, defaults to 20.
+    :param cursor: `next_cursor` from the previous page.
+    :param ids: comma-separated ids of posts to get instead of a page,
+        use `POST /batch` for long lists.
+    :param fields: comma-separated fields of posts to return, defaults to all.
+        Other fields aren't loaded from the database.
+    :param post_dao: DAO for post models.
+    :param redis_pool: redis connection pool with pending views.
+    :return: page of posts, or posts by ids.
+    """
+    view_counter = ViewCounter(redis_pool)
+    if ids is None:
+        return await get_post_page(
+            request,
+            post_dao,
+            view_counter,
+            limit,
+            cursor,
+            fields,
+        )
+
+    selected = parse_fields(fields)
+    batch = await get_post_batch(post_dao, view_counter, parse_ids(ids))
+    # Posts by ids are read from the cache, so there is no cheaper check.
+    etag = page_etag(batch.items, selected, batch.missing)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    return ModelResponse(
+        batch,
+        PostBatchDTO,
+        headers=validator_headers(etag),
+        include=(
+            None
+            if fields is None
+            else {"items": {"__all__": set(selected)}, "missing": True}
+        ),
+    )
+
+
+@router.post("/batch")
+@model_response
+async def get_post_models_batch(
+    request_ids: PostIdsDTO,
+    post_dao: PostDAO = Depends(get_readonly_post_dao),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+) -> PostBatchDTO:
+    """
+    Get posts with given ids, for lists too long for a query string.
+
+    :param request_ids: ids of posts.
+    :param post_dao: DAO for post models.
+    :param redis_pool: redis connection pool with pending views.
+    :return: found posts in the requested order and ids of missing ones.
+    """
+    return await get_post_batch(post_dao, ViewCounter(redis_pool), request_ids.ids)
+
+
+@router.get("/trending")
+@model_response
+async def get_trending_post_models(
+    limit: int = Query(20, ge=1, le=100),
+    post_dao: PostDAO = Depends(get_readonly_post_dao),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+) -> List[PostModelDTO]:
+    """
+    Get the most viewed posts, recent views count more.
+
+    :param limit: limit of posts, defaults to 20.
+    :param post_dao: DAO for post models.
+    :param redis_pool: redis connection pool with trending posts.
+    :return: posts, the most trending first.
+    """
+    post_ids = await TrendingPosts(redis_pool).top(limit)
+    posts = await post_dao.get_posts_by_ids(post_ids)
+    return [posts[post_id] for post_id in post_ids if post_id in posts]
+
+
+@router.get("/search")
+@model_response
+async def search_post_models(
+    q: str = Query(..., min_length=1, max_length=200),
+    prefix: bool = False,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    post_dao: PostDAO = Depends(get_readonly_post_dao),
+) -> PostPageDTO:
+    """
+    Search posts by title and content, the most relevant first.
+
+    :param q: search query.
+    :param prefix: match last word as a prefix, for search-as-you-type.
+    :param limit: limit of posts, defaults to 20.
+    :param cursor: `next_cursor` from the previous page.
+    :param post_dao: DAO for post models.
+    :return: page of found posts.
+    """
+    try:
+        posts, next_cursor = await post_dao.search_posts(
+            query=q,
+            limit=limit,
+            cursor=cursor,
+            prefix=prefix,
+        )
+    except InvalidCursorError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        ) from exc
+    return PostPageDTO(items=posts, next_cursor=next_cursor)
+
+
+@router.get("/export")
+async def export_post_models(
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    since: Optional[datetime] = None,
+    user_id: Optional[UUID] = None,
+    session_factory: async_sessionmaker[AsyncSession] = Depends(
+        get_readonly_session_factory,
+    ),
+) -> StreamingResponse:
+    """
+    Export posts from oldest to newest as NDJSON or CSV.
+
+    Posts are read through a server-side cursor and sent in chunks,
+    so memory use doesn't depend on number of posts. If client
+    disconnects, the stream is cancelled and the cursor is closed.
+
+    :param export_format: format of export.
+    :param since: only posts created at this time or later.
+    :param user_id: only posts of this user.
+    :param session_factory: factory of session living as long as the stream.
+    :return: streaming response.
+    """
+
+    async def chunks() -> AsyncIterator[str]:
+        async with session_factory() as session:
+            batches = PostDAO(session, None).stream_posts(since=since, user_id=user_id)
+            async for chunk in encode_posts(batches, export_format):
+                yield chunk
+
+    return StreamingResponse(
+        chunks(),
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f"attachment; filename=posts.{export_format.value}",
+        },
+    )
+
+
 @router.post("/create", status_code=status.HTTP_201_CREATED)
 async def create_post_model(
     new_post_object: PostModelInputDTO,
+    background_tasks: BackgroundTasks,
     user: User = Depends(current_active_user),
     post_dao: PostDAO = Depends(),
+    similar_posts: SimilarPosts = Depends(get_similar_posts),
 ) -> PostModelDTO:
     """
     Creates post model in the database.
 
     :param new_post_object: new post model item.
+    :param background_tasks: tasks run after the post is committed.
     :param post_dao: DAO for post models.
+    :param similar_posts: index of similar posts.
     """
-    return await post_dao.create_post_model(
+    post = await post_dao.create_post_model(
         title=new_post_object.title,
         content=new_post_object.content,
         user_id=user.id,
     )
+    background_tasks.add_task(fan_out_posts.kiq, [post.id])
+    background_tasks.add_task(
+        similar_posts.posts_changed,
+        [(post.id, post_text(post.title, post.content))],
+    )
+    return post
+
+
+@router.post("/bulk", status_code=status.HTTP_201_CREATED)
+async def bulk_create_post_models(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    user: User = Depends(current_active_user),
+    post_dao: PostDAO = Depends(),
+    similar_posts: SimilarPosts = Depends(get_similar_posts),
+) -> BulkPostsResultDTO:
+    """
+    Create many posts at once.
+
+    Body is a JSON array of posts or NDJSON stream with a post per line
+    (`Content-Type: application/x-ndjson`). Invalid posts are reported
+    in errors, valid ones are created anyway.
+
+    :param request: current request.
+    :param background_tasks: tasks run after posts are committed.
+    :param user: authenticated user.
+    :param post_dao: DAO for post models.
+    :param similar_posts: index of similar posts.
+    :return: ids of created posts and errors of invalid ones.
+    """
+    ids = []
+    errors = []
+    batch = []
+    async for index, post in parse_posts(request):
+        if isinstance(post, PostModelInputDTO):
+            batch.append(post)
+        else:
+            errors.append(BulkPostErrorDTO(index=index, errors=post))
+        if len(batch) >= settings.post_bulk_batch_size:
+            ids.extend(await post_dao.bulk_create_posts(user.id, batch))
+            batch = []
+    ids.extend(await post_dao.bulk_create_posts(user.id, batch))
+    if ids:
+        # Older posts would be trimmed from timelines anyway.
+        background_tasks.add_task(fan_out_posts.kiq, ids[-settings.timeline_size :])
+        background_tasks.add_task(similar_posts.record_changes, ids)
+    return BulkPostsResultDTO(ids=ids, errors=errors)
 
 
 @router.patch("/{post_id}")
 async def update_post_model(
     edit_post_object: PostModelUpdateDTO,
+    background_tasks: BackgroundTasks,
     user: User = Depends(current_active_user),
     post_dao: PostDAO = Depends(),
+    similar_posts: SimilarPosts = Depends(get_similar_posts),
     post_id: int = 0,
 ) -> PostModelDTO:
     """
     Update post model in the database.
 
     :param edit_post_object: post model field to update.
+    :param background_tasks: tasks run after the post is committed.
     :param user: authenticated user.
     :param post_dao: DAO for post models.
+    :param similar_posts: index of similar posts.
     :param post_id: id of post to update.
     """
     result = await post_dao.update_post(
@@ -49,37 +454,117 @@ async def update_post_model(
         title=edit_post_object.title,
         content=edit_post_object.content,
     )
-    if result:
-        return result
-    return Response(
-        '{"Error": "Post not found"}',
-        status.HTTP_404_NOT_FOUND,
-        media_type="application/json",
+    if result is None:
+        return Response(
+            '{"Error": "Post not found"}',
+            status.HTTP_404_NOT_FOUND,
+            media_type="application/json",
+        )
+    if result is False:
+        return Response(
+            '{"Error": "Post belongs to another user"}',
+            status.HTTP_403_FORBIDDEN,
+            media_type="application/json",
+        )
+    background_tasks.add_task(
+        similar_posts.posts_changed,
+        [(result.id, post_text(result.title, result.content))],
     )
+    return result
+
+
+@router.get("/{post_id}/similar")
+@model_response
+async def get_similar_post_models(
+    post_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    post_dao: PostDAO = Depends(get_readonly_post_dao),
+    similar_posts: SimilarPosts = Depends(get_similar_posts),
+) -> List[PostModelDTO]:
+    """
+    Get posts with text similar to the post, the most similar first.
+
+    :param post_id: id of post.
+    :param limit: limit of posts, defaults to 10.
+    :param post_dao: DAO for post models.
+    :param similar_posts: index of similar posts.
+    :return: similar posts.
+    """
+    target = similar_posts.signature_of(post_id)
+    if target is None:
+        # Post isn't indexed yet, or it has no words.
+        post = await post_dao.get_post_by_id(post_id=post_id)
+        if post is None:
+            return Response(
+                '{"Error": "Post not found"}',
+                status.HTTP_404_NOT_FOUND,
+                media_type="application/json",
+            )
+        target = signature(post_text(post.title, post.content))
+        if target is None:
+            return []
+    post_ids = similar_posts.similar(post_id, target, limit)
+    posts = await post_dao.get_posts_by_ids(post_ids)
+    return [posts[similar_id] for similar_id in post_ids if similar_id in posts]
 
 
 @router.get("/{post_id}")
 async def get_post_model(
+    request: Request,
+    response: Response,
     post_id: int = 0,
-    post_dao: PostDAO = Depends(),
+    post_dao: PostDAO = Depends(get_readonly_post_dao),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
 ) -> PostModelDTO:
     """Get post model from the database.
 
+    Views are counted in redis, the returned count includes
+    views not written to the database yet.
+
+    Responses have ETag and Last-Modified of the post. If client's
+    copy is up to date, only modification time of the post is read
+    and 304 is returned. The view is counted anyway.
+
+    :param request: current request.
+    :param response: response, validators of the post are set on it.
     :param post_id: id of post to get.
+    :param redis_pool: redis connection pool, views are counted there.
     """
-    return await post_dao.get_post_by_id(post_id=post_id)
+    if has_conditions(request):
+        updated_at = await post_dao.get_post_version(post_id)
+        etag = make_etag(post_id, updated_at)
+        if updated_at is not None and is_not_modified(request, etag, updated_at):
+            await TrendingPosts(redis_pool).record(post_id)
+            await ViewCounter(redis_pool).count(post_id)
+            return not_modified(etag, updated_at)
+
+    post = await post_dao.get_post_by_id(post_id=post_id)
+    if post is None:
+        return Response(
+            '{"Error": "Post not found"}',
+            status.HTTP_404_NOT_FOUND,
+            media_type="application/json",
+        )
+    await TrendingPosts(redis_pool).record(post_id)
+    response.headers.update(
+        validator_headers(make_etag(post.id, post.updated_at), post.updated_at),
+    )
+    return await ViewCounter(redis_pool).record(post)
 
 
 @router.delete("/{post_id}")
 async def delete_post_model(
+    background_tasks: BackgroundTasks,
     post_id: int = 0,
     user: User = Depends(current_active_user),
     post_dao: PostDAO = Depends(),
+    similar_posts: SimilarPosts = Depends(get_similar_posts),
 ) -> Response:
     """Delete post instanse."""
 
     result = await post_dao.delete_post(post_id, user.id)
     if result:
+        background_tasks.add_task(similar_posts.posts_changed, [(post_id, None)])
         return Response(
             '{"status": "deleted"}',
             status.HTTP_200_OK,
@@ -87,6 +572,6 @@ async def delete_post_model(
         )
     return Response(
         '{"status": "error"}',
-        status.HTTP_400_BAD_REQUEST,
+        status.HTTP_404_NOT_FOUND if result is None else status.HTTP_403_FORBIDDEN,
         media_type="application/json",
     )
@@ -1,13 +1,229 @@
 # type: ignore
-from fastapi import APIRouter
+from typing import List, Optional
+from uuid import UUID
 
-from backend.db.models.users import api_users
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+
+from backend.db.dao.follows_dao import FollowDAO, get_readonly_follow_dao
+from backend.db.dao.posts_dao import PostDAO, get_readonly_post_dao
+from backend.db.dao.users_dao import UserDAO, get_readonly_user_dao
+from backend.db.models.users import (
+    User,
+    UserPrivacy,
+    api_users,
+    current_active_user,
+    optional_active_user,
+)
+from backend.db.pagination import InvalidCursorError
+from backend.schemas.post import PostModelDTO, PostPageDTO
 from backend.schemas.users import UserResponse, UserUpdate
+from backend.services.recommendations.recommender import affinities
+from backend.services.timeline.tasks import backfill_timeline
+from backend.web.conditional import (
+    has_conditions,
+    is_not_modified,
+    make_etag,
+    not_modified,
+    page_etag,
+    validator_headers,
+)
+from backend.web.responses import ModelResponse, model_response, validate_rows
 
 router = APIRouter()
 
+
+async def can_see_posts(
+    author: User,
+    viewer: Optional[User],
+    follow_dao: FollowDAO,
+) -> bool:
+    """
+    Check whether viewer is allowed to see posts of the author.
+
+    Friends-only posts are visible to followers of the author.
+
+    :param author: author of posts.
+    :param viewer: current user, None for anonymous requests.
+    :param follow_dao: DAO for follows.
+    :return: True if posts are visible.
+    """
+    if author.privacy_level == UserPrivacy.PUBLIC:
+        return True
+    if viewer is None:
+        return False
+    if viewer.id == author.id or viewer.is_superuser:
+        return True
+    return author.privacy_level == UserPrivacy.FRIENDS_ONLY and (
+        await follow_dao.is_following(viewer.id, author.id)
+    )
+
+
+@router.get("/users/{user_id}/posts", tags=["users"])
+@model_response
+async def get_user_posts(
+    request: Request,
+    user_id: UUID,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    viewer: Optional[User] = Depends(optional_active_user),
+    user_dao: UserDAO = Depends(get_readonly_user_dao),
+    post_dao: PostDAO = Depends(get_readonly_post_dao),
+    follow_dao: FollowDAO = Depends(get_readonly_follow_dao),
+) -> PostPageDTO:
+    """
+    Get page of user's posts from newest to oldest.
+
+    Works with ETags like `GET /api/posts`.
+
+    :param request: current request.
+    :param user_id: id of the author.
+    :param limit: limit of posts, defaults to 20.
+    :param cursor: `next_cursor` from the previous page.
+    :param viewer: current user, if authenticated.
+    :param user_dao: DAO for users.
+    :param post_dao: DAO for post models.
+    :param follow_dao: DAO for follows.
+    :raises HTTPException: if user doesn't exist or hides posts from viewer.
+    :return: page of posts.
+    """
+    author = await user_dao.get_user_by_id(user_id)
+    if author is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+    if not await can_see_posts(author, viewer, follow_dao):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Posts of this user are private",
+        )
+    try:
+        if has_conditions(request):
+            versions, next_cursor = await post_dao.get_user_posts(
+                user_id,
+                limit=limit,
+                cursor=cursor,
+                fields=(),
+            )
+            etag = page_etag(versions, next_cursor)
+            if is_not_modified(request, etag):
+                return not_modified(etag)
+        posts, next_cursor = await post_dao.get_user_posts(
+            user_id,
+            limit=limit,
+            cursor=cursor,
+        )
+    except InvalidCursorError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        ) from exc
+    items = validate_rows(List[PostModelDTO], posts)
+    return ModelResponse(
+        PostPageDTO(items=items, next_cursor=next_cursor),
+        PostPageDTO,
+        headers=validator_headers(page_etag(posts, next_cursor)),
+    )
+
+
+@router.post("/users/{user_id}/follow", tags=["users"])
+async def follow_user(
+    user_id: UUID,
+    background_tasks: BackgroundTasks,
+    user: User = Depends(current_active_user),
+    follow_dao: FollowDAO = Depends(),
+) -> dict:
+    """
+    Follow posts of the user.
+
+    Recent posts of the user appear in the feed shortly after.
+
+    :param user_id: id of user to follow.
+    :param background_tasks: tasks run after the follow is committed.
+    :param user: authenticated user.
+    :param follow_dao: DAO for follows.
+    :raises HTTPException: if user doesn't exist or follows themselves.
+    :return: follow status.
+    """
+    if user_id == user.id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You can't follow yourself",
+        )
+    if await UserDAO(follow_dao.session).get_user_by_id(user_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+    if await follow_dao.follow(user.id, user_id):
+        background_tasks.add_task(backfill_timeline.kiq, user.id, user_id)
+        affinities.pop(user.id)
+    return {"following": True}
+
+
+@router.delete("/users/{user_id}/follow", tags=["users"])
+async def unfollow_user(
+    user_id: UUID,
+    user: User = Depends(current_active_user),
+    follow_dao: FollowDAO = Depends(),
+) -> dict:
+    """
+    Stop following posts of the user.
+
+    Their posts left in the timeline are skipped when the feed is read.
+
+    :param user_id: id of followed user.
+    :param user: authenticated user.
+    :param follow_dao: DAO for follows.
+    :return: follow status.
+    """
+    if await follow_dao.unfollow(user.id, user_id):
+        affinities.pop(user.id)
+    return {"following": False}
+
+
+@router.get("/users/me", tags=["users"], name="users:current_user")
+async def get_current_user(
+    request: Request,
+    response: Response,
+    user: User = Depends(current_active_user),
+) -> UserResponse:
+    """
+    Get profile of the current user.
+
+    Replaces the route of fastapi-users to add ETag and Last-Modified.
+    The user comes from the authentication cache, so checking
+    If-None-Match doesn't touch the database.
+
+    :param request: current request.
+    :param response: response, validators of the profile are set on it.
+    :param user: authenticated user.
+    :return: profile.
+    """
+    # Activity is recorded without changing updated_at, it's shown too.
+    etag = make_etag(user.id, user.updated_at, user.last_activity_at)
+    if is_not_modified(request, etag, user.updated_at):
+        return not_modified(etag, user.updated_at, private=True)
+    response.headers.update(validator_headers(etag, user.updated_at, private=True))
+    return UserResponse.model_validate(user)
+
+
+users_router = api_users.get_users_router(UserResponse, UserUpdate)
+# GET /me is replaced by get_current_user.
+users_router.routes = [
+    route for route in users_router.routes if route.name != "users:current_user"
+]
 router.include_router(
-    api_users.get_users_router(UserResponse, UserUpdate),
+    users_router,
     prefix="/users",
     tags=["users"],
 )
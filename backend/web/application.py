@@ -1,12 +1,10 @@
 # type: ignore
 import logging
 from importlib import metadata
-from pathlib import Path
 
 import sentry_sdk
 from fastapi import FastAPI
 from fastapi.responses import UJSONResponse
-from fastapi.staticfiles import StaticFiles
 from sentry_sdk.integrations.fastapi import FastApiIntegration
 from sentry_sdk.integrations.logging import LoggingIntegration
 from sentry_sdk.integrations.sqlalchemy import SqlalchemyIntegration
@@ -15,8 +13,8 @@ from backend.log import configure_logging
 from backend.settings import settings
 from backend.web.api.router import api_router
 from backend.web.lifespan import lifespan_setup
-
-APP_ROOT = Path(__file__).parent.parent
+from backend.web.middleware import CompressionMiddleware, QueryStatsMiddleware
+from backend.web.static import STATIC_DIR, PrecompressedStaticFiles
 
 
 def get_app() -> FastAPI:
@@ -55,10 +53,18 @@ def get_app() -> FastAPI:
         default_response_class=UJSONResponse,
     )
 
+    app.add_middleware(QueryStatsMiddleware)
+    # Added last, so it compresses responses after other middlewares.
+    app.add_middleware(CompressionMiddleware)
+
     # Main router for the API.
     app.include_router(router=api_router, prefix="/api")
     # Adds static directory.
     # This directory is used to access swagger files.
-    app.mount("/static", StaticFiles(directory=APP_ROOT / "static"), name="static")
+    app.mount(
+        "/static",
+        PrecompressedStaticFiles(directory=STATIC_DIR),
+        name="static",
+    )
 
     return app
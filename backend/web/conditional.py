@@ -0,0 +1,144 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Iterable, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+def _encode(value: Any) -> Any:
+    """
+    Encode values of ETag parts, which JSON doesn't support.
+
+    Datetimes are encoded as timestamps: the same time read from
+    the database and from the cache may have different tzinfo.
+
+    :param value: value.
+    :return: JSON-compatible value.
+    """
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return str(value)
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Weak ETag of a representation built from its version.
+
+    ETags are weak: the same version may be serialized differently,
+    e.g. compressed, and pending view counts aren't part of it.
+
+    :param parts: values identifying the version, like id and `updated_at`.
+    :return: ETag.
+    """
+    data = json.dumps(parts, default=_encode).encode()
+    digest = hashlib.blake2b(data, digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def page_etag(rows: Iterable[Any], *parts: Any) -> str:
+    """
+    Weak ETag of a page of posts.
+
+    :param rows: posts or rows with `id` and `updated_at`.
+    :param parts: other values the page depends on, like fields and cursor.
+    :return: ETag.
+    """
+    return make_etag(*parts, [(row.id, row.updated_at) for row in rows])
+
+
+def has_conditions(request: Request) -> bool:
+    """
+    Check whether request is conditional.
+
+    Handlers check versions before loading data only for such requests.
+
+    :param request: current request.
+    :return: whether request has If-None-Match or If-Modified-Since.
+    """
+    headers = request.headers
+    return "if-none-match" in headers or "if-modified-since" in headers
+
+
+def is_not_modified(
+    request: Request,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+) -> bool:
+    """
+    Check whether client's copy is still valid.
+
+    If-None-Match takes precedence over If-Modified-Since, as RFC 9110
+    requires. ETags are compared weakly.
+
+    :param request: current request.
+    :param etag: ETag of the current version.
+    :param last_modified: modification time of the current version,
+        None if resource has no modification time, like pages.
+    :return: whether 304 can be returned.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag.removeprefix("W/") in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    # HTTP dates have a resolution of a second.
+    return last_modified.replace(microsecond=0) <= since
+
+
+def validator_headers(
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    private: bool = False,
+) -> Dict[str, str]:
+    """
+    Headers letting clients revalidate their copies.
+
+    Copies must be revalidated on every use, so clients never show
+    stale data, but revalidation of an unchanged copy is cheap.
+
+    :param etag: ETag of the version.
+    :param last_modified: modification time of the version.
+    :param private: whether response is for the current user only.
+    :return: headers.
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache" if private else "no-cache",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(
+            last_modified.astimezone(timezone.utc),
+            usegmt=True,
+        )
+    return headers
+
+
+def not_modified(
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    private: bool = False,
+) -> Response:
+    """
+    Response telling client to use its copy.
+
+    :param etag: ETag of the version.
+    :param last_modified: modification time of the version.
+    :param private: whether response is for the current user only.
+    :return: 304 response.
+    """
+    return Response(
+        status_code=304,
+        headers=validator_headers(etag, last_modified, private),
+    )
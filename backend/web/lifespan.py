@@ -1,5 +1,6 @@
+import asyncio
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Dict
 
 from fastapi import FastAPI
 from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
@@ -18,9 +19,14 @@ from opentelemetry.trace import set_tracer_provider
 from prometheus_fastapi_instrumentator.instrumentation import (
     PrometheusFastApiInstrumentator,
 )
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
+from backend.db.engine import create_engine, warm_up
+from backend.db.query_stats import instrument_queries
+from backend.db.replica import ROUTER, ReplicaRouter, RoutingSession
+from backend.services.password import password_helper
 from backend.services.redis.lifespan import init_redis, shutdown_redis
+from backend.services.similar import SimilarPosts
 from backend.settings import settings
 from backend.tkq import broker
 
@@ -30,18 +36,72 @@ def _setup_db(app: FastAPI) -> None:  # pragma: no cover
     Creates connection to the database.
 
     This function creates SQLAlchemy engine instance,
-    session_factory for creating sessions
+    session factories for creating read-write and read-only sessions
     and stores them in the application's state property.
 
+    If replicas are configured, sessions send reads of `replica_read`
+    DAO methods to them, and replica lag is monitored in background.
+
     :param app: fastAPI application.
     """
-    engine = create_async_engine(str(settings.db_url), echo=settings.db_echo)
+    engine = create_engine(settings.db_url)
+    replicas = [
+        create_engine(url, name=f"replica-{index}")
+        for index, url in enumerate(settings.db_replica_urls)
+    ]
+    for instrumented in (engine, *replicas):
+        instrument_queries(instrumented)
+
+    session_options: Dict[str, Any] = {}
+    app.state.db_replica_monitor = None
+    if replicas:
+        router = ReplicaRouter(engine, replicas, app.state.redis_pool)
+        session_options = {
+            "sync_session_class": RoutingSession,
+            "info": {ROUTER: router},
+        }
+        app.state.db_replica_monitor = asyncio.create_task(router.monitor_lag())
+
     session_factory = async_sessionmaker(
         engine,
         expire_on_commit=False,
+        **session_options,
     )
     app.state.db_engine = engine
+    app.state.db_replica_engines = replicas
     app.state.db_session_factory = session_factory
+    app.state.db_readonly_session_factory = async_sessionmaker(
+        engine.execution_options(postgresql_readonly=True),
+        expire_on_commit=False,
+        **session_options,
+    )
+
+
+async def _warm_up_db(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Open connections to primary and replicas in advance.
+
+    :param app: fastAPI application.
+    """
+    if not settings.db_pool_warm_up:
+        return
+    await asyncio.gather(
+        warm_up(app.state.db_engine),
+        *(warm_up(replica) for replica in app.state.db_replica_engines),
+    )
+
+
+async def _shutdown_db(app: FastAPI) -> None:
+    """
+    Closes connections to the database.
+
+    :param app: fastAPI application.
+    """
+    if app.state.db_replica_monitor is not None:
+        app.state.db_replica_monitor.cancel()
+    await app.state.db_engine.dispose()
+    for replica in app.state.db_replica_engines:
+        await replica.dispose()
 
 
 def setup_opentelemetry(app: FastAPI) -> None:  # pragma: no cover
@@ -139,16 +199,23 @@ async def lifespan_setup(
     app.middleware_stack = None
     if not broker.is_worker_process:
         await broker.startup()
+    init_redis(app)
+    app.state.similar_posts = SimilarPosts(
+        settings.similar_index_dir,
+        app.state.redis_pool,
+    )
     _setup_db(app)
+    await _warm_up_db(app)
     setup_opentelemetry(app)
-    init_redis(app)
     setup_prometheus(app)
+    await password_helper.startup()
     app.middleware_stack = app.build_middleware_stack()
 
     yield
     if not broker.is_worker_process:
         await broker.shutdown()
-    await app.state.db_engine.dispose()
+    await _shutdown_db(app)
 
     await shutdown_redis(app)
+    password_helper.shutdown()
     stop_opentelemetry(app)
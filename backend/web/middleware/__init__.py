@@ -0,0 +1,6 @@
+"""ASGI middlewares of the application."""
+
+from backend.web.middleware.compression import CompressionMiddleware
+from backend.web.middleware.query_stats import QueryStatsMiddleware
+
+__all__ = ["CompressionMiddleware", "QueryStatsMiddleware"]
@@ -0,0 +1,288 @@
+import zlib
+from typing import Dict, List, Optional, Protocol
+
+import brotli
+from prometheus_client import Counter
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.settings import settings
+
+# Supported encodings, preferred first.
+ENCODINGS = ("br", "gzip")
+
+compressed_bytes = Counter(
+    "http_compressed_response_bytes_total",
+    "Bytes of compressed response bodies before and after compression",
+    ["encoding", "stage"],
+)
+
+
+class Compressor(Protocol):
+    """Streaming compressor of a response body."""
+
+    def compress(self, chunk: bytes) -> bytes:
+        """Compress chunk and flush it, so the client can decode it."""
+
+    def finish(self, chunk: bytes) -> bytes:
+        """Compress the last chunk and end the stream."""
+
+
+class GzipCompressor:
+    """Gzip compressor."""
+
+    def __init__(self, level: int) -> None:
+        # wbits 31 writes gzip header and trailer.
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        """
+        Compress chunk and flush it.
+
+        :param chunk: part of body.
+        :return: compressed part.
+        """
+        return self.compressor.compress(chunk) + self.compressor.flush(
+            zlib.Z_SYNC_FLUSH,
+        )
+
+    def finish(self, chunk: bytes) -> bytes:
+        """
+        Compress the last chunk.
+
+        :param chunk: part of body.
+        :return: compressed part with the end of stream.
+        """
+        return self.compressor.compress(chunk) + self.compressor.flush()
+
+
+class BrotliCompressor:
+    """Brotli compressor."""
+
+    def __init__(self, quality: int) -> None:
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, chunk: bytes) -> bytes:
+        """
+        Compress chunk and flush it.
+
+        :param chunk: part of body.
+        :return: compressed part.
+        """
+        return self.compressor.process(chunk) + self.compressor.flush()
+
+    def finish(self, chunk: bytes) -> bytes:
+        """
+        Compress the last chunk.
+
+        :param chunk: part of body.
+        :return: compressed part with the end of stream.
+        """
+        return self.compressor.process(chunk) + self.compressor.finish()
+
+
+def accepted_encodings(accept_encoding: str) -> List[str]:
+    """
+    Supported encodings accepted by the client, preferred first.
+
+    Encodings are ordered by their q-values, encodings with equal
+    q-values in the order of `ENCODINGS`.
+
+    :param accept_encoding: value of Accept-Encoding header.
+    :return: encodings.
+    """
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0
+        weights[name.strip()] = weight
+
+    default = weights.get("*", 0)
+    accepted = [
+        encoding for encoding in ENCODINGS if weights.get(encoding, default) > 0
+    ]
+    return sorted(accepted, key=lambda encoding: -weights.get(encoding, default))
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    """
+    Check whether responses of the content type are worth compressing.
+
+    :param content_type: value of Content-Type header.
+    :return: whether it's one of `compression_types`.
+    """
+    if not content_type:
+        return False
+    media_type = content_type.partition(";")[0].strip().lower()
+    return any(
+        media_type.startswith(prefix) if prefix.endswith("/") else media_type == prefix
+        for prefix in settings.compression_types
+    )
+
+
+def get_compressor(encoding: str) -> Compressor:
+    """
+    Create compressor of a response.
+
+    :param encoding: one of `ENCODINGS`.
+    :return: compressor.
+    """
+    if encoding == "br":
+        return BrotliCompressor(settings.compression_brotli_quality)
+    return GzipCompressor(settings.compression_gzip_level)
+
+
+class CompressionResponder:
+    """Compresses one response, if it's worth it."""
+
+    def __init__(self, app: ASGIApp, encoding: str) -> None:
+        self.app = app
+        self.encoding = encoding
+        self.start: Optional[Message] = None
+        self.compressor: Optional[Compressor] = None
+        self.send: Send
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Run the app compressing its response.
+
+        :param scope: ASGI scope.
+        :param receive: ASGI receive channel.
+        :param send: ASGI send channel.
+        """
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        """
+        Send message of the app, compressing body.
+
+        Start of response is held until the first part of body,
+        it decides whether response is compressed.
+
+        :param message: ASGI message.
+        """
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start is not None:
+            start, self.start = self.start, None
+            if not self.should_compress(start, body, more_body):
+                await self.send(start)
+                await self.send(message)
+                return
+            self.compressor = get_compressor(self.encoding)
+            compressed = self.compress(body, more_body)
+            headers = MutableHeaders(scope=start)
+            headers["Content-Encoding"] = self.encoding
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(compressed))
+            # Compressed body is another representation, its bytes differ.
+            etag = headers.get("ETag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            await self.send(start)
+            await self.send({**message, "body": compressed})
+            return
+
+        if self.compressor is not None:
+            message = {**message, "body": self.compress(body, more_body)}
+        await self.send(message)
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        """
+        Compress part of body.
+
+        :param body: part of body.
+        :param more_body: whether more parts follow.
+        :return: compressed part.
+        """
+        if self.compressor is None:
+            return body
+        if more_body:
+            compressed = self.compressor.compress(body)
+        else:
+            compressed = self.compressor.finish(body)
+        compressed_bytes.labels(encoding=self.encoding, stage="in").inc(len(body))
+        compressed_bytes.labels(encoding=self.encoding, stage="out").inc(
+            len(compressed),
+        )
+        return compressed
+
+    @staticmethod
+    def should_compress(start: Message, body: bytes, more_body: bool) -> bool:
+        """
+        Decide whether response is compressed.
+
+        :param start: start of response.
+        :param body: first part of body.
+        :param more_body: whether more parts follow.
+        :return: whether to compress.
+        """
+        headers = Headers(raw=start["headers"])
+        if "content-encoding" in headers or not is_compressible(
+            headers.get("content-type"),
+        ):
+            return False
+        if more_body:
+            # Streamed responses are compressed unless they say they are small.
+            size = headers.get("content-length")
+            return size is None or int(size) >= settings.compression_min_size
+        return len(body) >= settings.compression_min_size
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with brotli or gzip.
+
+    Encoding is negotiated with Accept-Encoding, brotli is preferred.
+    Only responses of `compression_types` at least `compression_min_size`
+    bytes long are compressed: compressing small bodies costs more CPU
+    than it saves bandwidth. Responses already encoded, e.g. metrics or
+    precompressed static files, are sent as is.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Handle request.
+
+        :param scope: ASGI scope.
+        :param receive: ASGI receive channel.
+        :param send: ASGI send channel.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_vary(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).add_vary_header("Accept-Encoding")
+            await send(message)
+
+        encodings = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if not encodings:
+            await self.app(scope, receive, send_with_vary)
+            return
+        await CompressionResponder(self.app, encodings[0])(
+            scope,
+            receive,
+            send_with_vary,
+        )
@@ -0,0 +1,94 @@
+from loguru import logger
+from prometheus_client import Counter, Histogram
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.db.query_stats import QueryStats, query_stats
+from backend.settings import settings
+
+queries_per_request = Histogram(
+    "db_queries_per_request",
+    "Database queries executed by one request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+db_time_per_request = Histogram(
+    "db_time_per_request_seconds",
+    "Time spent in database queries by one request",
+    ["method", "route"],
+)
+repeated_queries = Counter(
+    "db_repeated_queries_total",
+    "Requests executing the same statement many times, likely N+1 queries",
+    ["method", "route"],
+)
+
+
+class QueryStatsMiddleware:
+    """
+    Collect statistics of database queries made by each request.
+
+    Query count and time are exported as histograms by route,
+    and in dev environment are returned in `X-DB-Query-Count` and
+    `X-DB-Time-Ms` headers. Statements repeated at least
+    `db_n_plus_one_threshold` times are logged as likely N+1 queries.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Handle request.
+
+        :param scope: ASGI scope.
+        :param receive: ASGI receive channel.
+        :param send: ASGI send channel.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = query_stats.set(stats)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Query-Count"] = str(stats.count)
+                headers["X-DB-Time-Ms"] = f"{stats.duration * 1000:.1f}"
+            await send(message)
+
+        with_headers = settings.environment.lower() == "dev"
+        try:
+            await self.app(scope, receive, send_with_headers if with_headers else send)
+        finally:
+            query_stats.reset(token)
+            self.report(scope, stats)
+
+    @staticmethod
+    def report(scope: Scope, stats: QueryStats) -> None:
+        """
+        Export statistics of finished request.
+
+        :param scope: ASGI scope of request.
+        :param stats: its queries.
+        """
+        route = scope.get("route")
+        labels = {
+            "method": scope["method"],
+            "route": getattr(route, "path", "<unmatched>"),
+        }
+        queries_per_request.labels(**labels).observe(stats.count)
+        db_time_per_request.labels(**labels).observe(stats.duration)
+
+        repeated = stats.repeated(settings.db_n_plus_one_threshold)
+        if repeated:
+            repeated_queries.labels(**labels).inc()
+        for statement, count in repeated:
+            logger.warning(
+                "Possible N+1 in {method} {route}: executed {} times: {}",
+                count,
+                statement,
+                **labels,
+            )
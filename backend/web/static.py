@@ -0,0 +1,183 @@
+import functools
+import gzip
+import hashlib
+import os
+import stat
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import brotli
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from backend.settings import settings
+from backend.web.middleware.compression import accepted_encodings, is_compressible
+
+STATIC_DIR = Path(__file__).parent.parent / "static"
+
+# Suffixes of precompressed siblings of static files.
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+@functools.lru_cache(maxsize=1024)
+def _file_hash(path: str, mtime_ns: int, size: int) -> str:
+    """
+    Hash content of a file.
+
+    Modification time and size are part of the cache key,
+    so a changed file is hashed again.
+
+    :param path: path to file.
+    :param mtime_ns: modification time of file.
+    :param size: size of file.
+    :return: hex digest.
+    """
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as file:
+        for chunk in iter(lambda: file.read(64 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_hash(path: Union["os.PathLike[str]", str], stat_result: os.stat_result) -> str:
+    """
+    Get hash of content of a file.
+
+    :param path: path to file.
+    :param stat_result: its stat.
+    :return: hex digest.
+    """
+    return _file_hash(str(path), stat_result.st_mtime_ns, stat_result.st_size)
+
+
+def static_url(path: str) -> str:
+    """
+    URL of a static file with its version.
+
+    Static files are cached by browsers forever,
+    the version changes URL when the file changes.
+
+    :param path: path relative to the static directory.
+    :return: URL.
+    """
+    full_path = STATIC_DIR / path
+    return f"/static/{path}?v={file_hash(full_path, full_path.stat())[:16]}"
+
+
+def _precompressed(
+    full_path: str,
+    stat_result: os.stat_result,
+    scope: Scope,
+) -> Optional[Tuple[str, str, os.stat_result]]:
+    """
+    Find precompressed sibling of a file accepted by the client.
+
+    Siblings older than the file are stale and ignored.
+
+    :param full_path: path to file.
+    :param stat_result: its stat.
+    :param scope: ASGI scope of request.
+    :return: encoding, path and stat of sibling or None.
+    """
+    accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+    for encoding in accepted_encodings(accept_encoding):
+        path = full_path + SUFFIXES[encoding]
+        try:
+            sibling = Path(path).stat()
+        except OSError:
+            continue
+        if (
+            stat.S_ISREG(sibling.st_mode)
+            and sibling.st_mtime_ns >= stat_result.st_mtime_ns
+        ):
+            return encoding, path, sibling
+    return None
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    Static files served with precompressed siblings.
+
+    If the client accepts brotli or gzip and `name.br` or `name.gz`
+    exists next to a file, the sibling is sent instead of compressing
+    the file on every request. Siblings are generated at build time
+    with `python -m backend.web.static`.
+
+    ETags are strong, they are hashes of sent bytes. URLs from
+    `static_url` are versioned, so files are cached as immutable.
+    """
+
+    def file_response(
+        self,
+        full_path: Union["os.PathLike[str]", str],
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        """
+        Respond with file or its precompressed sibling.
+
+        :param full_path: path to file.
+        :param stat_result: its stat.
+        :param scope: ASGI scope of request.
+        :param status_code: status of response.
+        :return: response.
+        """
+        headers = {
+            "Cache-Control": f"public, max-age={settings.static_max_age}, immutable",
+            "Vary": "Accept-Encoding",
+        }
+        media_type = guess_type(str(full_path))[0] or "text/plain"
+        path = str(full_path)
+        sibling = _precompressed(path, stat_result, scope)
+        if sibling is not None:
+            headers["Content-Encoding"], path, stat_result = sibling
+
+        response = FileResponse(
+            path,
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+            stat_result=stat_result,
+        )
+        response.headers["ETag"] = f'"{file_hash(path, stat_result)[:32]}"'
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def precompress(directory: Path) -> None:
+    """
+    Write brotli and gzip siblings of compressible files.
+
+    Siblings are written with the best compression, it's done once.
+    They are skipped when compression doesn't make the file smaller.
+
+    :param directory: static directory.
+    """
+    for path in sorted(directory.rglob("*")):
+        if not path.is_file() or path.suffix in (".br", ".gz"):
+            continue
+        if not is_compressible(guess_type(path.name)[0]):
+            continue
+        content = path.read_bytes()
+        if len(content) < settings.compression_min_size:
+            continue
+        compressed = {
+            ".br": brotli.compress(content, quality=11),
+            # Zero mtime makes build reproducible.
+            ".gz": gzip.compress(content, compresslevel=9, mtime=0),
+        }
+        for suffix, data in compressed.items():
+            sibling = path.with_name(path.name + suffix)
+            if len(data) < len(content):
+                sibling.write_bytes(data)
+            else:
+                sibling.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    precompress(STATIC_DIR)
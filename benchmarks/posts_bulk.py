@@ -0,0 +1,108 @@
+"""
+Measure throughput of bulk post creation.
+
+Run against a migrated database configured with BACKEND_* variables:
+
+    python -m benchmarks.posts_bulk --posts 100000
+
+Compares one-by-one creation, multi-row INSERT and COPY.
+Created posts are removed afterwards.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from backend.db.dao.posts_dao import PostDAO
+from backend.db.models import load_all_models
+from backend.schemas.post import PostModelInputDTO
+from backend.settings import settings
+
+
+async def run(
+    name: str,
+    session_factory: async_sessionmaker[AsyncSession],
+    user_id: uuid.UUID,
+    posts: List[PostModelInputDTO],
+    batch_size: int,
+    copy_threshold: int,
+) -> None:
+    """Create posts in batches and print posts per second."""
+    settings.post_bulk_copy_threshold = copy_threshold
+    start = time.perf_counter()
+    async with session_factory() as session:
+        dao = PostDAO(session, None)
+        for offset in range(0, len(posts), batch_size):
+            batch = posts[offset : offset + batch_size]
+            if batch_size == 1:
+                await dao.create_post_model(batch[0].title, batch[0].content, user_id)
+            else:
+                await dao.bulk_create_posts(user_id, batch)
+        await session.commit()
+    elapsed = time.perf_counter() - start
+    print(  # noqa: T201
+        f"{name:<24} {len(posts):>8} posts {elapsed:8.2f}s "
+        f"{len(posts) / elapsed:>10.0f} posts/s",
+    )
+
+
+async def main(posts: int, single: int) -> None:
+    """Create benchmark user and run benchmark."""
+    load_all_models()
+    engine = create_async_engine(str(settings.db_url))
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    user_id = uuid.uuid4()
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                'INSERT INTO "user" (id, email, hashed_password, is_active, '
+                "is_superuser, is_verified, timezone, privacy_level, status) "
+                "VALUES (:id, :email, '-', true, false, false, 'UTC', "
+                "'PUBLIC', 'ACTIVE')",
+            ),
+            {"id": user_id, "email": f"{user_id.hex}@bench.local"},
+        )
+    generated = [
+        PostModelInputDTO(title=f"post {i}", content=f"content of post {i} " * 5)
+        for i in range(posts)
+    ]
+
+    try:
+        batch_size = settings.post_bulk_batch_size
+        await run(
+            "create_post_model", session_factory, user_id, generated[:single], 1, 0
+        )
+        await run(
+            "bulk INSERT",
+            session_factory,
+            user_id,
+            generated,
+            batch_size,
+            batch_size + 1,
+        )
+        await run("bulk COPY", session_factory, user_id, generated, batch_size, 1)
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text('DELETE FROM "user" WHERE id = :id'),
+                {"id": user_id},
+            )
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument(
+        "--single",
+        type=int,
+        default=2_000,
+        help="posts created one by one, it's slow",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.posts, args.single))
@@ -0,0 +1,140 @@
+"""
+Measure per-row cost of listing posts.
+
+Run against a migrated database configured with BACKEND_* variables:
+
+    python -m benchmarks.posts_list --posts 10000 --limit 100
+
+Compares loading ORM entities and validating them one by one with
+selecting columns as rows and validating the page in one call,
+with all fields and with a sparse fieldset. Generated posts are
+removed afterwards.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from backend.db.dao.posts_dao import PostDAO
+from backend.db.models.posts import Post
+from backend.db.pagination import apply_keyset
+from backend.schemas.post import PartialPostDTO, PostModelDTO
+from backend.settings import settings
+from backend.web.responses import validate_rows
+
+
+async def measure(
+    calls: Dict[str, Callable[[], Awaitable[List[Any]]]],
+    repeat: int,
+) -> None:
+    """
+    Run calls in turns and print time per row and memory peak of each.
+
+    Calls are interleaved, so load of the machine affects all of them
+    alike. CPU time is of this process only, it excludes the database.
+    """
+    timings: Dict[str, List[float]] = {name: [] for name in calls}
+    cpu_timings: Dict[str, List[float]] = {name: [] for name in calls}
+    for round_ in range(repeat + repeat // 10):
+        for name, call in calls.items():
+            start, cpu_start = time.perf_counter(), time.process_time()
+            rows = len(await call())
+            if round_ < repeat // 10:
+                # Warm up connections and caches of statements.
+                continue
+            cpu = time.process_time() - cpu_start
+            timings[name].append((time.perf_counter() - start) * 1_000_000 / rows)
+            cpu_timings[name].append(cpu * 1_000_000 / rows)
+
+    for name, call in calls.items():
+        tracemalloc.start()
+        await call()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(  # noqa: T201
+            f"{name:<16} wall p50={statistics.median(timings[name]):7.2f}us/row "
+            f"cpu p50={statistics.median(cpu_timings[name]):7.2f}us/row "
+            f"peak={peak / 1024:8.1f}KiB",
+        )
+
+
+async def main(posts: int, limit: int, repeat: int) -> None:
+    """Seed posts and run benchmark."""
+    engine = create_async_engine(str(settings.db_url))
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    user_id = uuid.uuid4()
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                'INSERT INTO "user" (id, email, hashed_password, is_active, '
+                "is_superuser, is_verified, timezone, privacy_level, status) "
+                "VALUES (:id, :email, '-', true, false, false, 'UTC', "
+                "'PUBLIC', 'ACTIVE')",
+            ),
+            {"id": user_id, "email": f"{user_id.hex}@bench.local"},
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO posts (title, content, user_id) "
+                "SELECT 'post ' || i, repeat('lorem ipsum ', 200), :user_id "
+                "FROM generate_series(1, :posts) AS i",
+            ),
+            {"posts": posts, "user_id": user_id},
+        )
+        await conn.execute(text("ANALYZE posts"))
+
+    async def entities() -> List[PostModelDTO]:
+        # How the page was loaded before, one validation per entity.
+        async with session_factory() as session:
+            result = await session.execute(
+                apply_keyset(select(Post), (Post.created_at, Post.id), limit),
+            )
+            return [
+                PostModelDTO.model_validate(post)
+                for post in result.scalars().fetchall()[:limit]
+            ]
+
+    async def rows(session: AsyncSession, fields: Any, type_: Any) -> List[Any]:
+        page, _ = await PostDAO(session, None).get_all_posts(limit, fields=fields)
+        return validate_rows(type_, page)
+
+    async def all_fields() -> List[Any]:
+        async with session_factory() as session:
+            return await rows(session, PostModelDTO.model_fields, List[PostModelDTO])
+
+    async def sparse_fields() -> List[Any]:
+        async with session_factory() as session:
+            return await rows(session, ("id", "title"), List[PartialPostDTO])
+
+    try:
+        await measure(
+            {
+                "entities": entities,
+                "rows": all_fields,
+                "rows id,title": sparse_fields,
+            },
+            repeat,
+        )
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text('DELETE FROM "user" WHERE id = :id'),
+                {"id": user_id},
+            )
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=10_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.posts, args.limit, args.repeat))
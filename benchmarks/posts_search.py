@@ -0,0 +1,107 @@
+"""
+Compare full-text search with the title equality filter.
+
+Run against a migrated database configured with BACKEND_* variables:
+
+    python -m benchmarks.posts_search --posts 1000000
+
+Posts are generated on the database side, so seeding millions of rows
+takes seconds. Generated posts are removed afterwards.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from typing import Awaitable, Callable, List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.db.dao.posts_dao import PostDAO
+from backend.settings import settings
+
+WORDS = (
+    "mountain river city forest coffee music travel winter summer photo "
+    "garden recipe football game movie book school robot space ocean"
+).split()
+
+
+async def measure(
+    name: str,
+    call: Callable[[], Awaitable[object]],
+    repeat: int,
+) -> None:
+    """Run call several times and print latency percentiles."""
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(  # noqa: T201
+        f"{name:<28} p50={statistics.median(timings):8.2f}ms "
+        f"p99={timings[int(len(timings) * 0.99) - 1]:8.2f}ms",
+    )
+
+
+async def main(posts: int, repeat: int) -> None:
+    """Seed posts and run benchmark."""
+    engine = create_async_engine(str(settings.db_url))
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    user_id = uuid.uuid4()
+    words = "ARRAY[" + ",".join(f"'{word}'" for word in WORDS) + "]"
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                'INSERT INTO "user" (id, email, hashed_password, is_active, '
+                "is_superuser, is_verified, timezone, privacy_level, status) "
+                "VALUES (:id, :email, '-', true, false, false, 'UTC', "
+                "'PUBLIC', 'ACTIVE')",
+            ),
+            {"id": user_id, "email": f"{user_id.hex}@bench.local"},
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO posts (title, content, user_id) "  # noqa: S608
+                f"SELECT ({words})[1 + i % 20] || ' ' || i, "
+                f"({words})[1 + i % 7] || ' ' || ({words})[1 + i % 13], :user_id "
+                "FROM generate_series(1, :posts) AS i",
+            ),
+            {"posts": posts, "user_id": user_id},
+        )
+        await conn.execute(text("ANALYZE posts"))
+
+    try:
+        async with session_factory() as session:
+            dao = PostDAO(session, None)
+            await measure(
+                "equality filter_by_title",
+                lambda: dao.filter_by_title(f"mountain {posts // 2}"),
+                repeat,
+            )
+            await measure(
+                "search_posts",
+                lambda: dao.search_posts(f"mountain {posts // 2}", limit=20),
+                repeat,
+            )
+            await measure(
+                "search_posts prefix",
+                lambda: dao.search_posts("mount", limit=20, prefix=True),
+                repeat,
+            )
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text('DELETE FROM "user" WHERE id = :id'), {"id": user_id}
+            )
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.posts, args.repeat))
@@ -0,0 +1,104 @@
+"""
+Measure scoring of recommendation candidates.
+
+Doesn't need a database, candidates are generated:
+
+    python -m benchmarks.recommendations --candidates 10000
+
+Compares vectorized scoring with a plain Python loop over posts.
+"""
+
+import argparse
+import heapq
+import math
+import statistics
+import time
+import uuid
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from backend.services.recommendations.scorer import (
+    AFFINITY_WEIGHT,
+    ENGAGEMENT_WEIGHT,
+    LENGTH_CAP,
+    LENGTH_WEIGHT,
+    Candidates,
+    score_candidates,
+    top_k,
+)
+from backend.settings import settings
+
+
+def measure(name: str, call: Callable[[], object], repeat: int) -> None:
+    """Run call several times and print latency percentiles."""
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(  # noqa: T201
+        f"{name:<12} p50={statistics.median(timings):8.3f}ms "
+        f"p99={timings[int(len(timings) * 0.99) - 1]:8.3f}ms",
+    )
+
+
+def generate(count: int, authors: int, now: float) -> Candidates:
+    """Generate random candidates from the last two days."""
+    rng = np.random.default_rng(0)
+    return Candidates(
+        post_ids=np.arange(count, dtype=np.int64),
+        authors=[uuid.uuid4() for _ in range(authors)],
+        author_codes=rng.integers(0, authors, count),
+        created_at=now - rng.uniform(0, 2 * 24 * 3600, count),
+        lengths=rng.integers(10, 3000, count).astype(np.float64),
+        engagement=rng.exponential(5, count),
+    )
+
+
+def python_top(
+    candidates: Candidates,
+    affinity: Dict[uuid.UUID, float],
+    now: float,
+    limit: int,
+) -> List[int]:
+    """Score candidates one by one, as it would be done without numpy."""
+    scores = []
+    for index in range(len(candidates)):
+        author = candidates.authors[candidates.author_codes[index]]
+        age = max(now - candidates.created_at[index], 0.0)
+        score = 2 ** (-age / settings.recommendation_half_life)
+        score *= 1 + AFFINITY_WEIGHT * affinity.get(author, 0.0)
+        score *= 1 + ENGAGEMENT_WEIGHT * math.log1p(candidates.engagement[index])
+        score *= 1 + LENGTH_WEIGHT * min(candidates.lengths[index], LENGTH_CAP) / (
+            LENGTH_CAP
+        )
+        scores.append((score, index))
+    return [index for _, index in heapq.nlargest(limit, scores)]
+
+
+def main(count: int, authors: int, follows: int, limit: int, repeat: int) -> None:
+    """Generate candidates and run benchmark."""
+    now = time.time()
+    candidates = generate(count, authors, now)
+    affinity = dict.fromkeys(candidates.authors[:follows], 1.0)
+
+    def vectorized() -> List[int]:
+        scores = score_candidates(candidates, affinity, now)
+        return top_k(scores, limit).tolist()
+
+    assert vectorized() == python_top(candidates, affinity, now, limit)  # noqa: S101
+    measure("numpy", vectorized, repeat)
+    measure("python", lambda: python_top(candidates, affinity, now, limit), repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--candidates", type=int, default=10000)
+    parser.add_argument("--authors", type=int, default=2000)
+    parser.add_argument("--follows", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    main(args.candidates, args.authors, args.follows, args.limit, args.repeat)
@@ -0,0 +1,100 @@
+"""
+Measure serialization of a list of posts into a JSON response.
+
+Doesn't need a database, posts are generated:
+
+    python -m benchmarks.responses --posts 1000
+
+Compares the default FastAPI path (response model validation,
+`serialize_response` and `UJSONResponse`) with `ModelResponse`,
+for posts as ORM objects and as DTOs.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, List
+
+from fastapi.responses import UJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from backend.db.models.posts import Post
+from backend.schemas.post import PostModelDTO
+from backend.web.responses import ModelResponse
+
+RESPONSE_TYPE = List[PostModelDTO]
+
+
+def measure(name: str, call: Callable[[], bytes], repeat: int) -> None:
+    """Run call several times and print latency percentiles and memory peak."""
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(  # noqa: T201
+        f"{name:<16} p50={statistics.median(timings):8.3f}ms "
+        f"p99={timings[int(len(timings) * 0.99) - 1]:8.3f}ms "
+        f"peak={peak / 1024:8.1f}KiB",
+    )
+
+
+def generate(count: int) -> List[Post]:
+    """Generate posts the way they are loaded by the DAO."""
+    now = datetime.now(timezone.utc)
+    user_id = uuid.uuid4()
+    return [
+        Post(
+            id=index,
+            user_id=user_id,
+            title=f"post {index}",
+            content="lorem ipsum dolor sit amet " * 20,
+            created_at=now - timedelta(seconds=index),
+            updated_at=now,
+            view_count=index,
+        )
+        for index in range(count)
+    ]
+
+
+def main(count: int, repeat: int) -> None:
+    """Generate posts and run benchmark."""
+    posts = generate(count)
+    dtos = [PostModelDTO.model_validate(post) for post in posts]
+    field = create_model_field("Response", RESPONSE_TYPE, mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def default(content: Any) -> bytes:
+        serialized = loop.run_until_complete(
+            serialize_response(field=field, response_content=content),
+        )
+        return UJSONResponse(serialized).body
+
+    def fast(content: Any) -> bytes:
+        return ModelResponse(content, RESPONSE_TYPE).body
+
+    assert json.loads(default(posts)) == json.loads(fast(posts))  # noqa: S101
+    for name, content in (("orm", posts), ("dto", dtos)):
+        measure(f"default {name}", lambda content=content: default(content), repeat)
+        measure(f"model {name}", lambda content=content: fast(content), repeat)
+    loop.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    main(args.posts, args.repeat)
@@ -1,3 +1,4 @@
+from pathlib import Path
 from typing import Any, AsyncGenerator
 
 import pytest
@@ -13,10 +14,17 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 
-from backend.db.dependencies import get_db_session
+from backend.db.dependencies import (
+    get_db_session,
+    get_readonly_db_session,
+    get_readonly_session_factory,
+)
 from backend.db.utils import create_database, drop_database
 from backend.services.redis.dependency import get_redis_pool
+from backend.services.similar import SimilarPosts
+from backend.services.similar.dependency import get_similar_posts
 from backend.settings import settings
+from backend.tkq import broker
 from backend.web.application import get_app
 
 
@@ -101,10 +109,26 @@ async def fake_redis_pool() -> AsyncGenerator[ConnectionPool, None]:
     await pool.disconnect()
 
 
+@pytest.fixture
+def similar_posts(
+    tmp_path: Path,
+    fake_redis_pool: ConnectionPool,
+    monkeypatch: pytest.MonkeyPatch,
+) -> SimilarPosts:
+    """
+    Get index of similar posts stored in a temporary directory.
+
+    :return: similar posts.
+    """
+    monkeypatch.setattr(settings, "similar_index_dir", tmp_path)
+    return SimilarPosts(tmp_path, fake_redis_pool)
+
+
 @pytest.fixture
 def fastapi_app(
     dbsession: AsyncSession,
     fake_redis_pool: ConnectionPool,
+    similar_posts: SimilarPosts,
 ) -> FastAPI:
     """
     Fixture for creating FastAPI app.
@@ -113,7 +137,15 @@ def fastapi_app(
     """
     application = get_app()
     application.dependency_overrides[get_db_session] = lambda: dbsession
+    application.dependency_overrides[get_readonly_db_session] = lambda: dbsession
+    application.dependency_overrides[get_readonly_session_factory] = lambda: (
+        async_sessionmaker(dbsession.bind, expire_on_commit=False)
+    )
     application.dependency_overrides[get_redis_pool] = lambda: fake_redis_pool
+    application.dependency_overrides[get_similar_posts] = lambda: similar_posts
+    # Tasks kicked by handlers run in place with the same mocks.
+    broker.dependency_overrides[get_db_session] = lambda: dbsession
+    broker.dependency_overrides[get_redis_pool] = lambda: fake_redis_pool
     return application
 
 
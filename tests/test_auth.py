@@ -1,8 +1,12 @@
+import asyncio
+
 import pytest
-from fastapi import FastAPI, status
+from fastapi import FastAPI, HTTPException, status
 from fastapi_users.exceptions import UserNotExists
 from httpx import AsyncClient
 
+from backend.services.password import ExecutorPasswordHelper
+
 
 @pytest.mark.anyio
 class TestAuthRegistration:
@@ -207,3 +211,37 @@ class TestAuthChangePassword:
         response = await client.post(url, json=change_data)
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.anyio
+class TestPasswordHelper:
+    """Tests for password hashing in executor."""
+
+    async def test_hash_and_verify(self) -> None:
+        """Test that hashes made in executor can be verified."""
+        helper = ExecutorPasswordHelper(workers=1, queue_size=10)
+        try:
+            hashed = await helper.hash("Password123!")
+            assert await helper.verify_and_update("Password123!", hashed) == (
+                True,
+                None,
+            )
+            verified, _ = await helper.verify_and_update("wrong", hashed)
+            assert not verified
+        finally:
+            helper.shutdown()
+
+    async def test_queue_is_bounded(self) -> None:
+        """Test that calls over the queue size are rejected."""
+        helper = ExecutorPasswordHelper(workers=0, queue_size=2)
+        try:
+            results = await asyncio.gather(
+                *(helper.hash("Password123!") for _ in range(4)),
+                return_exceptions=True,
+            )
+        finally:
+            helper.shutdown()
+
+        rejected = [result for result in results if isinstance(result, HTTPException)]
+        assert len(rejected) == 1
+        assert rejected[0].status_code == status.HTTP_503_SERVICE_UNAVAILABLE
@@ -0,0 +1,100 @@
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from starlette import status
+
+from backend.web.middleware.compression import accepted_encodings
+from backend.web.static import PrecompressedStaticFiles, precompress
+
+
+def test_accepted_encodings() -> None:
+    """Tests negotiation of encoding."""
+    assert accepted_encodings("gzip, deflate, br") == ["br", "gzip"]
+    assert accepted_encodings("br;q=0.5, gzip") == ["gzip", "br"]
+    assert accepted_encodings("br;q=0, *") == ["gzip"]
+    assert accepted_encodings("identity") == []
+    assert accepted_encodings("") == []
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("accept_encoding", "encoding"),
+    [("gzip, br", "br"), ("gzip", "gzip"), ("br;q=0, gzip", "gzip")],
+)
+async def test_large_response_is_compressed(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    accept_encoding: str,
+    encoding: str,
+) -> None:
+    """Tests that large JSON responses are compressed."""
+    response = await client.get(
+        fastapi_app.openapi_url,
+        headers={"Accept-Encoding": accept_encoding},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Encoding"] == encoding
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert int(response.headers["Content-Length"]) < len(response.content)
+    assert response.json() == fastapi_app.openapi()
+
+
+@pytest.mark.anyio
+async def test_small_response_is_not_compressed(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+) -> None:
+    """Tests that responses below the threshold are sent as is."""
+    response = await client.get(
+        fastapi_app.url_path_for("health_check"),
+        headers={"Accept-Encoding": "gzip, br"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "Content-Encoding" not in response.headers
+
+    response = await client.get(
+        fastapi_app.openapi_url,
+        headers={"Accept-Encoding": "identity"},
+    )
+    assert "Content-Encoding" not in response.headers
+
+
+@pytest.mark.anyio
+async def test_precompressed_static_files(tmp_path: Path) -> None:
+    """Tests that precompressed siblings of static files are served."""
+    content = b"function swagger() { return 'swagger'; }\n" * 100
+    (tmp_path / "app.js").write_bytes(content)
+    precompress(tmp_path)
+    assert (tmp_path / "app.js.br").exists()
+    assert (tmp_path / "app.js.gz").exists()
+
+    static = PrecompressedStaticFiles(directory=tmp_path)
+    async with AsyncClient(app=static, base_url="http://test") as client:
+        etags = set()
+        for encoding in ("br", "gzip", "identity"):
+            response = await client.get(
+                "/app.js",
+                headers={"Accept-Encoding": encoding},
+            )
+            assert response.status_code == status.HTTP_200_OK
+            assert response.content == content
+            assert response.headers.get("Content-Encoding", "identity") == encoding
+            assert "javascript" in response.headers["Content-Type"]
+            assert "immutable" in response.headers["Cache-Control"]
+            etags.add(response.headers["ETag"])
+
+            not_modified = await client.get(
+                "/app.js",
+                headers={
+                    "Accept-Encoding": encoding,
+                    "If-None-Match": response.headers["ETag"],
+                },
+            )
+            assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+        # Every representation has its own strong ETag.
+        assert len(etags) == 3
+        assert not any(etag.startswith("W/") for etag in etags)
@@ -0,0 +1,122 @@
+import asyncio
+from types import SimpleNamespace
+from typing import AsyncGenerator
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from backend.db.dependencies import get_db_session, get_readonly_db_session
+from backend.db.engine import create_engine, warm_up
+from backend.db.models.dummy_model import DummyModel
+from backend.db.session import has_writes
+from backend.settings import settings
+from backend.web.lifespan import _shutdown_db
+
+
+@pytest.mark.anyio
+async def test_write_tracking(dbsession: AsyncSession) -> None:
+    """Tests that only sessions with writes need a commit."""
+    await dbsession.execute(select(DummyModel))
+    assert not has_writes(dbsession.sync_session)
+
+    dbsession.add(DummyModel(name="pending"))
+    assert has_writes(dbsession.sync_session)
+    await dbsession.commit()
+    assert not has_writes(dbsession.sync_session)
+
+    updated = update(DummyModel).values(name="changed").returning(DummyModel.id)
+    await dbsession.execute(select(updated.cte("updated")))
+    assert has_writes(dbsession.sync_session)
+
+
+@pytest.fixture
+async def engine(_engine: AsyncEngine) -> AsyncGenerator[AsyncEngine, None]:
+    """
+    Create engine configured like application's one.
+
+    :param _engine: engine creating the test database.
+    :yield: engine.
+    """
+    engine = create_engine(settings.db_url, name="test")
+    try:
+        yield engine
+    finally:
+        await engine.dispose()
+
+
+def sample(name: str, **labels: str) -> float:
+    """Get value of prometheus metric."""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.anyio
+async def test_unused_session_takes_no_connection(engine: AsyncEngine) -> None:
+    """Tests that session doesn't touch the pool until it's used."""
+    request = SimpleNamespace(
+        app=SimpleNamespace(
+            state=SimpleNamespace(db_session_factory=async_sessionmaker(engine)),
+        ),
+    )
+    checkouts = sample("db_pool_checkouts_total")
+
+    async for _ in get_db_session(request):
+        pass
+    assert sample("db_pool_checkouts_total") == checkouts
+
+    async for session in get_db_session(request):
+        await session.execute(select(DummyModel))
+        assert sample("db_pool_checked_out_connections", pool="test") == 1
+    assert sample("db_pool_checkouts_total") == checkouts + 1
+    assert sample("db_pool_checked_out_connections", pool="test") == 0
+
+
+@pytest.mark.anyio
+async def test_pool_warm_up(engine: AsyncEngine) -> None:
+    """Tests that warm-up opens the whole pool."""
+    await warm_up(engine)
+    assert engine.sync_engine.pool.checkedin() == settings.db_pool_size
+
+    async with engine.connect():
+        pass
+    assert sample("db_pool_checkout_wait_seconds_count", pool="test") > 0
+    assert sample("db_connection_age_seconds_count", pool="test") > 0
+
+
+@pytest.mark.anyio
+async def test_readonly_session(_engine: AsyncEngine) -> None:
+    """Tests that read-only session can't write."""
+    factory = async_sessionmaker(_engine.execution_options(postgresql_readonly=True))
+    request = SimpleNamespace(
+        app=SimpleNamespace(state=SimpleNamespace(db_readonly_session_factory=factory)),
+    )
+
+    async for session in get_readonly_db_session(request):
+        await session.execute(select(DummyModel))
+        with pytest.raises(DBAPIError, match="read-only"):
+            await session.execute(insert(DummyModel).values(name="dummy"))
+
+
+@pytest.mark.anyio
+async def test_shutdown_closes_connections(engine: AsyncEngine) -> None:
+    """Tests that shutdown closes connections to primary and replicas."""
+    replica = create_engine(settings.db_url, name="test-replica")
+    await warm_up(engine)
+    await warm_up(replica)
+    monitor = asyncio.create_task(asyncio.sleep(3600))
+    app = SimpleNamespace(
+        state=SimpleNamespace(
+            db_engine=engine,
+            db_replica_engines=[replica],
+            db_replica_monitor=monitor,
+        ),
+    )
+
+    await _shutdown_db(app)
+
+    assert engine.sync_engine.pool.checkedin() == 0
+    assert replica.sync_engine.pool.checkedin() == 0
+    with pytest.raises(asyncio.CancelledError):
+        await monitor
@@ -46,3 +46,29 @@ async def test_getting(
     assert response.status_code == status.HTTP_200_OK
     assert len(dummies) == 1
     assert dummies[0]["name"] == test_name
+
+
+@pytest.mark.anyio
+async def test_cursor_pagination(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Tests dummy retrieval with cursor from `X-Next-Cursor` header."""
+    dao = DummyDAO(dbsession)
+    names = [uuid.uuid4().hex for _ in range(3)]
+    for name in names:
+        await dao.create_dummy_model(name=name)
+    url = fastapi_app.url_path_for("get_dummy_models")
+
+    # Page ending exactly at the last dummy has no next cursor.
+    response = await client.get(url, params={"limit": 3})
+    assert "X-Next-Cursor" not in response.headers
+
+    response = await client.get(url, params={"limit": 2})
+    cursor = response.headers["X-Next-Cursor"]
+    response = await client.get(url, params={"limit": 2, "cursor": cursor})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [dummy["name"] for dummy in response.json()] == names[2:]
+    assert "X-Next-Cursor" not in response.headers
@@ -0,0 +1,142 @@
+import uuid
+from datetime import datetime, timezone
+from typing import List
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from redis.asyncio import ConnectionPool
+from starlette import status
+
+from backend.services.recommendations.recommender import candidates_cache
+from backend.services.recommendations.scorer import top_k
+from backend.services.timeline import Timeline
+from backend.settings import settings
+from tests.test_users import login
+
+
+async def create_posts(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    headers: dict[str, str],
+    count: int,
+) -> List[int]:
+    """Create posts through the API and return their ids."""
+    url = fastapi_app.url_path_for("create_post_model")
+    ids = []
+    for index in range(count):
+        response = await client.post(
+            url,
+            json={"title": f"post {index}", "content": ""},
+            headers=headers,
+        )
+        ids.append(response.json()["id"])
+    return ids
+
+
+async def read_feed(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    headers: dict[str, str],
+) -> List[int]:
+    """Read the whole feed page by page and return ids of posts."""
+    url = fastapi_app.url_path_for("get_feed")
+    ids = []
+    params = {"limit": 2}
+    while True:
+        response = await client.get(url, params=params, headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        ids.extend(post["id"] for post in response.json()["items"])
+        if response.json()["next_cursor"] is None:
+            return ids
+        params["cursor"] = response.json()["next_cursor"]
+
+
+@pytest.mark.anyio
+async def test_feed(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    fake_redis_pool: ConnectionPool,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Tests that feed merges pushed posts and posts of celebrities."""
+    author_id, author_headers = await login(client)
+    _, reader_headers = await login(client)
+    old = await create_posts(fastapi_app, client, author_headers, 2)
+
+    follow_url = fastapi_app.url_path_for("follow_user", user_id=str(author_id))
+    response = await client.post(follow_url, headers=reader_headers)
+    assert response.status_code == status.HTTP_200_OK
+    own = await create_posts(fastapi_app, client, reader_headers, 1)
+    pushed = await create_posts(fastapi_app, client, author_headers, 2)
+    assert await read_feed(fastapi_app, client, reader_headers) == [
+        *pushed[::-1],
+        *own,
+        *old[::-1],
+    ]
+
+    monkeypatch.setattr(settings, "timeline_celebrity_followers", 0)
+    pulled = await create_posts(fastapi_app, client, author_headers, 1)
+    assert await Timeline(fake_redis_pool).is_celebrity(author_id)
+    feed = await read_feed(fastapi_app, client, reader_headers)
+    assert feed == [*pulled, *pushed[::-1], *own, *old[::-1]]
+
+    response = await client.delete(follow_url, headers=reader_headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert await read_feed(fastapi_app, client, reader_headers) == own
+
+
+@pytest.mark.anyio
+async def test_timeline_pages(
+    fake_redis_pool: ConnectionPool,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Tests that posts created at the same time aren't lost between pages."""
+    monkeypatch.setattr(settings, "timeline_size", 4)
+    timeline = Timeline(fake_redis_pool)
+    user_id = uuid.uuid4()
+    created_at = datetime(2026, 10, 17, 12, 30, 0, 123456, tzinfo=timezone.utc)
+    entries = [(post_id, created_at) for post_id in range(1, 6)]
+    await timeline.push([user_id], entries)
+
+    pages = []
+    before = None
+    while True:
+        page = await timeline.read(user_id, 1, before)
+        if not page:
+            break
+        pages.extend(page)
+        before = page[-1]
+    assert pages == entries[:0:-1]
+
+
+@pytest.mark.anyio
+async def test_recommended(fastapi_app: FastAPI, client: AsyncClient) -> None:
+    """Tests that posts of followed authors are recommended first."""
+    candidates_cache.pop("candidates")
+    followed_id, followed_headers = await login(client)
+    _, stranger_headers = await login(client)
+    _, reader_headers = await login(client)
+    await client.post(
+        fastapi_app.url_path_for("follow_user", user_id=str(followed_id)),
+        headers=reader_headers,
+    )
+    followed = await create_posts(fastapi_app, client, followed_headers, 1)
+    stranger = await create_posts(fastapi_app, client, stranger_headers, 1)
+
+    response = await client.get(
+        fastapi_app.url_path_for("get_recommended"),
+        params={"limit": 2},
+        headers=reader_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [post["id"] for post in response.json()] == [*followed, *stranger]
+
+
+def test_top_k() -> None:
+    """Tests that top scores are selected in order."""
+    scores = np.array([0.5, 3.0, 1.0, 2.0, 0.1])
+    assert top_k(scores, 3).tolist() == [1, 3, 2]
+    assert top_k(scores, 10).tolist() == [1, 3, 2, 0, 4]
+    assert top_k(scores, 0).tolist() == []
@@ -0,0 +1,727 @@
+import csv
+import io
+import json
+import shutil
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from redis.asyncio import ConnectionPool, Redis
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from backend.db.dao.posts_dao import PostDAO
+from backend.db.models.posts import Post
+from backend.db.models.users import User
+from backend.db.session import run_committed
+from backend.schemas.post import PostBatchDTO, PostModelDTO
+from backend.services.post_cache import PostCache
+from backend.services.redis.buffer import batch_token, take_buffer
+from backend.services.similar import SimilarPosts
+from backend.services.similar.index import SimilarIndex
+from backend.services.similar.tasks import update_similar_index
+from backend.services.trending import TrendingPosts
+from backend.services.trending.trending import period_start
+from backend.services.view_counter.tasks import flush_post_views
+from backend.services.view_counter.view_counter import ViewCounter, shard_key
+from backend.settings import settings
+from backend.web.responses import ModelResponse
+
+
+async def create_user(dbsession: AsyncSession) -> User:
+    """Create user to own test posts."""
+    user = User(
+        email=f"{uuid.uuid4().hex}@example.com",
+        hashed_password=uuid.uuid4().hex,
+    )
+    dbsession.add(user)
+    await dbsession.flush()
+    return user
+
+
+@pytest.mark.anyio
+async def test_cursor_pagination(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Tests that posts are listed page by page from newest to oldest."""
+    user = await create_user(dbsession)
+    dao = PostDAO(dbsession, None)
+    created = [
+        await dao.create_post_model(title=f"post {i}", content="", user_id=user.id)
+        for i in range(5)
+    ]
+
+    url = fastapi_app.url_path_for("get_post_models")
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get(url, params=params)
+        assert response.status_code == status.HTTP_200_OK
+        page = response.json()
+        seen.extend(post["id"] for post in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [post.id for post in reversed(created)]
+
+
+@pytest.mark.anyio
+async def test_sparse_fields(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Tests that only requested fields of posts are returned."""
+    user = await create_user(dbsession)
+    dao = PostDAO(dbsession, None)
+    post = await dao.create_post_model(title="title", content="long", user_id=user.id)
+    url = fastapi_app.url_path_for("get_post_models")
+
+    response = await client.get(url, params={"fields": "id,title", "limit": 1})
+    page = response.json()
+    assert page["items"] == [{"id": post.id, "title": "title"}]
+    assert page["next_cursor"] is None
+
+    response = await client.get(url, params={"fields": "content", "ids": post.id})
+    assert response.json() == {"items": [{"content": "long"}], "missing": []}
+
+    response = await client.get(url, params={"fields": "id,password"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.anyio
+async def test_cursor_pagination_ties(dbsession: AsyncSession) -> None:
+    """Tests that posts with the same creation time are not skipped."""
+    user = await create_user(dbsession)
+    dao = PostDAO(dbsession, None)
+    created_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for i in range(3):
+        post = await dao.create_post_model(title=str(i), content="", user_id=user.id)
+        post.created_at = created_at
+    await dbsession.flush()
+
+    first, cursor = await dao.get_all_posts(limit=2)
+    second, last_cursor = await dao.get_all_posts(limit=2, cursor=cursor)
+
+    assert len(first) == 2
+    assert len(second) == 1
+    assert last_cursor is None
+    assert {post.id for post in first + second} == {
+        post.id for post in await dao.filter_by_title()
+    }
+
+
+@pytest.mark.anyio
+async def test_invalid_cursor(fastapi_app: FastAPI, client: AsyncClient) -> None:
+    """Tests that malformed cursor is rejected."""
+    url = fastapi_app.url_path_for("get_post_models")
+    response = await client.get(url, params={"cursor": "not-a-cursor"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.anyio
+async def test_search(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Tests full-text search ranks title matches first."""
+    user = await create_user(dbsession)
+    dao = PostDAO(dbsession, None)
+    in_content = await dao.create_post_model(
+        title="Weekend",
+        content="we went hiking in the mountains",
+        user_id=user.id,
+    )
+    in_title = await dao.create_post_model(
+        title="Mountains",
+        content="photos from the trip",
+        user_id=user.id,
+    )
+    await dao.create_post_model(title="Cats", content="cute cats", user_id=user.id)
+
+    url = fastapi_app.url_path_for("search_post_models")
+    response = await client.get(url, params={"q": "mountains"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [post["id"] for post in response.json()["items"]] == [
+        in_title.id,
+        in_content.id,
+    ]
+
+    response = await client.get(url, params={"q": "mountains", "limit": 1})
+    cursor = response.json()["next_cursor"]
+    response = await client.get(
+        url,
+        params={"q": "mountains", "limit": 1, "cursor": cursor},
+    )
+    assert [post["id"] for post in response.json()["items"]] == [in_content.id]
+
+
+@pytest.mark.anyio
+async def test_search_prefix(dbsession: AsyncSession) -> None:
+    """Tests search-as-you-type matching of the last word."""
+    user = await create_user(dbsession)
+    dao = PostDAO(dbsession, None)
+    post = await dao.create_post_model(
+        title="Hiking trip",
+        content="",
+        user_id=user.id,
+    )
+
+    assert not (await dao.search_posts("hiking tr", limit=10))[0]
+    found, _ = await dao.search_posts("hiking tr", limit=10, prefix=True)
+    assert [found_post.id for found_post in found] == [post.id]
+
+
+async def auth_headers(client: AsyncClient) -> dict[str, str]:
+    """Register new user and return authorization headers."""
+    credentials = {
+        "email": f"{uuid.uuid4().hex}@example.com",
+        "password": uuid.uuid4().hex,
+    }
+    await client.post("api/auth/register", json=credentials)
+    response = await client.post("api/auth/login", data=credentials)
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.mark.anyio
+async def test_update_post(dbsession: AsyncSession) -> None:
+    """Tests update of own, someone else's and missing post."""
+    owner = await create_user(dbsession)
+    stranger = await create_user(dbsession)
+    dao = PostDAO(dbsession, None)
+    post = await dao.create_post_model(title="old", content="old", user_id=owner.id)
+
+    updated = await dao.update_post(owner.id, post.id, title="new")
+    assert updated.id == post.id
+    assert updated.title == "new"
+    assert updated.content == "old"
+
+    assert await dao.update_post(stranger.id, post.id, title="hacked") is False
+    assert await dao.update_post(owner.id, post.id + 1, title="new") is None
+    assert await dao.update_post(stranger.id, post.id) is False
+    assert (await dao.get_post_by_id(post.id)).title == "new"
+
+
+@pytest.mark.anyio
+async def test_delete_post(dbsession: AsyncSession) -> None:
+    """Tests deletion of own, someone else's and missing post."""
+    owner = await create_user(dbsession)
+    stranger = await create_user(dbsession)
+    dao = PostDAO(dbsession, None)
+    post = await dao.create_post_model(title="post", content="", user_id=owner.id)
+
+    assert await dao.delete_post(post.id, stranger.id) is False
+    assert await dao.delete_post(post.id, owner.id) is True
+    assert await dao.delete_post(post.id, owner.id) is None
+    assert await dao.get_post_by_id(post.id) is None
+
+
+@pytest.mark.anyio
+async def test_update_post_api(fastapi_app: FastAPI, client: AsyncClient) -> None:
+    """Tests status codes of post update endpoint."""
+    owner = await auth_headers(client)
+    stranger = await auth_headers(client)
+    response = await client.post(
+        fastapi_app.url_path_for("create_post_model"),
+        json={"title": "title", "content": "content"},
+        headers=owner,
+    )
+    url = fastapi_app.url_path_for("update_post_model", post_id=response.json()["id"])
+
+    response = await client.patch(url, json={"title": "new"}, headers=owner)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["title"] == "new"
+
+    response = await client.patch(url, json={"title": "x"}, headers=stranger)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    url = fastapi_app.url_path_for("update_post_model", post_id=0)
+    response = await client.patch(url, json={"title": "x"}, headers=owner)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.anyio
+async def test_post_cache(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Tests that post reads are cached and invalidated on update."""
+    headers = await auth_headers(client)
+    response = await client.post(
+        fastapi_app.url_path_for("create_post_model"),
+        json={"title": "title", "content": "content"},
+        headers=headers,
+    )
+    post_id = response.json()["id"]
+    url = fastapi_app.url_path_for("get_post_model", post_id=post_id)
+
+    await client.get(url)
+    await dbsession.execute(
+        update(Post).where(Post.id == post_id).values(title="changed in db"),
+    )
+    response = await client.get(url)
+    assert response.json()["title"] == "title"
+
+    await client.patch(url, json={"content": "new"}, headers=headers)
+    response = await client.get(url)
+    assert response.json()["title"] == "changed in db"
+    assert response.json()["content"] == "new"
+
+
+@pytest.mark.anyio
+async def test_post_cache_invalidated_after_commit(
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Tests that post cached by a read before commit is dropped after it."""
+    user = await create_user(dbsession)
+    dao = PostDAO(dbsession, fake_redis_pool)
+    post = await dao.create_post_model(title="title", content="", user_id=user.id)
+    stale = PostModelDTO.model_validate(post)
+    await dao.update_post(user_id=user.id, post_id=post.id, title="changed")
+
+    # Concurrent read still sees the old row and caches it.
+    cache = PostCache(fake_redis_pool)
+    await cache.set(post.id, stale)
+    await dbsession.commit()
+    await run_committed(dbsession.sync_session)
+
+    found, _ = await cache.get(post.id)
+    assert not found
+
+
+@pytest.mark.anyio
+async def test_post_cache_missing(
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Tests that missing posts are cached too."""
+    dao = PostDAO(dbsession, fake_redis_pool)
+
+    assert await dao.get_post_by_id(0) is None
+    assert await dao.cache.get(0) == (True, None)
+
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        assert await redis.ttl(PostCache.key(0)) > 0
+
+
+@pytest.mark.anyio
+async def test_export(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Tests export of posts in NDJSON and CSV."""
+    author = await create_user(dbsession)
+    someone = await create_user(dbsession)
+    dao = PostDAO(dbsession, None)
+    posts = [
+        await dao.create_post_model(
+            title=f"post {i}",
+            content="a,\n b",
+            user_id=author.id,
+        )
+        for i in range(3)
+    ]
+    await dao.create_post_model(title="other", content="", user_id=someone.id)
+
+    url = fastapi_app.url_path_for("export_post_models")
+    response = await client.get(url, params={"user_id": str(author.id)})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert [post["id"] for post in exported] == [post.id for post in posts]
+
+    response = await client.get(
+        url,
+        params={"user_id": str(author.id), "format": "csv"},
+    )
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [int(row["id"]) for row in rows] == [post.id for post in posts]
+    assert rows[0]["content"] == "a,\n b"
+
+
+@pytest.mark.anyio
+async def test_bulk_create(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Tests bulk creation from JSON array, reporting invalid posts."""
+    headers = await auth_headers(client)
+    url = fastapi_app.url_path_for("bulk_create_post_models")
+
+    response = await client.post(
+        url,
+        json=[
+            {"title": "first", "content": "1"},
+            {"title": "x" * 256, "content": ""},
+            {"content": "no title"},
+            {"title": "second", "content": "2"},
+        ],
+        headers=headers,
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    result = response.json()
+    assert [error["index"] for error in result["errors"]] == [1, 2]
+    posts = [
+        await PostDAO(dbsession, None).get_post_by_id(post_id)
+        for post_id in result["ids"]
+    ]
+    assert [post.title for post in posts] == ["first", "second"]
+
+
+@pytest.mark.anyio
+async def test_bulk_create_ndjson_copy(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Tests bulk creation from NDJSON with COPY and batching."""
+    monkeypatch.setattr(settings, "post_bulk_copy_threshold", 3)
+    monkeypatch.setattr(settings, "post_bulk_batch_size", 4)
+    headers = await auth_headers(client)
+    lines = [json.dumps({"title": f"post {i}", "content": ""}) for i in range(10)]
+    lines.insert(5, "not json")
+
+    response = await client.post(
+        fastapi_app.url_path_for("bulk_create_post_models"),
+        content="\n".join(lines),
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+
+    result = response.json()
+    assert [error["index"] for error in result["errors"]] == [5]
+    assert len(result["ids"]) == 10
+    posts = await PostDAO(dbsession, None).filter_by_title()
+    titles = {post.id: post.title for post in posts}
+    assert [titles[post_id] for post_id in result["ids"]] == [
+        f"post {i}" for i in range(10)
+    ]
+
+
+@pytest.mark.anyio
+async def test_get_posts_by_ids(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Tests batch read keeps order, reports missing posts and fills cache."""
+    user = await create_user(dbsession)
+    dao = PostDAO(dbsession, None)
+    first = await dao.create_post_model(title="first", content="", user_id=user.id)
+    second = await dao.create_post_model(title="second", content="", user_id=user.id)
+    missing = second.id + 1000
+    ids = [second.id, missing, first.id]
+
+    url = fastapi_app.url_path_for("get_post_models")
+    response = await client.get(url, params={"ids": ",".join(map(str, ids))})
+    assert response.status_code == status.HTTP_200_OK
+    assert [post["id"] for post in response.json()["items"]] == [second.id, first.id]
+    assert response.json()["missing"] == [missing]
+
+    cache = PostCache(fake_redis_pool)
+    cached = await cache.get_many(ids)
+    assert cached[missing] is None
+    assert cached[first.id].title == "first"
+
+    await dbsession.execute(
+        update(Post).where(Post.id == first.id).values(title="changed in db"),
+    )
+    response = await client.post(
+        fastapi_app.url_path_for("get_post_models_batch"),
+        json={"ids": [first.id, first.id]},
+    )
+    assert [post["title"] for post in response.json()["items"]] == ["first", "first"]
+
+    response = await client.get(url, params={"ids": "1,x"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.anyio
+async def test_model_response(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Tests that responses serialized by pydantic-core match response models."""
+    user = await create_user(dbsession)
+    dao = PostDAO(dbsession, None)
+    post = await dao.create_post_model(title="title", content="", user_id=user.id)
+    dto = PostModelDTO.model_validate(post)
+    missing = post.id + 1000
+
+    response = await client.post(
+        fastapi_app.url_path_for("get_post_models_batch"),
+        json={"ids": [post.id, missing]},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"] == "application/json"
+    batch = PostBatchDTO(items=[dto], missing=[missing])
+    assert response.json() == batch.model_dump(mode="json")
+
+    # Responses returned by decorated endpoint are sent as is.
+    url = fastapi_app.url_path_for("get_post_models")
+    response = await client.get(url, params={"ids": post.id})
+    response = await client.get(
+        url,
+        params={"ids": post.id},
+        headers={"If-None-Match": response.headers["ETag"]},
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not response.content
+
+    # ORM objects are validated from attributes.
+    response = ModelResponse([post], List[PostModelDTO])
+    assert json.loads(response.body) == [dto.model_dump(mode="json")]
+    response = ModelResponse(
+        batch,
+        PostBatchDTO,
+        include={"items": {"__all__": {"id", "title"}}, "missing": True},
+    )
+    assert json.loads(response.body) == {
+        "items": [{"id": post.id, "title": "title"}],
+        "missing": [missing],
+    }
+
+
+@pytest.mark.anyio
+async def test_trending_posts(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Tests that viewed posts trend and old views fade after rotation."""
+    user = await create_user(dbsession)
+    dao = PostDAO(dbsession, None)
+    first = await dao.create_post_model(title="first", content="", user_id=user.id)
+    second = await dao.create_post_model(title="second", content="", user_id=user.id)
+
+    for post_id in (first.id, second.id, second.id):
+        await client.get(fastapi_app.url_path_for("get_post_model", post_id=post_id))
+    response = await client.get(fastapi_app.url_path_for("get_trending_post_models"))
+    assert [post["id"] for post in response.json()] == [second.id, first.id]
+
+    trending = TrendingPosts(fake_redis_pool)
+    now = period_start(time.time()) + settings.trending_period
+    assert await trending.top(10, now=now) == [second.id, first.id]
+    # One fresh view outweighs two views made a period ago.
+    await trending.record(first.id, now=now)
+    await trending.rotate(now=now)
+    assert await trending.top(10, now=now) == [first.id, second.id]
+
+
+@pytest.mark.anyio
+async def test_similar_posts(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+    similar_posts: SimilarPosts,
+) -> None:
+    """Tests that near duplicates are found before and after index build."""
+    text = "the quick brown fox jumps over the lazy dog near the river bank today"
+    headers = await auth_headers(client)
+    create_url = fastapi_app.url_path_for("create_post_model")
+    ids = []
+    for title, content in (
+        ("fox", text),
+        ("fox", f"{text} again"),
+        ("cats", "cats sleep all day long on a warm sunny window sill"),
+    ):
+        response = await client.post(
+            create_url,
+            json={"title": title, "content": content},
+            headers=headers,
+        )
+        ids.append(response.json()["id"])
+
+    url = fastapi_app.url_path_for("get_similar_post_models", post_id=ids[0])
+    response = await client.get(url)
+    assert [post["id"] for post in response.json()] == [ids[1]]
+
+    await update_similar_index(full=True, session=dbsession, redis_pool=fake_redis_pool)
+    similar_posts.reload(force=True)
+    assert len(similar_posts.index) == 3
+    assert similar_posts.delta.changes == {}
+    response = await client.get(url)
+    assert [post["id"] for post in response.json()] == [ids[1]]
+
+    await client.delete(
+        fastapi_app.url_path_for("delete_post_model", post_id=ids[1]),
+        headers=headers,
+    )
+    response = await client.get(url)
+    assert response.json() == []
+
+    url = fastapi_app.url_path_for("get_similar_post_models", post_id=0)
+    response = await client.get(url)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_similar_index_versions(tmp_path: Path) -> None:
+    """Tests that reload survives removal of the version it's loading."""
+    versions = [SimilarIndex.empty().save(tmp_path) for _ in range(3)]
+    # Previous version is kept for processes loading it.
+    assert sorted(path.name for path in tmp_path.glob("index-*")) == versions[1:]
+
+    similar_posts = SimilarPosts(tmp_path)
+    assert similar_posts.index.version == versions[-1]
+    newer = SimilarIndex.empty().save(tmp_path)
+    shutil.rmtree(tmp_path / newer)
+    similar_posts.reload(force=True)
+    assert similar_posts.index.version == versions[-1]
+
+
+@pytest.mark.anyio
+async def test_view_count(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Tests that views are buffered in redis and flushed in batches."""
+    user = await create_user(dbsession)
+    dao = PostDAO(dbsession, None)
+    first = await dao.create_post_model(title="first", content="", user_id=user.id)
+    second = await dao.create_post_model(title="second", content="", user_id=user.id)
+    first_id, second_id = first.id, second.id
+    updated_at = first.updated_at
+    first_url = fastapi_app.url_path_for("get_post_model", post_id=first_id)
+
+    for count in (1, 2, 3):
+        response = await client.get(first_url)
+        assert response.json()["view_count"] == count
+    await client.get(fastapi_app.url_path_for("get_post_model", post_id=second_id))
+
+    assert await flush_post_views(session=dbsession, redis_pool=fake_redis_pool) == 2
+    # Handlers get new sessions, the test one keeps posts loaded before the flush.
+    dbsession.expire_all()
+    flushed = await dao.get_post_by_id(first_id)
+    assert flushed.view_count == 3
+    # Views aren't modifications, they don't change version of post.
+    assert flushed.updated_at == updated_at
+    assert await flush_post_views(session=dbsession, redis_pool=fake_redis_pool) == 0
+
+    # Views counted during a flush are added to the flushed ones.
+    await client.get(first_url)
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        key = f"posts:views:{first_id % settings.post_views_shards}"
+        await redis.rename(key, f"{key}:flushing")
+    response = await client.get(first_url)
+    assert response.json()["view_count"] == 5
+
+    response = await client.get(
+        fastapi_app.url_path_for("get_post_models"),
+        params={"ids": f"{first_id},{second_id}"},
+    )
+    assert [post["view_count"] for post in response.json()["items"]] == [5, 1]
+
+    # Leftover of the interrupted flush is taken first.
+    assert await flush_post_views(session=dbsession, redis_pool=fake_redis_pool) == 1
+    dbsession.expire_all()
+    assert (await dao.get_post_by_id(first_id)).view_count == 4
+    assert await flush_post_views(session=dbsession, redis_pool=fake_redis_pool) == 1
+    dbsession.expire_all()
+    assert (await dao.get_post_by_id(first_id)).view_count == 5
+
+
+@pytest.mark.anyio
+async def test_view_flush_is_idempotent(
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Tests that views of a flush retried after commit aren't added twice."""
+    user = await create_user(dbsession)
+    dao = PostDAO(dbsession, None)
+    post = await dao.create_post_model(title="title", content="", user_id=user.id)
+    post_id = post.id
+    counter = ViewCounter(fake_redis_pool)
+    for _ in range(2):
+        await counter.count(post_id)
+
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        taken_key, raw_views = await take_buffer(redis, shard_key(post_id))
+        token = await batch_token(redis, taken_key, raw_views)
+        taken = await redis.hgetall(taken_key)
+    assert await flush_post_views(session=dbsession, redis_pool=fake_redis_pool) == 1
+
+    # Worker died after commit, before the buffer was released.
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        await redis.hset(taken_key, mapping=taken)
+        assert await batch_token(redis, taken_key, dict(taken)) == token
+    assert await flush_post_views(session=dbsession, redis_pool=fake_redis_pool) == 0
+    dbsession.expire_all()
+    assert (await dao.get_post_by_id(post_id)).view_count == 2
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        assert not await redis.exists(taken_key)
+
+
+@pytest.mark.anyio
+async def test_conditional_get(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Tests that unchanged posts and pages aren't sent again."""
+    user = await create_user(dbsession)
+    # Update drops the post from the cache used by the handler.
+    dao = PostDAO(dbsession, fake_redis_pool)
+    post = await dao.create_post_model(title="title", content="", user_id=user.id)
+    post_id = post.id
+    post_url = fastapi_app.url_path_for("get_post_model", post_id=post_id)
+    list_url = fastapi_app.url_path_for("get_post_models")
+
+    response = await client.get(post_url)
+    etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+    assert etag.startswith("W/")
+    page = await client.get(list_url, params={"fields": "id,title"})
+    page_etag = page.headers["ETag"]
+
+    response = await client.get(post_url, headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+    assert not response.content
+    response = await client.get(post_url, headers={"If-Modified-Since": last_modified})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    response = await client.get(
+        list_url,
+        params={"fields": "id,title"},
+        headers={"If-None-Match": page_etag},
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    # Other fields are another representation.
+    response = await client.get(list_url, headers={"If-None-Match": page_etag})
+    assert response.status_code == status.HTTP_200_OK
+
+    await dao.update_post(user_id=user.id, post_id=post_id, title="changed")
+    response = await client.get(post_url, headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["title"] == "changed"
+    response = await client.get(
+        list_url,
+        params={"fields": "id,title"},
+        headers={"If-None-Match": page_etag},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["items"] == [{"id": post_id, "title": "changed"}]
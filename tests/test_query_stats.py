@@ -0,0 +1,60 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from loguru import logger
+from prometheus_client import REGISTRY
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette import status
+
+from backend.db.query_stats import QueryStats, fingerprint, instrument_queries
+from backend.settings import settings
+from backend.web.middleware import QueryStatsMiddleware
+
+
+def test_fingerprint() -> None:
+    """Tests that statements differing in values have the same fingerprint."""
+    assert fingerprint(
+        "SELECT posts.id FROM posts\n WHERE posts.id IN ($1::INTEGER, $2::INTEGER)"
+        " AND title = 'it''s' LIMIT 10",
+    ) == ("SELECT posts.id FROM posts WHERE posts.id IN (...) AND title = ? LIMIT ?")
+
+
+@pytest.mark.anyio
+async def test_query_headers(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    _engine: AsyncEngine,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Tests that query statistics are returned in dev environment."""
+    instrument_queries(_engine)
+    monkeypatch.setattr(settings, "environment", "dev")
+    labels = {"method": "GET", "route": "/api/posts/"}
+    requests = REGISTRY.get_sample_value("db_queries_per_request_count", labels) or 0
+
+    response = await client.get(fastapi_app.url_path_for("get_post_models"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["X-DB-Query-Count"] == "1"
+    assert float(response.headers["X-DB-Time-Ms"]) > 0
+    assert REGISTRY.get_sample_value("db_queries_per_request_count", labels) == (
+        requests + 1
+    )
+
+
+def test_repeated_queries_are_reported() -> None:
+    """Tests that the same statement executed many times is logged."""
+    stats = QueryStats()
+    for _ in range(settings.db_n_plus_one_threshold):
+        stats.add("SELECT * FROM users WHERE id = $1", 0.001)
+    stats.add("SELECT * FROM posts", 0.001)
+
+    messages = []
+    handler = logger.add(messages.append, level="WARNING")
+    try:
+        QueryStatsMiddleware.report({"method": "GET"}, stats)
+    finally:
+        logger.remove(handler)
+
+    assert len(messages) == 1
+    assert "SELECT * FROM users WHERE id = ?" in messages[0]
@@ -0,0 +1,151 @@
+import uuid
+from typing import AsyncGenerator
+
+import pytest
+from redis.asyncio import ConnectionPool
+from sqlalchemy import delete, text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from backend.db.dao.posts_dao import PostDAO
+from backend.db.dao.users_dao import UserDAO
+from backend.db.meta import meta
+from backend.db.models.posts import Post
+from backend.db.models.users import User
+from backend.db.replica import ROUTER, ReplicaRouter, RoutingSession, current_user_id
+from backend.settings import settings
+
+REPLICA_BASE = f"{settings.db_base}_replica"
+
+
+@pytest.fixture
+async def replica_engine(_engine: AsyncEngine) -> AsyncGenerator[AsyncEngine, None]:
+    """
+    Create a second database playing the role of replica.
+
+    :param _engine: engine of primary database, so its schema exists.
+    :yield: engine of replica.
+    """
+    admin = create_async_engine(
+        str(settings.db_url.with_path("/postgres")),
+        isolation_level="AUTOCOMMIT",
+    )
+    async with admin.connect() as conn:
+        await conn.execute(text(f'DROP DATABASE IF EXISTS "{REPLICA_BASE}"'))
+        await conn.execute(text(f'CREATE DATABASE "{REPLICA_BASE}"'))
+
+    engine = create_async_engine(str(settings.db_url.with_path(f"/{REPLICA_BASE}")))
+    async with engine.begin() as conn:
+        await conn.run_sync(meta.create_all)
+
+    try:
+        yield engine
+    finally:
+        await engine.dispose()
+        async with admin.connect() as conn:
+            await conn.execute(text(f'DROP DATABASE "{REPLICA_BASE}"'))
+        await admin.dispose()
+
+
+@pytest.mark.anyio
+async def test_replica_routing(
+    _engine: AsyncEngine,
+    replica_engine: AsyncEngine,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Tests that reads go to replica unless the user has just written."""
+    async with AsyncSession(replica_engine, expire_on_commit=False) as session:
+        user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="")
+        session.add(user)
+        await session.commit()
+
+    router = ReplicaRouter(_engine, [replica_engine], fake_redis_pool)
+    session_factory = async_sessionmaker(
+        _engine,
+        sync_session_class=RoutingSession,
+        info={ROUTER: router},
+    )
+
+    async with session_factory() as session:
+        assert await UserDAO(session).get_user_by_id(user.id) is not None
+
+    token = current_user_id.set(user.id)
+    try:
+        await router.stick(user.id)
+        async with session_factory() as session:
+            assert await UserDAO(session).get_user_by_id(user.id) is None
+    finally:
+        current_user_id.reset(token)
+
+    router.lag[replica_engine] = settings.db_replica_max_lag + 1
+    async with session_factory() as session:
+        assert await UserDAO(session).get_user_by_id(user.id) is None
+
+
+@pytest.mark.anyio
+async def test_cached_posts_are_read_from_primary(
+    _engine: AsyncEngine,
+    replica_engine: AsyncEngine,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Tests that posts put in the cache aren't read from replica."""
+    async with AsyncSession(_engine, expire_on_commit=False) as session:
+        user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="")
+        session.add(user)
+        await session.flush()
+        post = Post(title="title", content="", user_id=user.id)
+        session.add(post)
+        await session.commit()
+
+    router = ReplicaRouter(_engine, [replica_engine], fake_redis_pool)
+    session_factory = async_sessionmaker(
+        _engine,
+        sync_session_class=RoutingSession,
+        info={ROUTER: router},
+    )
+    try:
+        async with session_factory() as session:
+            # Replica has no rows, without cache reads go there.
+            assert await PostDAO(session, None).get_post_by_id(post.id) is None
+
+            dao = PostDAO(session, fake_redis_pool)
+            assert await dao.get_posts_by_ids([post.id]) != {}
+            await dao.cache.invalidate_many([post.id])
+            assert await dao.get_post_by_id(post.id) is not None
+    finally:
+        async with AsyncSession(_engine) as session:
+            await session.execute(delete(User).where(User.id == user.id))
+            await session.commit()
+
+
+@pytest.mark.anyio
+async def test_uncommitted_writes_are_read_from_primary(
+    _engine: AsyncEngine,
+    replica_engine: AsyncEngine,
+) -> None:
+    """Tests that session reads its own uncommitted writes."""
+    router = ReplicaRouter(_engine, [replica_engine])
+    session_factory = async_sessionmaker(
+        _engine,
+        sync_session_class=RoutingSession,
+        info={ROUTER: router},
+    )
+
+    async with session_factory() as session:
+        user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="")
+        session.add(user)
+        await session.flush()
+        assert await UserDAO(session).get_user_by_id(user.id) is not None
+        await session.rollback()
+
+
+@pytest.mark.anyio
+async def test_replica_lag(_engine: AsyncEngine, replica_engine: AsyncEngine) -> None:
+    """Tests that lag of a database which isn't replicating is zero."""
+    router = ReplicaRouter(_engine, [replica_engine])
+    await router.measure_lag()
+    assert router.lag == {replica_engine: 0}
@@ -0,0 +1,119 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from prometheus_client import REGISTRY
+from redis.asyncio import ConnectionPool, Redis
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from backend.db.dao.posts_dao import PostDAO
+from backend.db.dao.users_dao import UserDAO
+from backend.db.models.users import User
+from backend.db.single_flight import RELEASE_LOCK, lock_key, result_key
+from backend.schemas.post import PostModelDTO
+from backend.settings import settings
+
+
+def flights(name: str, result: str) -> float:
+    """Get number of calls of the flight with given result."""
+    labels = {"name": name, "result": result}
+    return REGISTRY.get_sample_value("single_flight_calls_total", labels) or 0
+
+
+@pytest.mark.anyio
+async def test_concurrent_reads_share_query(
+    _engine: AsyncEngine,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Tests that concurrent reads of a user in a worker run one query."""
+    hashed_password = uuid.uuid4().hex
+    async with AsyncSession(_engine, expire_on_commit=False) as session:
+        user = User(
+            email=f"{uuid.uuid4().hex}@example.com",
+            hashed_password=hashed_password,
+        )
+        session.add(user)
+        await session.commit()
+
+    sessions = [AsyncSession(_engine) for _ in range(5)]
+    leaders, followers = flights("user", "leader"), flights("user", "local")
+    try:
+        found = await asyncio.gather(
+            *(
+                UserDAO(session, fake_redis_pool).get_user_by_id(user.id)
+                for session in sessions
+            ),
+        )
+        # Every caller gets its own instance with all columns loaded.
+        for session, found_user in zip(sessions, found):
+            assert found_user in session
+            assert found_user.hashed_password == hashed_password
+        # Users have secrets, they aren't published to other workers.
+        async with Redis(connection_pool=fake_redis_pool) as redis:
+            assert await redis.keys("flight:*") == []
+    finally:
+        for session in sessions:
+            await session.close()
+        async with AsyncSession(_engine) as session:
+            await session.execute(delete(User).where(User.id == user.id))
+            await session.commit()
+
+    assert flights("user", "leader") - leaders == 1
+    assert flights("user", "local") - followers == 4
+
+
+@pytest.mark.anyio
+async def test_read_waits_for_other_worker(
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Tests that read uses result of another worker loading the same post."""
+    monkeypatch.setattr(settings, "single_flight_wait", 0.2)
+    now = datetime.now(timezone.utc)
+    post = PostModelDTO(
+        id=0,
+        user_id=uuid.uuid4(),
+        title="loaded elsewhere",
+        content="",
+        created_at=now,
+        updated_at=now,
+    )
+    dao = PostDAO(dbsession, fake_redis_pool)
+
+    async def publish() -> None:
+        await asyncio.sleep(0.05)
+        async with Redis(connection_pool=fake_redis_pool) as redis:
+            await redis.set(result_key("other"), post.model_dump_json())
+
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        await redis.set(lock_key("post", "0"), "other")
+    _, loaded = await asyncio.gather(publish(), dao.load_post_by_id(0))
+    assert loaded == post
+
+    # Worker holding the lock has died, so the read goes to the database.
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        await redis.delete(result_key("other"))
+    fallbacks = flights("post", "fallback")
+    assert await dao.load_post_by_id(0) is None
+    assert flights("post", "fallback") - fallbacks == 1
+
+
+@pytest.mark.anyio
+async def test_leader_releases_only_its_lock(
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Tests that leader doesn't release lock taken by another leader."""
+    dao = PostDAO(dbsession, fake_redis_pool)
+    lock = lock_key("post", "0")
+    assert await dao.load_post_by_id(0) is None
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        assert not await redis.exists(lock)
+
+        # Lock of the leader has expired and another one has taken it.
+        await redis.set(lock, "other")
+        assert await redis.eval(RELEASE_LOCK, 1, lock, "expired") == 0
+        assert await redis.get(lock) == b"other"
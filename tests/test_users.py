@@ -0,0 +1,175 @@
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from redis.asyncio import ConnectionPool
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from backend.db.dao.posts_dao import PostDAO
+from backend.db.dao.users_dao import UserDAO
+from backend.db.models.users import User, UserPrivacy
+from backend.services.activity.tasks import flush_user_activity
+
+
+async def login(client: AsyncClient) -> tuple[uuid.UUID, dict[str, str]]:
+    """Register new user and return its id and authorization headers."""
+    credentials = {
+        "email": f"{uuid.uuid4().hex}@example.com",
+        "password": uuid.uuid4().hex,
+    }
+    response = await client.post("api/auth/register", json=credentials)
+    user_id = uuid.UUID(response.json()["id"])
+    response = await client.post("api/auth/login", data=credentials)
+    return user_id, {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.mark.anyio
+async def test_current_user_is_cached(
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Tests that authenticated user is read from the cache."""
+    user_id, headers = await login(client)
+    await client.get("api/users/me", headers=headers)
+
+    await dbsession.execute(
+        update(User).where(User.id == user_id).values(first_name="Changed"),
+    )
+    response = await client.get("api/users/me", headers=headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["first_name"] is None
+
+
+@pytest.mark.anyio
+async def test_current_user_etag(client: AsyncClient) -> None:
+    """Tests that unchanged profile isn't sent again."""
+    _, headers = await login(client)
+    profile = await client.get("api/users/me", headers=headers)
+    etag = profile.headers["ETag"]
+    assert "private" in profile.headers["Cache-Control"]
+
+    response = await client.get(
+        "api/users/me",
+        headers={**headers, "If-None-Match": etag},
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    await client.patch(
+        "api/users/me",
+        json={**profile.json(), "first_name": "Updated"},
+        headers=headers,
+    )
+    response = await client.get(
+        "api/users/me",
+        headers={**headers, "If-None-Match": etag},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["first_name"] == "Updated"
+
+
+@pytest.mark.anyio
+async def test_profile_update_invalidates_cache(client: AsyncClient) -> None:
+    """Tests that profile updated through API is not stale."""
+    _, headers = await login(client)
+    response = await client.get("api/users/me", headers=headers)
+
+    response = await client.patch(
+        "api/users/me",
+        json={**response.json(), "first_name": "Updated"},
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = await client.get("api/users/me", headers=headers)
+    assert response.json()["first_name"] == "Updated"
+
+
+@pytest.mark.anyio
+async def test_deactivation_invalidates_cache(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Tests that deactivated user loses access at once."""
+    user_id, headers = await login(client)
+    response = await client.get("api/users/me", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+
+    await UserDAO(dbsession, fake_redis_pool).update_user_profile(
+        user_id,
+        {"is_active": False},
+    )
+
+    response = await client.get("api/users/me", headers=headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.anyio
+async def test_activity_is_buffered(
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Tests that login and activity are written to db by the flush task."""
+    user_id, headers = await login(client)
+    response = await client.get("api/users/me", headers=headers)
+    assert response.json()["last_activity_at"] is not None
+
+    user = await UserDAO(dbsession).get_user_by_id(user_id)
+    assert user.last_login_at is None
+    assert user.last_activity_at is None
+
+    assert await flush_user_activity(dbsession, fake_redis_pool) == 2
+    await dbsession.refresh(user)
+    assert user.last_login_at is not None
+    assert user.last_activity_at >= user.last_login_at
+
+    assert await flush_user_activity(dbsession, fake_redis_pool) == 0
+
+
+@pytest.mark.anyio
+async def test_user_posts(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Tests listing of user's posts respects author's privacy."""
+    user_id, headers = await login(client)
+    other_id, _ = await login(client)
+    dao = PostDAO(dbsession, None)
+    created = [
+        await dao.create_post_model(title=f"post {i}", content="", user_id=user_id)
+        for i in range(3)
+    ]
+    await dao.create_post_model(title="other", content="", user_id=other_id)
+
+    url = fastapi_app.url_path_for("get_user_posts", user_id=str(user_id))
+    response = await client.get(url, params={"limit": 2})
+    assert response.status_code == status.HTTP_200_OK
+    page = response.json()
+    response = await client.get(
+        url,
+        params={"limit": 2, "cursor": page["next_cursor"]},
+    )
+    listed = page["items"] + response.json()["items"]
+    assert [post["id"] for post in listed] == [post.id for post in created[::-1]]
+    assert response.json()["next_cursor"] is None
+
+    await dbsession.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(privacy_level=UserPrivacy.PRIVATE),
+    )
+    response = await client.get(url)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    response = await client.get(url, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+
+    url = fastapi_app.url_path_for("get_user_posts", user_id=str(uuid.uuid4()))
+    response = await client.get(url)
+    assert response.status_code == status.HTTP_404_NOT_FOUND